@@ -2,14 +2,13 @@ from rest_framework import serializers, viewsets, status, permissions, filters
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.validators import UniqueValidator
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.db import models
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from django.http import HttpResponse
 from decimal import Decimal
-import random
 from django.contrib.auth import get_user_model, authenticate
 from django.core.cache import cache
 
@@ -18,10 +17,22 @@ User = get_user_model()
 from .models import (
     Household, Member, Survey, SurveyResponse,
     MembershipConfig, Subscription, Receipt, Announcement, ServiceRequest,
-    Ledger, Supplier, JournalEntry, JournalItem, StaffRole, StaffMember, ActivityLog
+    Ledger, Supplier, JournalEntry, JournalItem, StaffRole, StaffMember, ActivityLog,
+    DonorStatementBatch, CensusImport, CustomDataIndex, DeletedVoucher
 )
 from .serializers import SurveySerializer, SurveyResponseSerializer, StaffRoleSerializer, StaffMemberSerializer
 from .services import MembershipService, ProfileService, NotificationService
+from .custom_data import InvalidCustomFilter, custom_data_filter
+from .donor_statements import MAX_FINANCIAL_YEAR, MIN_FINANCIAL_YEAR
+from .search import search_households, search_members
+from .signals import ledger_reports_namespace
+from apps.shared.authentication import PortalUser, account_user
+from apps.shared.context import get_tenant_context
+from apps.shared.otp import OTPError, OTPRateLimited, client_ip, portal_otp_store
+from apps.shared.pagination import StableCursorPagination
+from apps.shared.phone import normalize_phone
+from apps.shared.sparse_fields import SparseFieldsetMixin, SparseFieldsetViewMixin
+from apps.shared.tokens import issue_tokens, revoke_tokens
 
 
 
@@ -45,22 +56,19 @@ class HasStaffPermission(permissions.BasePermission):
         if not required_module:
             return True
             
-        try:
-            from .models import StaffMember
-            staff = StaffMember.objects.select_related('role').get(user=request.user)
-            user_perms = staff.role.permissions
+        context = get_tenant_context(request)
+        if not context.is_staff_member:
+            return False
             
-            # Module-level access check
-            access_level = user_perms.get(required_module)
-            if not access_level or access_level == 'none':
-                return False
-                
-            if access_level == 'read' and request.method not in permissions.SAFE_METHODS:
-                return False
-                
-            return True
-        except StaffMember.DoesNotExist:
+        # Module-level access check
+        access_level = context.module_access(required_module)
+        if not access_level:
             return False
+            
+        if access_level == 'read' and request.method not in permissions.SAFE_METHODS:
+            return False
+            
+        return True
 
 class MosqueScopedViewSet(viewsets.ModelViewSet):
     """
@@ -70,22 +78,17 @@ class MosqueScopedViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         qs = super().get_queryset()
         # Find Mosque context for Staff Admin Users
-        if self.request.user.is_authenticated:
-            try:
-                from .models import StaffMember
-                staff = StaffMember.objects.get(user=self.request.user)
-                return qs.filter(mosque=staff.mosque)
-            except StaffMember.DoesNotExist:
-                pass
+        context = get_tenant_context(self.request)
+        if context.is_staff_member:
+            return qs.filter(mosque_id=context.mosque_id)
                 
         return qs.none()
 
     def perform_create(self, serializer):
-        try:
-            from .models import StaffMember
-            staff = StaffMember.objects.get(user=self.request.user)
-            serializer.save(mosque=staff.mosque)
-        except StaffMember.DoesNotExist:
+        context = get_tenant_context(self.request)
+        if context.is_staff_member:
+            serializer.save(mosque_id=context.mosque_id)
+        else:
             super().perform_create(serializer)
 
 # ============================================================================
@@ -170,11 +173,8 @@ class MemberStaffLookupView(APIView):
         results = []
         
         # 1. Search Members (Any adult member, not just heads)
-        members = Member.objects.filter(
-            is_alive=True
-        ).filter(
-            models.Q(full_name__icontains=query) | 
-            models.Q(household__phone_number__icontains=query)
+        members = search_members(
+            query, Member.objects.filter(is_alive=True)
         ).select_related('household')[:10]
         
         for m in members:
@@ -215,7 +215,7 @@ class MemberStaffLookupView(APIView):
 # SERIALIZERS
 # ============================================================================
 
-class MemberSerializer(serializers.ModelSerializer):
+class MemberSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     age = serializers.SerializerMethodField()
     
     membership_id = serializers.CharField(source='household.membership_id', read_only=True)
@@ -227,6 +227,10 @@ class MemberSerializer(serializers.ModelSerializer):
                   'gender', 'dob', 'age', 'membership_id', 'marital_status', 'profession', 
                   'education', 'skills', 'is_employed', 'monthly_income', 
                   'requirements', 'is_alive', 'is_approved', 'household', 'created_by_name']
+        expandable_fields = {
+            'household': ('apps.jamath.api.HouseholdSerializer',
+                          ['id', 'membership_id', 'address', 'phone_number', 'economic_status', 'is_verified']),
+        }
     
     def get_age(self, obj):
         if obj.dob:
@@ -236,26 +240,39 @@ class MemberSerializer(serializers.ModelSerializer):
         return None
 
 
-class HouseholdSerializer(serializers.ModelSerializer):
+class PhoneNumberField(serializers.CharField):
+    """Accepts any common phone format and stores E.164."""
+
+    def to_internal_value(self, data):
+        normalized = normalize_phone(super().to_internal_value(data))
+        if not normalized:
+            raise serializers.ValidationError('Enter a valid phone number.')
+        return normalized
+
+
+class HouseholdSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     members = MemberSerializer(many=True, read_only=True)
+    # Normalised before the uniqueness check, so "98765 43210" clashes with "+919876543210"
+    phone_number = PhoneNumberField(
+        max_length=20, required=False, allow_null=True, allow_blank=True,
+        validators=[UniqueValidator(queryset=Household.objects.all())],
+    )
     member_count = serializers.IntegerField(read_only=True)
-    head_name = serializers.SerializerMethodField()
+    head_name = serializers.CharField(read_only=True)
     is_membership_active = serializers.BooleanField(read_only=True)
+    membership_status = serializers.CharField(source='current_membership_status', read_only=True)
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
     
     class Meta:
         model = Household
         fields = ['id', 'membership_id', 'address', 'economic_status', 'housing_status',
                   'phone_number', 'is_verified', 'zakat_score', 'member_count', 
-                  'head_name', 'is_membership_active', 'members', 'custom_data', 'created_at', 'created_by_name']
-        read_only_fields = ['zakat_score', 'member_count', 'is_membership_active']
-    
-    def get_head_name(self, obj):
-        head = obj.members.filter(is_head_of_family=True).first()
-        return head.full_name if head else "Unknown"
+                  'head_name', 'is_membership_active', 'membership_status', 'membership_valid_until',
+                  'members', 'custom_data', 'created_at', 'created_by_name']
+        read_only_fields = ['zakat_score', 'member_count', 'is_membership_active', 'membership_valid_until']
 
 
-class ReceiptSerializer(serializers.ModelSerializer):
+class ReceiptSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
     class Meta:
         model = Receipt
@@ -263,7 +280,7 @@ class ReceiptSerializer(serializers.ModelSerializer):
                   'donation_portion', 'payment_date', 'pdf_url', 'notes', 'created_by_name']
 
 
-class SubscriptionSerializer(serializers.ModelSerializer):
+class SubscriptionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     receipts = ReceiptSerializer(many=True, read_only=True)
     
     class Meta:
@@ -272,7 +289,7 @@ class SubscriptionSerializer(serializers.ModelSerializer):
                   'minimum_required', 'status', 'receipts']
 
 
-class AnnouncementSerializer(serializers.ModelSerializer):
+class AnnouncementSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
     
     class Meta:
@@ -282,7 +299,7 @@ class AnnouncementSerializer(serializers.ModelSerializer):
                   'is_fundraiser', 'fundraising_target']
 
 
-class ServiceRequestSerializer(serializers.ModelSerializer):
+class ServiceRequestSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     request_type_display = serializers.CharField(source='get_request_type_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     requester_name = serializers.SerializerMethodField()
@@ -307,7 +324,7 @@ class ServiceRequestSerializer(serializers.ModelSerializer):
         return obj.household.membership_id or "Unknown"
 
 
-class MembershipConfigSerializer(serializers.ModelSerializer):
+class MembershipConfigSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = MembershipConfig
         fields = ['id', 'cycle', 'minimum_fee', 'currency', 'membership_id_prefix', 
@@ -315,14 +332,23 @@ class MembershipConfigSerializer(serializers.ModelSerializer):
                   'is_strict_accounting',
                   'payment_gateway_provider', 'razorpay_key_id', 'razorpay_key_secret',
                   'cashfree_app_id', 'cashfree_secret_key',
-                  'organization_name', 'organization_address', 'organization_pan', 'registration_number_80g']
+                  'organization_name', 'organization_address', 'organization_pan', 'registration_number_80g',
+                  'zakat_rules']
+
+    def validate_zakat_rules(self, value):
+        from .zakat_scoring import InvalidZakatRules, validate_zakat_rules
+        try:
+            validate_zakat_rules(value)
+        except InvalidZakatRules as e:
+            raise serializers.ValidationError(str(e))
+        return value
 
 
 # ============================================================================
 # MIZAN LEDGER SERIALIZERS
 # ============================================================================
 
-class LedgerSerializer(serializers.ModelSerializer):
+class LedgerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     balance = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
     children = serializers.SerializerMethodField()
 
@@ -334,16 +360,17 @@ class LedgerSerializer(serializers.ModelSerializer):
 
     def get_children(self, obj):
         children = obj.children.filter(is_active=True)
-        return LedgerSerializer(children, many=True).data if children.exists() else []
+        # Children share the parent's ?fields=
+        return LedgerSerializer(children, many=True, context=self.context).data
 
 
-class SupplierSerializer(serializers.ModelSerializer):
+class SupplierSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Supplier
         fields = ['id', 'name', 'contact_person', 'phone', 'address', 'gstin', 'is_active']
 
 
-class JournalItemSerializer(serializers.ModelSerializer):
+class JournalItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     ledger_name = serializers.CharField(source='ledger.name', read_only=True)
     ledger_code = serializers.CharField(source='ledger.code', read_only=True)
 
@@ -352,7 +379,7 @@ class JournalItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'ledger', 'ledger_name', 'ledger_code', 'debit_amount', 'credit_amount', 'particulars']
 
 
-class JournalEntrySerializer(serializers.ModelSerializer):
+class JournalEntrySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     items = JournalItemSerializer(many=True)
     total_amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
     donor_name = serializers.SerializerMethodField()
@@ -370,6 +397,10 @@ class JournalEntrySerializer(serializers.ModelSerializer):
                   'payment_mode', 'is_finalized', 'total_amount', 'items', 'is_zakat',
                   'created_by_name', 'created_at']
         read_only_fields = ['voucher_number', 'is_finalized', 'created_at']
+        expandable_fields = {
+            'donor': (MemberSerializer, ['id', 'full_name', 'membership_id']),
+            'supplier': (SupplierSerializer, None),
+        }
 
     def get_is_zakat(self, obj):
         # Efficiently check if any item is a Zakat fund
@@ -436,8 +467,7 @@ class JournalEntrySerializer(serializers.ModelSerializer):
 # OTP AUTHENTICATION
 # ============================================================================
 
-# In-memory OTP store (use Redis in production)
-from django.core.cache import cache
+# Codes are kept in the shared OTP store (Redis), see apps/shared/otp.py
 
 
 class RequestOTPView(APIView):
@@ -448,47 +478,34 @@ class RequestOTPView(APIView):
         from django.db import connection
         from apps.shared.utils import is_demo_tenant
         
-        phone = request.data.get('phone_number')
-        
-        if not phone:
+        if not request.data.get('phone_number'):
             return Response({'error': 'Phone number is required'}, status=400)
-        
-        # Check if phone is registered with a household
-        household = None
+
+        # Codes are keyed by the E.164 form, so any input format verifies
+        phone = normalize_phone(request.data['phone_number'])
+
+        # Throttle before the lookup so unregistered numbers are limited the
+        # same way and the endpoint can't be used to enumerate members
         try:
-            household = Household.objects.get(phone_number=phone)
-        except Household.DoesNotExist:
-            # Try alternate formats (with/without +91)
-            alt_phone = None
-            if phone.startswith('+91'):
-                alt_phone = phone[3:]  # Try removing +91
-            else:
-                alt_phone = f"+91{phone}" # Try adding +91
-            
-            if alt_phone:
-                try:
-                    household = Household.objects.get(phone_number=alt_phone)
-                except Household.DoesNotExist:
-                    pass
+            portal_otp_store.check_rate_limit(phone, client_ip(request))
+        except OTPRateLimited as e:
+            return Response({'error': str(e)}, status=429, headers={'Retry-After': str(e.retry_after)})
 
+        household = Household.find_by_phone(phone)
         if not household:
              return Response({
                 'error': 'Number not registered with Jamath. Please contact Admin.'
             }, status=404)
-        
+
         # Generate OTP - Demo/Panambur tenant uses fixed OTP, production uses random
         schema_name = connection.schema_name
         if is_demo_tenant() or schema_name == 'panambur':
             otp = '123456'  # Fixed OTP for demo/local testing
         else:
-            otp = str(random.randint(100000, 999999))
+            otp = None
         
-        # Store OTP
-        cache.set(f"otp:{phone}", {
-            'otp': otp,
-            'household_id': household.id,
-            'expires': timezone.now() + timezone.timedelta(minutes=5)
-        }, timeout=300)
+        # Store OTP (expires after the store's TTL)
+        otp = portal_otp_store.issue(phone, code=otp, household_id=household.id)
         
         # Send OTP
         if is_demo_tenant() or schema_name == 'panambur':
@@ -512,53 +529,25 @@ class VerifyOTPView(APIView):
     permission_classes = [AllowAny]
     
     def post(self, request):
-        phone = request.data.get('phone_number')
+        phone = normalize_phone(request.data.get('phone_number'))
         otp = request.data.get('otp')
         
-        if not phone or not otp:
+        if not request.data.get('phone_number') or not otp:
             return Response({'error': 'Phone and OTP are required'}, status=400)
         
-        stored = cache.get(f"otp:{phone}")
-        
-        if not stored:
-            # Allow magic OTP even if expired/not found in cache (for easier dev flow)
-            if otp == '123456':
-                pass # Proceed to verify if household exists
-            else:
-                return Response({'error': 'OTP expired or not found'}, status=400)
-        
-        # Validate OTP
-        if stored and stored['otp'] != otp:
-             # Magic OTP for demo/dev (universally allowed for 123456)
-             if otp != '123456':
-                 return Response({'error': 'Invalid OTP'}, status=400)
-        
-        if stored and stored['expires'] < timezone.now():
-             if otp != '123456': # Magic OTP never expires
-                 cache.delete(f"otp:{phone}")
-                 return Response({'error': 'OTP expired'}, status=400)
+        try:
+            stored = portal_otp_store.verify(phone, otp)
+        except OTPError as e:
+            # Magic OTP for demo/dev (universally allowed for 123456, never expires)
+            if otp != '123456':
+                return Response({'error': str(e)}, status=400)
+            stored = None
         
         if stored:
             household = Household.objects.get(id=stored['household_id'])
         else:
             # Fallback for magic Login without request
-            household = None
-            try:
-                household = Household.objects.get(phone_number=phone)
-            except Household.DoesNotExist:
-                # Try alternate formats
-                alt_phone = None
-                if phone.startswith('+91'):
-                    alt_phone = phone[3:]
-                else:
-                    alt_phone = f"+91{phone}"
-                
-                if alt_phone:
-                    try:
-                        household = Household.objects.get(phone_number=alt_phone)
-                    except Household.DoesNotExist:
-                        pass
-
+            household = Household.find_by_phone(phone)
             if not household:
                 return Response({'error': 'Household not found'}, status=404)
         
@@ -576,10 +565,7 @@ class VerifyOTPView(APIView):
             defaults={'first_name': head.full_name if head else 'Member'}
         )
         
-        refresh = RefreshToken.for_user(user)
-        
-        # Cleanup
-        cache.delete(f"otp:{phone}")
+        refresh = issue_tokens(user, household)
         
         return Response({
             'access': str(refresh.access_token),
@@ -611,16 +597,7 @@ class PortalLoginView(APIView):
         household = None
         
         # Try as Phone Number
-        clean_identifier = identifier.replace(' ', '').replace('-', '')
-        if clean_identifier.isdigit() or (clean_identifier.startswith('+') and clean_identifier[1:].isdigit()):
-             # Check for exact, +91, or without +91
-             possible_numbers = [clean_identifier]
-             if not clean_identifier.startswith('+'):
-                 possible_numbers.append(f"+91{clean_identifier}")
-             elif clean_identifier.startswith('+91'):
-                 possible_numbers.append(clean_identifier[3:])
-             
-             household = Household.objects.filter(phone_number__in=possible_numbers).first()
+        household = Household.find_by_phone(identifier)
         
         # Try as Membership ID
         if not household:
@@ -654,7 +631,7 @@ class PortalLoginView(APIView):
              return Response({'error': 'Invalid password'}, status=400)
              
         # 4. Generate Tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = issue_tokens(user, household)
         
         head = household.members.filter(is_head_of_family=True).first()
         
@@ -859,17 +836,13 @@ class StaffMemberViewSet(MosqueScopedViewSet):
         Allows bootstrapping the UI without needing 'users' permission.
         """
         # Find staff member for current user
-        staff_member = StaffMember.objects.filter(user=request.user, is_active=True).select_related('role').first()
-        
-        if not staff_member:
+        context = get_tenant_context(request)
+        if not context.is_staff_member or not context.snapshot['is_active']:
             return Response({'error': 'Not a staff member'}, status=403)
             
-        data = StaffMemberSerializer(staff_member).data
+        data = StaffMemberSerializer(context.staff).data
         # Include merged permissions directly for easier frontend consumption
-        role_perms = staff_member.role.permissions if staff_member.role else {}
-        member_override = staff_member.permissions or {}
-        
-        data['permissions'] = {**role_perms, **member_override}
+        data['permissions'] = context.permissions
         return Response(data)
     
     def create(self, request, *args, **kwargs):
@@ -985,49 +958,88 @@ class StaffMemberViewSet(MosqueScopedViewSet):
 # ============================================================================
 
 class AdminPendingMembersView(APIView):
-    """View and approve pending member profiles."""
+    """
+    View and approve pending member profiles of the admin's mosque.
+
+    POST `{"member_ids": [...], "action": "approve" | "reject"}` decides a
+    whole batch with one UPDATE (or DELETE) and one audit entry; the old
+    single `member_id` form still works.
+    """
     permission_classes = [IsAdminUser]
-    
+    pagination_class = StableCursorPagination
+    cursor_ordering = ('id',)
+    # Members decided per request
+    max_batch = 1000
+
+    def _mosque_id(self, request):
+        context = get_tenant_context(request)
+        return context.staff_mosque.id if context.is_staff_member and context.staff_mosque else None
+
     def get(self, request):
-        pending = ProfileService.get_pending_members()
-        return Response(MemberSerializer(pending, many=True).data)
-    
+        mosque_id = self._mosque_id(request)
+        if mosque_id is None:
+            return Response({'error': 'Reviewing members needs a mosque staff account'}, status=400)
+        pending = ProfileService.get_pending_members(mosque_id)
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(pending, request, view=self)
+        if page is None:
+            return Response(MemberSerializer(pending.order_by(*self.cursor_ordering), many=True).data)
+        return paginator.get_paginated_response(MemberSerializer(page, many=True).data)
+
     def post(self, request):
-        member_id = request.data.get('member_id')
+        mosque_id = self._mosque_id(request)
+        if mosque_id is None:
+            return Response({'error': 'Reviewing members needs a mosque staff account'}, status=400)
         action = request.data.get('action')  # 'approve' or 'reject'
-        
+        if action not in ('approve', 'reject'):
+            return Response({'error': 'Invalid action'}, status=400)
+
+        single = 'member_ids' not in request.data
+        member_ids = [request.data.get('member_id')] if single else request.data.get('member_ids')
+        if not isinstance(member_ids, list) or not member_ids:
+            return Response({'error': 'member_ids must be a non-empty list'}, status=400)
+        if len(member_ids) > self.max_batch:
+            return Response({'error': f'At most {self.max_batch} members per request'}, status=400)
         try:
-            member = Member.objects.get(id=member_id)
-        except Member.DoesNotExist:
-            return Response({'error': 'Member not found'}, status=404)
-        
+            member_ids = list(dict.fromkeys(int(member_id) for member_id in member_ids))
+        except (TypeError, ValueError):
+            if single:
+                return Response({'error': 'Member not found'}, status=404)
+            return Response({'error': 'member_ids must be integers'}, status=400)
+
         if action == 'approve':
-            ProfileService.approve_member(member, approved_by=request.user)
-            ActivityLog.objects.create(
-                user=request.user,
-                action='UPDATE',
-                module='users',
-                model_name='Member',
-                object_id=str(member.id),
-                details=f"Approved member: {member.full_name}"
-            )
-            return Response({'message': 'Member approved'})
-        elif action == 'reject':
-            member.delete()
+            decided = ProfileService.approve_members(mosque_id, member_ids)
+            verb, log_action = 'Approved', 'UPDATE'
+        else:
+            decided = ProfileService.reject_members(mosque_id, member_ids)
+            verb, log_action = 'Rejected', 'DELETE'
+        if single and not decided:
+            return Response({'error': 'Member not found'}, status=404)
+
+        if decided:
+            # One entry for the batch rather than one per member
             ActivityLog.objects.create(
+                mosque_id=mosque_id,
                 user=request.user,
-                action='DELETE',
+                action=log_action,
                 module='users',
                 model_name='Member',
-                object_id=str(member_id),
-                details=f"Rejected member application: {member.full_name}"
+                object_id=str(decided[0][0]) if len(decided) == 1 else None,
+                details=f"{verb} {len(decided)} member(s): "
+                        + ', '.join(f"{name} (#{pk})" for pk, _, name in decided),
             )
-            return Response({'message': 'Member rejected and removed'})
-        
-        return Response({'error': 'Invalid action'}, status=400)
+        found = {pk for pk, _, _ in decided}
+        key = 'approved' if action == 'approve' else 'rejected'
+        return Response({key: len(decided), 'not_found': [pk for pk in member_ids if pk not in found]})
 
 
 def get_user_mosque(user):
+    """
+    Mosque for a user. Pass the request instead of `request.user` inside
+    views so the request's tenant context is reused.
+    """
+    if hasattr(user, 'user'):
+        return get_tenant_context(user).mosque
     if not user.is_authenticated: return None
     if user.username.startswith('member_'):
         try:
@@ -1048,11 +1060,11 @@ class AdminMembershipConfigView(APIView):
     permission_classes = [IsAdminUser]
     
     def get(self, request):
-        config = MembershipService.get_or_create_config(mosque=get_user_mosque(request.user))
+        config = MembershipService.get_or_create_config(mosque=get_user_mosque(request))
         return Response(MembershipConfigSerializer(config).data)
     
     def put(self, request):
-        config = MembershipService.get_or_create_config(mosque=get_user_mosque(request.user))
+        config = MembershipService.get_or_create_config(mosque=get_user_mosque(request))
         serializer = MembershipConfigSerializer(config, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
@@ -1064,17 +1076,68 @@ class AdminMembershipConfigView(APIView):
 # EXISTING VIEWSETS (Updated)
 # ============================================================================
 
-class HouseholdViewSet(AuditLogMixin, MosqueScopedViewSet):
-    queryset = Household.objects.prefetch_related(
-        models.Prefetch('members', queryset=Member.objects.order_by('-is_head_of_family', 'dob'))
-    ).distinct()
+class CensusSearchFilter(filters.SearchFilter):
+    """`?search=` through the trigram census search (apps/jamath/search.py)."""
+
+    def filter_queryset(self, request, queryset, view):
+        query = ' '.join(self.get_search_terms(request))
+        if not query:
+            return queryset
+        ranked = search_households(query, queryset)
+        if filters.OrderingFilter.ordering_param in request.query_params:
+            return ranked.order_by(*queryset.query.order_by)
+        return ranked
+
+
+class CustomDataFilter(filters.BaseFilterBackend):
+    """`?custom.<key>=` filters on the view's `custom_data` (apps/jamath/custom_data.py)."""
+
+    def filter_queryset(self, request, queryset, view):
+        context = get_tenant_context(request)
+        indexed = CustomDataIndex.ready_keys(context.mosque_id, view.custom_data_target) \
+            if context.is_staff_member else ()
+        try:
+            condition = custom_data_filter(request.query_params, indexed)
+        except InvalidCustomFilter as e:
+            raise serializers.ValidationError({'error': str(e)})
+        return queryset.filter(condition)
+
+
+class HouseholdViewSet(SparseFieldsetViewMixin, AuditLogMixin, MosqueScopedViewSet):
+    queryset = Household.objects.all()
     serializer_class = HouseholdSerializer
+    select_related_fields = {'created_by_name': ['created_by']}
+    prefetch_related_fields = {
+        'members': [models.Prefetch(
+            'members',
+            queryset=Member.objects.select_related('created_by').order_by('-is_head_of_family', 'dob'),
+        )],
+    }
     permission_classes = [IsAdminUser | HasStaffPermission]
     required_module = 'jamath'
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['membership_id', 'address', 'phone_number', 'members__full_name']
+    # Search runs last so its relevance order wins unless ?ordering= is given
+    filter_backends = [CustomDataFilter, filters.OrderingFilter, CensusSearchFilter]
+    custom_data_target = CustomDataIndex.Target.HOUSEHOLD
     ordering = ['membership_id']
     ordering_fields = ['membership_id', 'id']
+    cursor_ordering = ('membership_id', 'id')
+
+    def get_cursor_ordering(self, queryset):
+        # Search results page best match first, like the unpaginated list
+        if 'search_rank' in queryset.query.annotations:
+            return ('-search_rank', 'id')
+        return self.cursor_ordering
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # ?membership=ACTIVE|PENDING|EXPIRED, or "due" for renewal lists
+        membership = self.request.query_params.get('membership', '').upper()
+        if membership == 'DUE':
+            queryset = queryset.renewals_due()
+        elif membership in Household.MembershipStatus.values:
+            queryset = queryset.with_membership(membership)
+        summary = [name for name in queryset.SUMMARY_FIELDS if self.wants_field(name)]
+        return queryset.with_summary(*summary) if summary else queryset
 
     @action(detail=True, methods=['post'])
     def activate_subscription(self, request, pk=None):
@@ -1097,6 +1160,72 @@ class HouseholdViewSet(AuditLogMixin, MosqueScopedViewSet):
         
         return Response({'status': 'activated'})
 
+    @action(detail=False, methods=['post'], url_path='rescore-zakat')
+    def rescore_zakat(self, request):
+        """
+        Rescore every household of the mosque under its current Zakat rules
+        (apps/jamath/zakat_scoring.py), e.g. after the rules change.
+
+        Returns counts and the households whose economic status changed;
+        `?dry_run=true` reports without saving.
+        """
+        from .zakat_scoring import rescore_mosque
+
+        context = get_tenant_context(request)
+        if not context.is_staff_member:
+            return Response({'error': 'Rescoring needs a mosque staff account'}, status=400)
+
+        dry_run = request.query_params.get('dry_run', '').lower() == 'true'
+        report = rescore_mosque(context.mosque_id, dry_run=dry_run)
+        if not dry_run:
+            ActivityLog.objects.create(
+                mosque_id=context.mosque_id, user=request.user, action='UPDATE', module='jamath',
+                model_name='Household',
+                details=(f"Rescored Zakat eligibility for {report['scored']} households "
+                         f"({len(report['category_changes'])} changed category)"),
+            )
+        return Response(report)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Download the census as CSV (streamed) or XLSX (`?type=xlsx`).
+
+        `?rows=households` gives one row per household instead of per member;
+        `?columns=` picks columns (including `custom.<key>`); `economic_status`,
+        `housing_status`, `is_verified`, `custom.<key>` and `search` filter.
+        """
+        from django.http import FileResponse, StreamingHttpResponse
+        from .census_export import (
+            CHUNK_SIZE, InvalidExport, filter_households, iter_csv, resolve_columns, write_xlsx
+        )
+
+        file_type = request.query_params.get('type', 'csv').lower()
+        if file_type not in ('csv', 'xlsx'):
+            return Response({'error': "type must be 'csv' or 'xlsx'"}, status=400)
+        member_rows = request.query_params.get('rows', 'members') != 'households'
+
+        try:
+            columns = resolve_columns(request.query_params.get('columns'), member_rows)
+            households = filter_households(self.filter_queryset(self.get_queryset()), request.query_params)
+        except InvalidExport as e:
+            return Response({'error': str(e)}, status=400)
+
+        if not member_rows:
+            households = households.prefetch_related(None)
+        # Server-side cursor; members are prefetched one chunk at a time
+        households = households.iterator(chunk_size=CHUNK_SIZE)
+
+        filename = f"Census_{timezone.now():%Y%m%d}.{file_type}"
+        if file_type == 'xlsx':
+            return FileResponse(
+                write_xlsx(households, columns, member_rows), as_attachment=True, filename=filename,
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
+        response = StreamingHttpResponse(iter_csv(households, columns, member_rows),
+                                         content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
 
 
 class MembershipConfigViewSet(MosqueScopedViewSet):
@@ -1115,11 +1244,16 @@ class MembershipConfigViewSet(MosqueScopedViewSet):
         return super().get_permissions()
 
 
-class MemberViewSet(AuditLogMixin, MosqueScopedViewSet):
+class MemberViewSet(SparseFieldsetViewMixin, AuditLogMixin, MosqueScopedViewSet):
     queryset = Member.objects.all()
     serializer_class = MemberSerializer
+    select_related_fields = {'membership_id': ['household'], 'created_by_name': ['created_by']}
+    expand_select_related = {'household': ['household']}
     permission_classes = [IsAdminUser | HasStaffPermission]
     required_module = 'jamath'
+    filter_backends = [CustomDataFilter]
+    custom_data_target = CustomDataIndex.Target.MEMBER
+    cursor_ordering = ('id',)
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -1129,6 +1263,135 @@ class MemberViewSet(AuditLogMixin, MosqueScopedViewSet):
         return queryset
 
 
+class CensusStatsView(APIView):
+    """
+    Census statistics for the dashboard: households by economic, verification
+    and housing status; members by gender, employment, age band and marital
+    status. Served from the mosque's CensusSnapshot (apps/jamath/census_stats.py).
+    """
+    permission_classes = [IsAdminUser | HasStaffPermission]
+    required_module = 'jamath'
+
+    def get(self, request):
+        from .census_stats import get_census_stats
+
+        context = get_tenant_context(request)
+        # Superusers without a staff assignment see every mosque, as in MosqueScopedViewSet
+        mosque_id = context.mosque_id if context.is_staff_member else None
+        return Response(get_census_stats(mosque_id))
+
+
+class SyncView(APIView):
+    """
+    Delta sync for offline census and portal clients (apps/jamath/sync.py).
+
+    `GET ?token=<token from the last sync>&models=household,member` returns,
+    per model, records created or updated since (`changed`) and ids to drop
+    (`deleted`), plus a new token. Without a token everything is sent; with
+    `reset` the client should clear its copy first. Keep calling while
+    `has_more` is true.
+
+    Staff get their mosque's records for the modules they can read; portal
+    members get their own household, members and service requests and the
+    announcements shown to them.
+    """
+    permission_classes = [IsAuthenticated]
+    MODULES = {'household': 'jamath', 'member': 'jamath', 'announcement': 'announcements',
+               'service_request': 'welfare'}
+
+    def get(self, request):
+        from .sync import SYNC_MODELS, changes_since, make_token, needs_reset, read_token
+
+        if isinstance(request.user, PortalUser):
+            mosque_id, household_id = request.user.mosque_id, request.user.household_id
+            allowed = SYNC_MODELS
+        else:
+            context = get_tenant_context(request)
+            if not context.is_staff_member:
+                return Response({'error': 'Sync needs a mosque staff or member account'}, status=403)
+            mosque_id, household_id = context.mosque_id, None
+            allowed = [name for name in SYNC_MODELS
+                       if request.user.is_superuser or context.module_access(self.MODULES[name])]
+
+        requested = request.query_params.get('models')
+        names = [n.strip() for n in requested.split(',') if n.strip()] if requested else list(allowed)
+        unknown = [n for n in names if n not in allowed]
+        if unknown:
+            return Response({'error': f"Can't sync: {', '.join(unknown)}"}, status=400)
+
+        since, as_of, reset = 0, None, False
+        token = request.query_params.get('token')
+        if token:
+            parsed = read_token(token, mosque_id)
+            if parsed is None or needs_reset(mosque_id, parsed[0]):
+                reset = True
+            else:
+                since, as_of = parsed
+
+        now = timezone.now()
+        entries, has_more = changes_since(mosque_id, since, names, household_id)
+        changed_ids = {name: set() for name in names}
+        for entry in entries:
+            changed_ids[entry['model']].add(entry['object_id'])
+        if household_id is not None and as_of is not None and not has_more and 'announcement' in names:
+            # Scheduled announcements go live or expire without being saved
+            changed_ids['announcement'] |= set(Announcement.objects.filter(mosque_id=mosque_id).filter(
+                models.Q(published_at__gt=as_of, published_at__lte=now) |
+                models.Q(expires_at__gt=as_of, expires_at__lte=now)
+            ).values_list('id', flat=True))
+
+        changes = {}
+        for name in names:
+            queryset, serializer = self._source(name, mosque_id, household_id, now)
+            objects = list(queryset.filter(id__in=changed_ids[name])) if changed_ids[name] else []
+            # Deleted records, and records the client may no longer see (a
+            # member moved out, say), are withdrawn alike. Going by what is
+            # visible now also settles an object with a tombstone in one
+            # household and a live entry in another.
+            hidden = changed_ids[name] - {obj.pk for obj in objects}
+            changes[name] = {
+                'changed': serializer(objects, many=True, context={'request': request}).data,
+                'deleted': sorted(hidden),
+            }
+
+        seq = entries[-1]['seq'] if entries else since
+        return Response({
+            'token': make_token(mosque_id, seq, (as_of or now) if has_more else now),
+            'reset': reset,
+            'has_more': has_more,
+            'changes': changes,
+        })
+
+    @staticmethod
+    def _source(name, mosque_id, household_id, now):
+        """Queryset of records the client may see, and the serializer to send them with."""
+        if name == 'household':
+            queryset = Household.objects.filter(mosque_id=mosque_id).with_summary().select_related('created_by')
+            if household_id is not None:
+                queryset = queryset.filter(pk=household_id)
+            # Members sync on their own
+            fields = [f for f in HouseholdSerializer.Meta.fields if f != 'members']
+            return queryset, lambda *args, **kwargs: HouseholdSerializer(*args, default_fields=fields, **kwargs)
+        if name == 'member':
+            queryset = Member.objects.filter(mosque_id=mosque_id).select_related('household', 'created_by')
+            if household_id is not None:
+                queryset = queryset.filter(household_id=household_id)
+            return queryset, MemberSerializer
+        if name == 'service_request':
+            queryset = ServiceRequest.objects.filter(mosque_id=mosque_id).select_related('household')
+            if household_id is not None:
+                queryset = queryset.filter(household_id=household_id)
+            return queryset, ServiceRequestSerializer
+
+        queryset = Announcement.objects.filter(mosque_id=mosque_id).select_related('created_by')
+        if household_id is not None:
+            # As in MemberPortalAnnouncementsView
+            queryset = queryset.filter(is_active=True, published_at__lte=now).filter(
+                models.Q(expires_at__isnull=True) | models.Q(expires_at__gte=now)
+            ).filter(models.Q(target_household__isnull=True) | models.Q(target_household_id=household_id))
+        return queryset, AnnouncementSerializer
+
+
 class SurveyViewSet(MosqueScopedViewSet):
     queryset = Survey.objects.all()
     serializer_class = SurveySerializer
@@ -1142,23 +1405,42 @@ class SurveyResponseViewSet(MosqueScopedViewSet):
 
     def perform_create(self, serializer):
         from .services import JamathService
-        mosque = None
-        if self.request.user.is_authenticated:
-            try:
-                from .models import StaffMember
-                staff = StaffMember.objects.get(user=self.request.user)
-                mosque = staff.mosque
-            except StaffMember.DoesNotExist:
-                pass
-        instance = serializer.save(respondent=self.request.user, mosque=mosque)
+        mosque = get_tenant_context(self.request).staff_mosque
+        instance = serializer.save(auditor=self.request.user, mosque=mosque)
         JamathService.process_survey_response(instance)
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Submit up to 500 responses at once: `{"responses": [{"client_id": <uuid>,
+        "survey", "household", "answers"}, ...]}`.
+
+        Safe to retry: responses whose `client_id` is already stored come back
+        as `duplicate` (or `invalid` if another mosque stored it). Each item
+        gets a status (`created`, `duplicate` or `invalid` with errors);
+        households are rescored in the background.
+        """
+        from .survey_ingest import MAX_BATCH, ingest_responses
+
+        context = get_tenant_context(request)
+        if not context.is_staff_member:
+            return Response({'error': 'Submitting responses needs a mosque staff account'}, status=400)
+        items = request.data.get('responses') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response({'error': "Send a non-empty 'responses' list"}, status=400)
+        if len(items) > MAX_BATCH:
+            return Response({'error': f'At most {MAX_BATCH} responses per request'}, status=400)
+
+        results = ingest_responses(context.mosque_id, request.user, items)
+        return Response({'results': results})
+
 
 class AnnouncementViewSet(AuditLogMixin, MosqueScopedViewSet):
     queryset = Announcement.objects.all()
     serializer_class = AnnouncementSerializer
     permission_classes = [IsAdminUser | HasStaffPermission]
     required_module = 'announcements'
+    cursor_ordering = ('-published_at', '-id')
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -1168,15 +1450,7 @@ class AnnouncementViewSet(AuditLogMixin, MosqueScopedViewSet):
         return queryset.order_by('-published_at')
 
     def perform_create(self, serializer):
-        mosque = None
-        if self.request.user.is_authenticated:
-            try:
-                from .models import StaffMember
-                staff = StaffMember.objects.get(user=self.request.user)
-                mosque = staff.mosque
-            except StaffMember.DoesNotExist:
-                pass
-                
+        mosque = get_tenant_context(self.request).staff_mosque
         instance = serializer.save(created_by=self.request.user, mosque=mosque)
         self._log_activity('CREATE', instance, f"Created Announcement: {instance.title}", self.request.user)
 
@@ -1186,6 +1460,7 @@ class ServiceRequestViewSet(AuditLogMixin, MosqueScopedViewSet):
     serializer_class = ServiceRequestSerializer
     permission_classes = [IsAdminUser | HasStaffPermission]
     required_module = 'welfare'
+    cursor_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -1232,7 +1507,7 @@ class PortalPaymentOrderView(APIView):
         import uuid
         
         # Get Tenant Config
-        config = MembershipConfig.objects.filter(is_active=True, mosque=get_user_mosque(request.user)).first()
+        config = MembershipConfig.for_mosque(get_tenant_context(request).mosque_id)
         if not config:
              return Response({'error': 'Membership config missing'}, status=400)
              
@@ -1336,7 +1611,7 @@ class PortalPaymentVerifyView(APIView):
         import razorpay
         import requests
         
-        config = MembershipConfig.objects.filter(is_active=True, mosque=get_user_mosque(request.user)).first()
+        config = MembershipConfig.for_mosque(get_tenant_context(request).mosque_id)
         if not config:
              return Response({'error': 'Config missing'}, status=400)
              
@@ -1453,7 +1728,7 @@ class UserProfileView(APIView):
         })
     
     def put(self, request):
-        user = request.user
+        user = account_user(request.user)
         
         # 1. Update Username if provided
         new_username = request.data.get('username')
@@ -1483,7 +1758,7 @@ class ChangeEmailView(APIView):
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
-        user = request.user
+        user = account_user(request.user)
         new_email = request.data.get('new_email')
         password = request.data.get('password')
         
@@ -1526,9 +1801,21 @@ class ChangePasswordView(APIView):
         if len(new_password) < 8:
             return Response({'error': 'Password must be at least 8 characters'}, status=400)
         
-        user.set_password(new_password)
-        user.save()
-        return Response({'message': 'Password changed successfully'})
+        account = account_user(user)
+        account.set_password(new_password)
+        account.save()
+
+        # Sign out every other session; this one continues with fresh tokens
+        revoke_tokens(user.pk)
+        if isinstance(user, PortalUser):
+            refresh = issue_tokens(account, Household.objects.get(id=user.household_id))
+        else:
+            refresh = issue_tokens(user)
+        return Response({
+            'message': 'Password changed successfully',
+            'access': str(refresh.access_token),
+            'refresh': str(refresh),
+        })
 
 
 
@@ -1607,22 +1894,27 @@ class SupplierViewSet(AuditLogMixin, MosqueScopedViewSet):
         return Response(status=204)
 
 
-class JournalEntryViewSet(AuditLogMixin, MosqueScopedViewSet):
+# Voucher lines with their ledgers, for items, total_amount and is_zakat
+JOURNAL_ITEMS_PREFETCH = models.Prefetch('items', queryset=JournalItem.objects.select_related('ledger'))
+
+
+class JournalEntryViewSet(SparseFieldsetViewMixin, AuditLogMixin, MosqueScopedViewSet):
     """Journal Entry (Voucher) management."""
     queryset = JournalEntry.objects.all().order_by('-date')
     serializer_class = JournalEntrySerializer
+    select_related_fields = {'donor_name': ['donor'], 'supplier_name': ['supplier'], 'created_by_name': ['created_by']}
+    prefetch_related_fields = {
+        'items': [JOURNAL_ITEMS_PREFETCH],
+        'total_amount': [JOURNAL_ITEMS_PREFETCH],
+        'is_zakat': [JOURNAL_ITEMS_PREFETCH],
+    }
+    expand_select_related = {'donor': ['donor__household'], 'supplier': ['supplier']}
     permission_classes = [IsAdminUser | HasStaffPermission]
     required_module = 'finance'
+    cursor_ordering = ('-date', '-created_at', '-id')
 
     def perform_create(self, serializer):
-        mosque_obj = None
-        if self.request.user.is_authenticated:
-            try:
-                from .models import StaffMember
-                staff = StaffMember.objects.get(user=self.request.user)
-                mosque_obj = staff.mosque
-            except Exception:
-                pass
+        mosque_obj = get_tenant_context(self.request).staff_mosque
         entry = serializer.save(created_by=self.request.user, mosque=mosque_obj)
         
         action_desc = "Created Journal Entry"
@@ -1682,14 +1974,10 @@ class JournalEntryViewSet(AuditLogMixin, MosqueScopedViewSet):
                     pass
             
             # Get current mosque to scope queries
-            mosque = None
-            if request.user.is_authenticated:
-                from apps.jamath.models import StaffMember
-                staff = StaffMember.objects.filter(user=request.user).first()
-                if staff: mosque = staff.mosque
+            mosque = get_tenant_context(request).staff_mosque
 
             # Fetch Config
-            config = MembershipConfig.objects.filter(is_active=True, mosque=mosque).first()
+            config = MembershipConfig.for_mosque(mosque.id if mosque else None)
             is_strict = config.is_strict_accounting if config else True
 
             # Only validate balance for General payments (not Zakat) if strict accounting is enabled
@@ -1774,21 +2062,23 @@ class JournalEntryViewSet(AuditLogMixin, MosqueScopedViewSet):
             return Response({'error': str(e)}, status=500)
 
 
+# Safety net only: report namespaces are bumped whenever the books change
+REPORT_CACHE_TIMEOUT = 10 * 60
+
+
 class LedgerReportsView(APIView):
     """Ledger reports: Day Book, Trial Balance."""
     permission_classes = [IsAdminUser | HasStaffPermission]
     required_module = 'finance'
 
     def get_mosque(self, request):
-        if request.user.is_authenticated:
-            from apps.jamath.models import StaffMember
-            staff = StaffMember.objects.filter(user=request.user).first()
-            if staff: return staff.mosque
-        return None
+        return get_tenant_context(request).staff_mosque
 
     def get(self, request, report_type):
         from django.db.models import Sum, Q
         mosque = self.get_mosque(request)
+        # Bumped on every journal/ledger change for this mosque (see signals.py)
+        reports_namespace = ledger_reports_namespace(mosque.id if mosque else None)
 
         if report_type == 'day-book':
             # Default to Date view (how it was)
@@ -1854,98 +2144,11 @@ class LedgerReportsView(APIView):
         elif report_type == 'dashboard-stats':
             try:
                 today = timezone.now().date()
-                start_of_month = today.replace(day=1)
-                
-                # Income: Sum of CREDITS to INCOME accounts (month only)
-                # Note: We include Journal Entries now to catch adjustments
-                # Income: Net Credit (Credit - Debit) to INCOME accounts
-                income_stats = JournalItem.objects.filter(
-                    mosque=mosque,
-                    journal_entry__date__gte=start_of_month,
-                    journal_entry__date__lte=today,
-                    ledger__account_type='INCOME'
-                ).exclude(
-                    ledger__fund_type='ZAKAT'
-                ).aggregate(
-                    credits=Sum('credit_amount'),
-                    debits=Sum('debit_amount')
-                )
-                income_this_month = (income_stats['credits'] or Decimal('0')) - (income_stats['debits'] or Decimal('0'))
-
-                # Expense: Net Debit (Debit - Credit) to EXPENSE accounts
-                expense_stats = JournalItem.objects.filter(
-                    mosque=mosque,
-                    journal_entry__date__gte=start_of_month,
-                    journal_entry__date__lte=today,
-                    ledger__account_type='EXPENSE'
-                ).exclude(
-                    ledger__fund_type='ZAKAT'
-                ).aggregate(
-                    debits=Sum('debit_amount'),
-                    credits=Sum('credit_amount')
-                )
-                expense_this_month = (expense_stats['debits'] or Decimal('0')) - (expense_stats['credits'] or Decimal('0'))
-
-                # Handling Negative Balances (e.g. Reversals exceeding actual transactions)
-                # If Expense is negative (Net Credit), treat it as "Other Income" visually
-                if expense_this_month < 0:
-                     income_this_month += abs(expense_this_month)
-                     expense_this_month = Decimal('0')
-                
-                # If Income is negative (Net Debit), treat it as "Refund Expense" visually
-                if income_this_month < 0:
-                     expense_this_month += abs(income_this_month)
-                     income_this_month = Decimal('0')
-
-                # Total Available Balance (Cash + Bank, excluding Zakat)
-                # 1. Calculate Gross Liquid Assets (All Cash + Bank)
-                liquid_assets = JournalItem.objects.filter(
-                    mosque=mosque,
-                    ledger__account_type='ASSET',
-                    ledger__code__startswith='100'  # Cash & Bank codes
-                ).aggregate(
-                    debit=Sum('debit_amount'),
-                    credit=Sum('credit_amount')
+                stats = cache.get_or_compute(
+                    reports_namespace, f'dashboard-stats:{today.isoformat()}',
+                    lambda: self._dashboard_stats(mosque, today), REPORT_CACHE_TIMEOUT
                 )
-                
-                gross_cash = (liquid_assets['debit'] or Decimal('0')) - (liquid_assets['credit'] or Decimal('0'))
-
-                # 2. Calculate Restricted Zakat Balance (Income + Equity - Expense)
-                # We MUST include EQUITY to capture Opening Balances/Corpus
-                zakat_stats = JournalItem.objects.filter(
-                    mosque=mosque,
-                    ledger__fund_type='ZAKAT'
-                ).aggregate(
-                    income_c=Sum('credit_amount', filter=Q(ledger__account_type='INCOME')),
-                    income_d=Sum('debit_amount', filter=Q(ledger__account_type='INCOME')),
-                    equity_c=Sum('credit_amount', filter=Q(ledger__account_type='EQUITY')),
-                    equity_d=Sum('debit_amount', filter=Q(ledger__account_type='EQUITY')),
-                    expense_d=Sum('debit_amount', filter=Q(ledger__account_type='EXPENSE')),
-                    expense_c=Sum('credit_amount', filter=Q(ledger__account_type='EXPENSE'))
-                )
-                
-                z_income = (zakat_stats['income_c'] or Decimal('0')) - (zakat_stats['income_d'] or Decimal('0'))
-                z_equity = (zakat_stats['equity_c'] or Decimal('0')) - (zakat_stats['equity_d'] or Decimal('0'))
-                z_expense = (zakat_stats['expense_d'] or Decimal('0')) - (zakat_stats['expense_c'] or Decimal('0'))
-                
-                zakat_balance = (z_income + z_equity) - z_expense
-                
-                # General Balance calculation
-                # If Zakat Fund is negative (Deficit), it means we have "borrowed" from General Cash to pay Zakat expenses.
-                # In that case, the physical cash (gross_cash) has already been reduced by the expense.
-                # We should NOT subtract the deficit again (which would increase General Balance mathematically).
-                # We should only reserve positive Zakat balances.
-                zakat_reserve = max(Decimal('0'), zakat_balance)
-                
-                # UI Request: Balance should never display as negative
-                general_available = max(Decimal('0'), gross_cash - zakat_reserve)
-
-                return Response({
-                    'income_this_month': str(income_this_month),
-                    'expense_this_month': str(expense_this_month),
-                    'general_balance': str(general_available),
-                    'zakat_balance': str(zakat_balance)
-                })
+                return Response(stats)
             except Exception as e:
                 return Response({
                     'error': str(e),
@@ -1956,39 +2159,140 @@ class LedgerReportsView(APIView):
                 })
 
         elif report_type == 'trial-balance':
-            ledgers = Ledger.objects.filter(mosque=mosque, is_active=True).order_by('code')
-            data = []
-            total_debit = Decimal('0.00')
-            total_credit = Decimal('0.00')
-            
-            for ledger in ledgers:
-                balance = ledger.balance
-                if balance > 0:
-                    if ledger.account_type in ['ASSET', 'EXPENSE']:
-                        total_debit += balance
-                        data.append({'code': ledger.code, 'name': ledger.name, 'debit': balance, 'credit': 0})
-                    else:
-                        total_credit += balance
-                        data.append({'code': ledger.code, 'name': ledger.name, 'debit': 0, 'credit': balance})
-                elif balance < 0:
-                    if ledger.account_type in ['ASSET', 'EXPENSE']:
-                        total_credit += abs(balance)
-                        data.append({'code': ledger.code, 'name': ledger.name, 'debit': 0, 'credit': abs(balance)})
-                    else:
-                        total_debit += abs(balance)
-                        data.append({'code': ledger.code, 'name': ledger.name, 'debit': abs(balance), 'credit': 0})
-            
-            return Response({
-                'ledgers': data,
-                'total_debit': total_debit,
-                'total_credit': total_credit,
-                'is_balanced': total_debit == total_credit
-            })
+            return Response(cache.get_or_compute(
+                reports_namespace, 'trial-balance', lambda: self._trial_balance(mosque), REPORT_CACHE_TIMEOUT
+            ))
 
 
 
         return Response({'error': 'Invalid report type'}, status=400)
 
+    def _dashboard_stats(self, mosque, today):
+        from django.db.models import Sum, Q
+        start_of_month = today.replace(day=1)
+
+        # Income: Sum of CREDITS to INCOME accounts (month only)
+        # Note: We include Journal Entries now to catch adjustments
+        # Income: Net Credit (Credit - Debit) to INCOME accounts
+        income_stats = JournalItem.objects.filter(
+            mosque=mosque,
+            journal_entry__date__gte=start_of_month,
+            journal_entry__date__lte=today,
+            ledger__account_type='INCOME'
+        ).exclude(
+            ledger__fund_type='ZAKAT'
+        ).aggregate(
+            credits=Sum('credit_amount'),
+            debits=Sum('debit_amount')
+        )
+        income_this_month = (income_stats['credits'] or Decimal('0')) - (income_stats['debits'] or Decimal('0'))
+
+        # Expense: Net Debit (Debit - Credit) to EXPENSE accounts
+        expense_stats = JournalItem.objects.filter(
+            mosque=mosque,
+            journal_entry__date__gte=start_of_month,
+            journal_entry__date__lte=today,
+            ledger__account_type='EXPENSE'
+        ).exclude(
+            ledger__fund_type='ZAKAT'
+        ).aggregate(
+            debits=Sum('debit_amount'),
+            credits=Sum('credit_amount')
+        )
+        expense_this_month = (expense_stats['debits'] or Decimal('0')) - (expense_stats['credits'] or Decimal('0'))
+
+        # Handling Negative Balances (e.g. Reversals exceeding actual transactions)
+        # If Expense is negative (Net Credit), treat it as "Other Income" visually
+        if expense_this_month < 0:
+             income_this_month += abs(expense_this_month)
+             expense_this_month = Decimal('0')
+
+        # If Income is negative (Net Debit), treat it as "Refund Expense" visually
+        if income_this_month < 0:
+             expense_this_month += abs(income_this_month)
+             income_this_month = Decimal('0')
+
+        # Total Available Balance (Cash + Bank, excluding Zakat)
+        # 1. Calculate Gross Liquid Assets (All Cash + Bank)
+        liquid_assets = JournalItem.objects.filter(
+            mosque=mosque,
+            ledger__account_type='ASSET',
+            ledger__code__startswith='100'  # Cash & Bank codes
+        ).aggregate(
+            debit=Sum('debit_amount'),
+            credit=Sum('credit_amount')
+        )
+
+        gross_cash = (liquid_assets['debit'] or Decimal('0')) - (liquid_assets['credit'] or Decimal('0'))
+
+        # 2. Calculate Restricted Zakat Balance (Income + Equity - Expense)
+        # We MUST include EQUITY to capture Opening Balances/Corpus
+        zakat_stats = JournalItem.objects.filter(
+            mosque=mosque,
+            ledger__fund_type='ZAKAT'
+        ).aggregate(
+            income_c=Sum('credit_amount', filter=Q(ledger__account_type='INCOME')),
+            income_d=Sum('debit_amount', filter=Q(ledger__account_type='INCOME')),
+            equity_c=Sum('credit_amount', filter=Q(ledger__account_type='EQUITY')),
+            equity_d=Sum('debit_amount', filter=Q(ledger__account_type='EQUITY')),
+            expense_d=Sum('debit_amount', filter=Q(ledger__account_type='EXPENSE')),
+            expense_c=Sum('credit_amount', filter=Q(ledger__account_type='EXPENSE'))
+        )
+
+        z_income = (zakat_stats['income_c'] or Decimal('0')) - (zakat_stats['income_d'] or Decimal('0'))
+        z_equity = (zakat_stats['equity_c'] or Decimal('0')) - (zakat_stats['equity_d'] or Decimal('0'))
+        z_expense = (zakat_stats['expense_d'] or Decimal('0')) - (zakat_stats['expense_c'] or Decimal('0'))
+
+        zakat_balance = (z_income + z_equity) - z_expense
+
+        # General Balance calculation
+        # If Zakat Fund is negative (Deficit), it means we have "borrowed" from General Cash to pay Zakat expenses.
+        # In that case, the physical cash (gross_cash) has already been reduced by the expense.
+        # We should NOT subtract the deficit again (which would increase General Balance mathematically).
+        # We should only reserve positive Zakat balances.
+        zakat_reserve = max(Decimal('0'), zakat_balance)
+
+        # UI Request: Balance should never display as negative
+        general_available = max(Decimal('0'), gross_cash - zakat_reserve)
+
+        return {
+            'income_this_month': str(income_this_month),
+            'expense_this_month': str(expense_this_month),
+            'general_balance': str(general_available),
+            'zakat_balance': str(zakat_balance)
+        }
+
+    def _trial_balance(self, mosque):
+        ledgers = Ledger.objects.filter(mosque=mosque, is_active=True).order_by('code')
+        data = []
+        total_debit = Decimal('0.00')
+        total_credit = Decimal('0.00')
+
+        for ledger in ledgers:
+            balance = ledger.balance
+            if balance > 0:
+                if ledger.account_type in ['ASSET', 'EXPENSE']:
+                    total_debit += balance
+                    data.append({'code': ledger.code, 'name': ledger.name, 'debit': balance, 'credit': 0})
+                else:
+                    total_credit += balance
+                    data.append({'code': ledger.code, 'name': ledger.name, 'debit': 0, 'credit': balance})
+            elif balance < 0:
+                if ledger.account_type in ['ASSET', 'EXPENSE']:
+                    total_credit += abs(balance)
+                    data.append({'code': ledger.code, 'name': ledger.name, 'debit': 0, 'credit': abs(balance)})
+                else:
+                    total_debit += abs(balance)
+                    data.append({'code': ledger.code, 'name': ledger.name, 'debit': abs(balance), 'credit': 0})
+
+        return {
+            'ledgers': data,
+            'total_debit': total_debit,
+            'total_credit': total_credit,
+            'is_balanced': total_debit == total_credit
+        }
+
+
 
 class TallyExportView(APIView):
     """Export financial data to Tally-compatible Excel format."""
@@ -2183,6 +2487,81 @@ class TallyExportView(APIView):
         return response
 
 
+class TallyXMLExportView(APIView):
+    """
+    Stream vouchers as Tally-compatible XML.
+
+    Pass the `X-Sync-Token` returned by the previous export as `?since=` to
+    receive only vouchers created or changed after it.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        from django.http import StreamingHttpResponse
+        from .tally_xml import (
+            InvalidSyncToken, parse_sync_token, make_sync_token,
+            filter_since, filter_until, iter_tally_xml
+        )
+
+        mosque = get_user_mosque(request)
+
+        since = None
+        since_token = request.query_params.get('since')
+        if since_token:
+            try:
+                since = parse_sync_token(since_token)
+            except InvalidSyncToken:
+                return Response({'error': 'Invalid sync token. Run a full export to obtain a new one.'}, status=400)
+
+        entries = JournalEntry.objects.filter(mosque=mosque)
+        deleted = DeletedVoucher.objects.filter(mosque=mosque)
+
+        year = request.query_params.get('year')
+        if year:
+            try:
+                year = int(year)
+            except ValueError:
+                year = 0
+            if not MIN_FINANCIAL_YEAR <= year <= MAX_FINANCIAL_YEAR:
+                return Response({'error': 'year must be a financial year such as 2024'}, status=400)
+            entries = entries.filter(date__gte=f"{year}-04-01", date__lte=f"{year + 1}-03-31")
+            deleted = deleted.filter(date__gte=f"{year}-04-01", date__lte=f"{year + 1}-03-31")
+
+        entries = filter_since(entries, since)
+
+        # Freeze the high-water marks before streaming so entries saved (or
+        # deleted) mid-export are picked up by the next sync instead of skipped
+        mark = entries.order_by('-updated_at', '-id').values_list('updated_at', 'id').first()
+        if mark:
+            entries = filter_until(entries, mark)
+        else:
+            mark = since[:2] if since else None
+        deleted_mark = deleted.order_by('-id').values_list('id', flat=True).first() or 0
+        deleted_mark = max(deleted_mark, since[2] if since else 0)
+        # A full export replaces everything in Tally; only deltas carry deletions
+        deleted = deleted.filter(id__gt=since[2], id__lte=deleted_mark).order_by('id') if since \
+            else deleted.none()
+        next_token = make_sync_token(*mark, deleted_mark) if mark else ''
+
+        entries = entries.select_related('donor', 'supplier').prefetch_related(
+            'items__ledger'
+        ).order_by('updated_at', 'id')
+
+        config = MembershipConfig.for_mosque(mosque.id if mosque else None)
+        company_name = config.organization_name if config else ''
+
+        response = StreamingHttpResponse(
+            iter_tally_xml(entries.iterator(chunk_size=500), company_name=company_name, since=since,
+                           deleted=deleted.iterator()),
+            content_type='application/xml; charset=utf-8'
+        )
+        suffix = 'Delta' if since else 'Full'
+        response['Content-Disposition'] = f'attachment; filename="Mizan_Tally_{suffix}_{timezone.now():%Y%m%d}.xml"'
+        response['X-Sync-Token'] = next_token
+        response['Access-Control-Expose-Headers'] = 'X-Sync-Token'
+        return response
+
+
 # ============================================================================
 # RECEIPT PDF GENERATION
 # ============================================================================
@@ -2192,10 +2571,10 @@ class ReceiptPDFView(APIView):
     permission_classes = [IsAdminUser]
     
     def get(self, request, entry_id):
-        from apps.jamath.receipt_generator import generate_receipt_pdf
+        from apps.jamath.receipt_cache import serve_receipt_pdf, ADMIN
         
         try:
-            entry = JournalEntry.objects.get(id=entry_id)
+            entry = JournalEntry.objects.select_related('donor').get(id=entry_id)
         except JournalEntry.DoesNotExist:
             return Response({'error': 'Journal entry not found'}, status=404)
         
@@ -2204,41 +2583,10 @@ class ReceiptPDFView(APIView):
             return Response({'error': 'Only receipt vouchers can generate PDFs'}, status=400)
         
         # Get organization config
-        config = MembershipConfig.objects.filter(is_active=True, mosque=get_user_mosque(request.user)).first()
-        
-        # Calculate amount from journal items (credit side)
-        amount = sum(item.credit_amount for item in entry.items.all())
+        config = MembershipConfig.for_mosque(get_tenant_context(request).mosque_id)
         
-        # Generate receipt number if not exists
-        receipt_number = f"RCP-{entry.date.strftime('%Y%m%d')}-{entry.id:04d}"
-        
-        # Determine donor name
-        if entry.donor:
-            donor_name = entry.donor.full_name
-        else:
-            donor_name = entry.donor_name_manual or entry.narration or "Member"
-
-        # Generate PDF
-        pdf_bytes = generate_receipt_pdf(
-            receipt_number=receipt_number,
-            payment_date=entry.date,
-            donor_name=donor_name,
-            donor_address="",
-            donor_pan=entry.donor_pan or "",
-            amount=amount,
-            membership_portion=amount,  # Can be split if needed
-            donation_portion=0,
-            payment_mode=entry.payment_mode or "Online",
-            org_name=config.organization_name if config else "Digital Jamath",
-            org_address=config.organization_address if config else "",
-            org_pan=config.organization_pan if config else "",
-            reg_80g=config.registration_number_80g if config else "",
-            masjid_name=config.masjid_name if config else "",
-        )
-        
-        response = HttpResponse(pdf_bytes, content_type='application/pdf')
-        response['Content-Disposition'] = f'inline; filename="Receipt_{receipt_number}.pdf"'
-        return response
+        # Served from the receipt cache; answers 304 when the client copy is current
+        return serve_receipt_pdf(request, entry, config, variant=ADMIN)
 
 
 class PortalReceiptListView(APIView):
@@ -2282,7 +2630,7 @@ class PortalReceiptPDFView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request, entry_id):
-        from apps.jamath.receipt_generator import generate_receipt_pdf
+        from apps.jamath.receipt_cache import serve_receipt_pdf, PORTAL
         
         if not request.user.username.startswith('member_'):
             return Response({'error': 'Not authenticated as member'}, status=401)
@@ -2290,7 +2638,9 @@ class PortalReceiptPDFView(APIView):
         household_id = int(request.user.username.split('_')[1])
         
         try:
-            entry = JournalEntry.objects.get(id=entry_id, donor__household_id=household_id)
+            entry = JournalEntry.objects.select_related('donor__household').get(
+                id=entry_id, donor__household_id=household_id
+            )
         except JournalEntry.DoesNotExist:
             return Response({'error': 'Receipt not found'}, status=404)
         
@@ -2299,43 +2649,11 @@ class PortalReceiptPDFView(APIView):
         
         try:
             # Get organization config
-            config = MembershipConfig.objects.filter(is_active=True, mosque=get_user_mosque(request.user)).first()
-            
-            # JOINT FIX: Access household via donor, and handle donor name correctly
-            household = entry.donor.household if entry.donor else None
-            head = household.members.filter(is_head_of_family=True).first() if household else None
-            
-            amount = sum(item.credit_amount for item in entry.items.all())
-            receipt_number = f"RCP-{entry.date.strftime('%Y%m%d')}-{entry.id:04d}"
+            config = MembershipConfig.for_mosque(get_tenant_context(request).mosque_id)
             
-            # Determine donor name
-            if head:
-                donor_name = head.full_name
-            elif entry.donor:
-                donor_name = entry.donor.full_name
-            else:
-                 donor_name = entry.donor_name_manual or "Member"
-
-            pdf_bytes = generate_receipt_pdf(
-                receipt_number=receipt_number,
-                payment_date=entry.date,
-                donor_name=donor_name,
-                donor_address=household.address if household else "",
-                donor_pan=entry.donor_pan or "",
-                amount=amount,
-                membership_portion=amount,
-                donation_portion=0,
-                payment_mode=entry.payment_mode or "Online",
-                org_name=config.organization_name if config else "Digital Jamath",
-                org_address=config.organization_address if config else "",
-                org_pan=config.organization_pan if config else "",
-                reg_80g=config.registration_number_80g if config else "",
-                masjid_name=config.masjid_name if config else "",
-            )
-            
-            response = HttpResponse(pdf_bytes, content_type='application/pdf')
-            response['Content-Disposition'] = f'inline; filename="Receipt_{receipt_number}.pdf"'
-            return response
+            # Members re-open the same receipt from the Receipt Vault; serve the
+            # cached render (or 304) instead of regenerating it every time
+            return serve_receipt_pdf(request, entry, config, variant=PORTAL)
             
         except ImportError as e:
             return Response({'error': f"Server Configuration Error: Missing PDF Library. {str(e)}"}, status=500)
@@ -2343,6 +2661,213 @@ class PortalReceiptPDFView(APIView):
             import traceback
             print(traceback.format_exc())
             return Response({'error': f"Generation Failed: {str(e)}"}, status=500)
+# ============================================================================
+# ANNUAL 80G DONOR STATEMENTS
+# ============================================================================
+
+class DonorStatementBatchSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    progress = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = DonorStatementBatch
+        fields = [
+            'id', 'financial_year', 'status', 'total_donors', 'processed_donors', 'progress',
+            'error', 'created_at', 'updated_at', 'completed_at'
+        ]
+        read_only_fields = [
+            'status', 'total_donors', 'processed_donors', 'error', 'created_at', 'updated_at', 'completed_at'
+        ]
+
+    def validate_financial_year(self, value):
+        if not MIN_FINANCIAL_YEAR <= value <= MAX_FINANCIAL_YEAR:
+            raise serializers.ValidationError('Enter a financial year such as 2024')
+        return value
+
+
+class DonorStatementBatchViewSet(MosqueScopedViewSet):
+    """
+    Year-end consolidated 80G statements.
+
+    POST starts a batch for `financial_year`; GET reports progress; the ZIP is
+    available from `download/` once the batch has completed.
+    """
+    queryset = DonorStatementBatch.objects.all()
+    serializer_class = DonorStatementBatchSerializer
+    permission_classes = [IsAdminUser | HasStaffPermission]
+    required_module = 'finance'
+    http_method_names = ['get', 'post', 'head', 'options']
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        batch = serializer.instance
+        batch.created_by = self.request.user
+        batch.save(update_fields=['created_by'])
+        self._enqueue(batch)
+
+    def _enqueue(self, batch):
+        from django.db import transaction
+        from .tasks import generate_donor_statements_task
+
+        def send():
+            result = generate_donor_statements_task.delay(batch.id)
+            DonorStatementBatch.objects.filter(id=batch.id).update(task_id=result.id or '')
+        transaction.on_commit(send)
+
+    @action(detail=True, methods=['post'])
+    def resume(self, request, pk=None):
+        """Re-queue a failed or stalled batch; already rendered donors are skipped."""
+        from .donor_statements import claim_for_resume
+
+        batch = self.get_object()
+        if batch.status == DonorStatementBatch.Status.COMPLETED:
+            return Response({'error': 'Batch already completed'}, status=400)
+        # A second worker on a live batch would race on its parts and ZIP
+        if not claim_for_resume(batch):
+            return Response({'error': 'Batch is still queued or running'}, status=409)
+        batch.refresh_from_db()
+        self._enqueue(batch)
+        return Response(self.get_serializer(batch).data, status=202)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        import os
+        from django.conf import settings
+        from django.http import FileResponse
+
+        batch = self.get_object()
+        if batch.status != DonorStatementBatch.Status.COMPLETED or not batch.archive_path:
+            return Response({'error': 'Statements are not ready yet', 'progress': batch.progress}, status=409)
+
+        path = os.path.join(settings.DONOR_STATEMENT_DIR, batch.archive_path)
+        if not os.path.exists(path):
+            return Response({'error': 'Archive no longer available. Start a new batch.'}, status=410)
+
+        # FileResponse streams the archive in chunks
+        return FileResponse(open(path, 'rb'), as_attachment=True,
+                            filename=os.path.basename(path), content_type='application/zip')
+
+
+# ============================================================================
+# BULK CENSUS IMPORT
+# ============================================================================
+
+class CensusImportSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    file = serializers.FileField(write_only=True)
+
+    class Meta:
+        model = CensusImport
+        fields = [
+            'id', 'file', 'source_name', 'status', 'processed_rows', 'failed_rows',
+            'households_created', 'members_created', 'error', 'created_at', 'updated_at', 'completed_at'
+        ]
+        read_only_fields = [
+            'source_name', 'status', 'processed_rows', 'failed_rows', 'households_created',
+            'members_created', 'error', 'created_at', 'updated_at', 'completed_at'
+        ]
+
+    def validate_file(self, value):
+        import os
+        if os.path.splitext(value.name)[1].lower() not in ('.csv', '.xlsx'):
+            raise serializers.ValidationError('Upload a .csv or .xlsx file')
+        return value
+
+
+class CensusImportViewSet(MosqueScopedViewSet):
+    """
+    Bulk household/member import from a spreadsheet.
+
+    POST a multipart `file` (one row per member, see apps/jamath/census_import.py
+    for the columns); GET reports progress; rejected rows can be downloaded
+    from `errors/` as a CSV to fix and upload again.
+    """
+    queryset = CensusImport.objects.all()
+    serializer_class = CensusImportSerializer
+    permission_classes = [IsAdminUser | HasStaffPermission]
+    required_module = 'jamath'
+    http_method_names = ['get', 'post', 'head', 'options']
+
+    def perform_create(self, serializer):
+        import os
+        from django.conf import settings
+        from django.db import transaction
+        from .census_import import import_dir
+        from .tasks import import_census_task
+
+        upload = serializer.validated_data.pop('file')
+        super().perform_create(serializer)
+        census_import = serializer.instance
+
+        root = import_dir(census_import)
+        os.makedirs(root, exist_ok=True)
+        path = os.path.join(root, 'source' + os.path.splitext(upload.name)[1].lower())
+        with open(path, 'wb') as f:
+            for chunk in upload.chunks():
+                f.write(chunk)
+
+        census_import.source_name = os.path.basename(upload.name)[:255]
+        census_import.source_path = os.path.relpath(path, settings.CENSUS_IMPORT_DIR)
+        census_import.created_by = self.request.user
+        census_import.save(update_fields=['source_name', 'source_path', 'created_by'])
+
+        def send():
+            result = import_census_task.delay(census_import.id)
+            CensusImport.objects.filter(id=census_import.id).update(task_id=result.id or '')
+        transaction.on_commit(send)
+
+    @action(detail=True, methods=['get'])
+    def errors(self, request, pk=None):
+        import os
+        from django.conf import settings
+        from django.http import FileResponse
+
+        census_import = self.get_object()
+        if not census_import.error_report_path:
+            return Response({'error': 'No rows were rejected'}, status=404)
+
+        path = os.path.join(settings.CENSUS_IMPORT_DIR, census_import.error_report_path)
+        if not os.path.exists(path):
+            return Response({'error': 'Error report no longer available'}, status=410)
+        return FileResponse(open(path, 'rb'), as_attachment=True,
+                            filename=f"census_import_{census_import.id}_errors.csv", content_type='text/csv')
+
+
+class CustomDataIndexSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = CustomDataIndex
+        fields = ['id', 'target', 'key', 'status', 'error', 'created_at']
+        read_only_fields = ['status', 'error', 'created_at']
+
+    def validate_key(self, value):
+        from .custom_data import is_indexable_key
+        if not is_indexable_key(value):
+            raise serializers.ValidationError(
+                'Use letters, digits, spaces, - and _ (single underscores), not only digits'
+            )
+        return value
+
+    def validate(self, attrs):
+        context = get_tenant_context(self.context['request'])
+        if CustomDataIndex.objects.filter(mosque_id=context.mosque_id, target=attrs['target'],
+                                          key=attrs['key']).exists():
+            raise serializers.ValidationError({'key': 'This key is already indexed'})
+        return attrs
+
+
+class CustomDataIndexViewSet(MosqueScopedViewSet):
+    """
+    `custom_data` keys this mosque filters on often.
+
+    Registering a key builds a partial expression index over the mosque's
+    households (or members) in the background; `?custom.<key>=` filters use
+    it once `status` is READY. Deleting the registration drops the index.
+    """
+    queryset = CustomDataIndex.objects.all()
+    serializer_class = CustomDataIndexSerializer
+    permission_classes = [IsAdminUser | HasStaffPermission]
+    required_module = 'jamath'
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+
+
 class ReminderViewSet(viewsets.ViewSet):
     """ViewSet to manage reminders and custom messages via portal announcements."""
     permission_classes = [IsAuthenticated]
@@ -2481,6 +3006,7 @@ class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['details', 'user__username', 'model_name', 'action']
     ordering_fields = ['timestamp', 'action']
+    cursor_ordering = ('-timestamp', '-id')
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -2545,11 +3071,7 @@ class DashboardStatsView(APIView):
             # Households
             total_households = Household.objects.count()
             total_members = Member.objects.count()
-            # Fix: Filter via related subscriptions instead of property
-            pending_renewals = Household.objects.exclude(
-                subscriptions__status='ACTIVE',
-                subscriptions__end_date__gte=now.date()
-            ).count()
+            pending_renewals = Household.objects.renewals_due().count()
             
             # Finance Aggregates (Robust P&L Logic)
             # Income: Net Credit (Credit - Debit) to INCOME accounts
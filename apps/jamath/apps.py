@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.db.models.signals import pre_migrate
+
+
+class JamathConfig(AppConfig):
+    name = 'apps.jamath'
+    label = 'jamath'
+
+    def ready(self):
+        from . import signals
+        pre_migrate.connect(signals.ensure_postgres_extensions, sender=self)
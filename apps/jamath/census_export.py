@@ -0,0 +1,154 @@
+"""
+Census export for DigitalJamath.
+
+Streams households and members as CSV or XLSX for offline use and
+government surveys:
+- Rows come from a server-side cursor (`iterator(chunk_size=...)`), members
+  prefetched per chunk, so a full census is never held in memory
+- CSV is written to the response as it is produced; XLSX uses openpyxl's
+  write-only mode, which spools rows to a temporary file
+- One row per member (household columns repeated), or one per household
+  with `rows=households`
+"""
+import csv
+import tempfile
+
+from .custom_data import CUSTOM_PREFIX, is_valid_key
+
+# Households fetched (and their members prefetched) per round trip
+CHUNK_SIZE = 500
+
+HOUSEHOLD_COLUMNS = {
+    'membership_id': ('Membership ID', lambda h: h.membership_id),
+    'phone_number': ('Phone', lambda h: h.phone_number),
+    'address': ('Address', lambda h: h.address),
+    'economic_status': ('Economic Status', lambda h: h.get_economic_status_display()),
+    'housing_status': ('Housing Status', lambda h: h.get_housing_status_display()),
+    'zakat_score': ('Zakat Score', lambda h: h.zakat_score),
+    'is_verified': ('Verified', lambda h: h.is_verified),
+    'membership_active': ('Membership Active', lambda h: h.is_membership_active),
+    'member_count': ('Members', lambda h: h.member_count),
+    'head_name': ('Head of Family', lambda h: h.head_name),
+    'created_at': ('Registered', lambda h: h.created_at.date() if h.created_at else None),
+}
+
+MEMBER_COLUMNS = {
+    'full_name': ('Name', lambda m: m.full_name),
+    'relationship_to_head': ('Relationship', lambda m: m.get_relationship_to_head_display()),
+    'is_head_of_family': ('Head', lambda m: m.is_head_of_family),
+    'gender': ('Gender', lambda m: m.get_gender_display()),
+    'dob': ('Date of Birth', lambda m: m.dob),
+    'marital_status': ('Marital Status', lambda m: m.get_marital_status_display()),
+    'profession': ('Profession', lambda m: m.profession),
+    'education': ('Education', lambda m: m.education),
+    'skills': ('Skills', lambda m: m.skills),
+    'is_employed': ('Employed', lambda m: m.is_employed),
+    'is_alive': ('Alive', lambda m: m.is_alive),
+}
+
+DEFAULT_HOUSEHOLD_COLUMNS = ['membership_id', 'phone_number', 'address', 'economic_status',
+                             'housing_status', 'is_verified', 'member_count', 'head_name']
+DEFAULT_MEMBER_COLUMNS = ['membership_id', 'phone_number', 'address', 'economic_status', 'housing_status',
+                          'is_verified', 'full_name', 'relationship_to_head', 'gender', 'dob',
+                          'marital_status', 'profession', 'education', 'skills']
+
+# Spreadsheet apps run cells starting with these as formulas
+_FORMULA_START = ('=', '+', '-', '@', '\t', '\r')
+
+
+class InvalidExport(ValueError):
+    """Raised for unknown columns or filters; the message is shown to the user."""
+
+
+def _custom_key(name):
+    key = name[len(CUSTOM_PREFIX):]
+    if not is_valid_key(key):
+        raise InvalidExport(f"Invalid custom field '{key}'")
+    return key
+
+
+def resolve_columns(requested, member_rows):
+    """Return `[(header, getter(household, member))]` for the requested column names."""
+    names = [c.strip() for c in requested.split(',') if c.strip()] if requested else (
+        DEFAULT_MEMBER_COLUMNS if member_rows else DEFAULT_HOUSEHOLD_COLUMNS
+    )
+    columns = []
+    for name in names:
+        if name in HOUSEHOLD_COLUMNS:
+            header, get = HOUSEHOLD_COLUMNS[name]
+            columns.append((header, lambda h, m, get=get: get(h)))
+        elif name in MEMBER_COLUMNS and member_rows:
+            header, get = MEMBER_COLUMNS[name]
+            columns.append((header, lambda h, m, get=get: get(m) if m is not None else None))
+        elif name.startswith(CUSTOM_PREFIX):
+            key = _custom_key(name)
+            columns.append((key, lambda h, m, key=key: (h.custom_data or {}).get(key)))
+        else:
+            raise InvalidExport(f"Unknown column '{name}'")
+    return columns
+
+
+def filter_households(queryset, params):
+    """
+    Apply export filters from query params.
+
+    `economic_status`, `housing_status` and `is_verified=true|false`;
+    `custom.<key>` filters are applied by the view's CustomDataFilter.
+    """
+    for field in ('economic_status', 'housing_status'):
+        value = params.get(field)
+        if value:
+            queryset = queryset.filter(**{field: value})
+
+    verified = params.get('is_verified', '').lower()
+    if verified in ('true', 'false'):
+        queryset = queryset.filter(is_verified=verified == 'true')
+    return queryset
+
+
+def _safe(value):
+    # Phone numbers (+91...) and negative numbers stay as they are
+    if isinstance(value, str) and value.startswith(_FORMULA_START):
+        if not (value[0] in '+-' and value[1:].replace('.', '', 1).isdigit()):
+            return "'" + value
+    return value
+
+
+def iter_rows(households, columns, member_rows):
+    """Yield one list of cell values per exported row."""
+    for household in households:
+        members = list(household.members.all()) if member_rows else [None]
+        # Households without members still appear, with blank member columns
+        for member in members or [None]:
+            yield [_safe(get(household, member)) for _, get in columns]
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for streaming csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(households, columns, member_rows):
+    writer = csv.writer(_Echo())
+    yield '\ufeff'  # BOM, so Excel opens UTF-8 names correctly
+    yield writer.writerow([header for header, _ in columns])
+    for row in iter_rows(households, columns, member_rows):
+        yield writer.writerow(['' if value is None else value for value in row])
+
+
+def write_xlsx(households, columns, member_rows):
+    """Write the export to a temporary file and return it, rewound."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Census')
+    sheet.append([header for header, _ in columns])
+    for row in iter_rows(households, columns, member_rows):
+        sheet.append(row)
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
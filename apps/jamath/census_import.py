@@ -0,0 +1,409 @@
+"""
+Bulk census import for DigitalJamath.
+
+Pipeline behind `CensusImport`:
+- The uploaded CSV or XLSX (openpyxl read-only mode) is streamed row by row;
+  each row is one member, and rows sharing a `household` key (or membership
+  ID) form one household whose details come from its first row
+- Rows are validated and written in chunks: one bulk_create for households,
+  one for members and one search-document refresh per chunk, with
+  membership IDs reserved as a block from `MembershipIdSequence`
+- Rejected rows go to a CSV error report with the reason and the original
+  values, ready to fix and upload again
+- One ActivityLog entry summarises the import instead of one per record
+"""
+import csv
+import itertools
+import logging
+import os
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db import transaction
+
+from .census_stats import mark_census_stale
+from .search import fold, refresh_household_documents
+from .sync import record_changes
+
+logger = logging.getLogger(__name__)
+
+# Rows validated and written per transaction
+CHUNK_ROWS = 1000
+
+# Spreadsheet headers people actually use, mapped to our column names
+COLUMN_ALIASES = {
+    'family': 'household', 'family_id': 'household', 'household_id': 'household', 'household_ref': 'household',
+    'member_id': 'membership_id', 'jamath_id': 'membership_id',
+    'phone': 'phone_number', 'mobile': 'phone_number', 'contact': 'phone_number',
+    'name': 'full_name', 'member_name': 'full_name',
+    'relation': 'relationship_to_head', 'relationship': 'relationship_to_head',
+    'date_of_birth': 'dob', 'birth_date': 'dob',
+    'head': 'is_head_of_family', 'is_head': 'is_head_of_family',
+    'occupation': 'profession',
+}
+HOUSEHOLD_COLUMNS = {'household', 'membership_id', 'address', 'phone_number', 'economic_status', 'housing_status'}
+MEMBER_COLUMNS = {'full_name', 'relationship_to_head', 'gender', 'dob', 'marital_status', 'profession',
+                  'education', 'skills', 'is_head_of_family'}
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y')
+TRUE_VALUES = {'1', 'y', 'yes', 'true', 'head'}
+
+
+class RowError(ValueError):
+    pass
+
+
+def import_dir(census_import) -> str:
+    return os.path.join(settings.CENSUS_IMPORT_DIR, str(census_import.mosque_id or 0), str(census_import.id))
+
+
+def _column(header) -> str:
+    name = str(header or '').strip().lower().replace(' ', '_').replace('-', '_')
+    return COLUMN_ALIASES.get(name, name)
+
+
+# ============================================================================
+# READING
+# ============================================================================
+
+def read_rows(path):
+    """
+    Yield `(row_number, headers, values)` for each non-empty data row.
+
+    Row numbers match what the user sees in their spreadsheet (header = 1).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.xlsx':
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            yield from _with_headers(rows)
+        finally:
+            workbook.close()
+    elif extension == '.csv':
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            yield from _with_headers(csv.reader(f))
+    else:
+        raise ValueError('Upload a .csv or .xlsx file')
+
+
+def _with_headers(rows):
+    headers = next(rows, None)
+    if not headers:
+        raise ValueError('The file is empty')
+    headers = [str(h).strip() if h is not None else '' for h in headers]
+    for number, values in enumerate(rows, start=2):
+        if any(v not in (None, '') for v in values):
+            yield number, headers, list(values)
+
+
+# ============================================================================
+# VALIDATION
+# ============================================================================
+
+def _text(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        # Excel stores phone numbers and IDs typed as numbers as floats
+        value = int(value)
+    return str(value).strip()
+
+
+def _choice(value, choices, column, default=None):
+    text = _text(value)
+    if not text:
+        return default
+    lowered = text.lower()
+    for stored, label in choices:
+        if lowered in (stored.lower(), label.lower()) or label.lower().startswith(lowered + ' '):
+            return stored
+    raise RowError(f"{column}: '{text}' is not one of {', '.join(stored for stored, _ in choices)}")
+
+
+def _date(value, column):
+    if value in (None, ''):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = _text(value)
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise RowError(f"{column}: '{text}' is not a date (use YYYY-MM-DD or DD/MM/YYYY)")
+
+
+def parse_row(row):
+    """Split a row (keyed by our column names) into household and member field dicts."""
+    from apps.shared.phone import normalize_phone
+    from .models import Household, Member
+
+    household = {
+        'membership_id': _text(row.get('membership_id')) or None,
+        'address': _text(row.get('address')),
+        'economic_status': _choice(row.get('economic_status'), Household.EconomicStatus.choices,
+                                   'economic_status', Household.EconomicStatus.AAM),
+        'housing_status': _choice(row.get('housing_status'), Household.HousingStatus.choices,
+                                  'housing_status', Household.HousingStatus.OWN),
+        'custom_data': {k: _text(v) for k, v in row.items()
+                        if k and k not in HOUSEHOLD_COLUMNS | MEMBER_COLUMNS and _text(v)},
+    }
+    phone = _text(row.get('phone_number'))
+    household['phone_number'] = normalize_phone(phone) if phone else None
+    if phone and not household['phone_number']:
+        raise RowError(f"phone_number: '{phone}' is not a valid phone number")
+
+    full_name = _text(row.get('full_name'))
+    if not full_name:
+        raise RowError('full_name is required')
+    relationship = _choice(row.get('relationship_to_head'), Member.Relationship.choices, 'relationship_to_head')
+    head = _text(row.get('is_head_of_family')).lower()
+    member = {
+        'full_name': full_name[:200],
+        'relationship_to_head': relationship or Member.Relationship.OTHER,
+        'is_head_of_family': head in TRUE_VALUES if head else relationship == Member.Relationship.SELF,
+        'gender': _choice(row.get('gender'), Member.Gender.choices, 'gender', Member.Gender.MALE),
+        'marital_status': _choice(row.get('marital_status'), Member.MaritalStatus.choices, 'marital_status',
+                                  Member.MaritalStatus.SINGLE),
+        'dob': _date(row.get('dob'), 'dob'),
+        'profession': _text(row.get('profession'))[:100] or None,
+        'education': _text(row.get('education'))[:100] or None,
+        'skills': _text(row.get('skills'))[:255] or None,
+    }
+    return household, member
+
+
+# ============================================================================
+# IMPORT
+# ============================================================================
+
+class CensusImporter:
+    """
+    Validates and writes rows chunk by chunk.
+
+    Keeps state across chunks, so members of one household may be spread
+    over several chunks and duplicate phones/IDs within the file are caught.
+    """
+
+    def __init__(self, census_import, error_writer):
+        from .models import Household
+
+        self.mosque_id = census_import.mosque_id
+        self.created_by_id = census_import.created_by_id
+        self.prefix = Household.membership_id_prefix(self.mosque_id)
+        self.errors = error_writer
+
+        self.households = {}       # household key -> id of the household created for it
+        self.rejected = {}         # household key -> why its rows are being rejected
+        self.phones = set()
+        self.membership_ids = set()
+        self.highest_explicit_id = 0
+
+        self.processed = self.failed = self.households_created = self.members_created = 0
+
+    def run(self, rows, on_progress=None):
+        chunk = []
+        for item in rows:
+            chunk.append(item)
+            if len(chunk) >= CHUNK_ROWS:
+                self.import_chunk(chunk)
+                chunk = []
+                if on_progress:
+                    on_progress(self)
+        if chunk:
+            self.import_chunk(chunk)
+
+        if self.highest_explicit_id:
+            # Later sign-ups must not be handed an ID the file already used
+            from .models import MembershipIdSequence
+            MembershipIdSequence.advance_past(self.mosque_id, self.prefix, self.highest_explicit_id)
+
+    def _reject(self, number, headers, values, message):
+        self.failed += 1
+        self._chunk_errors.append([number, message, *values[:len(headers)]])
+
+    def _household_problem(self, household, taken_phones, taken_ids):
+        phone, membership_id = household['phone_number'], household['membership_id']
+        if not household['address']:
+            return 'address is required on the first row of a household'
+        if phone and (phone in taken_phones or phone in self.phones):
+            return f"phone_number {phone} is already registered"
+        if membership_id and (membership_id in taken_ids or membership_id in self.membership_ids):
+            return f"membership_id {membership_id} already exists"
+        return None
+
+    def _number_households(self, households):
+        """
+        Give households without an ID numbers from reserved blocks, skipping
+        numbers the file or the database already uses (the sequence is only
+        moved past explicit IDs at the end of the run).
+        """
+        from .models import Household, MembershipIdSequence
+
+        while households:
+            block = MembershipIdSequence.reserve(self.mosque_id, self.prefix, len(households))
+            candidates = [f"{self.prefix}{number:03d}" for number in block]
+            taken = self.membership_ids | set(
+                Household.objects.filter(membership_id__in=candidates).values_list('membership_id', flat=True))
+            free = [membership_id for membership_id in candidates if membership_id not in taken]
+            for household, membership_id in zip(households, free):
+                household.membership_id = membership_id
+            households = households[len(free):]
+
+    def import_chunk(self, chunk):
+        from .models import Household, Member
+
+        self._chunk_errors = []
+        parsed = []
+        for number, headers, values in chunk:
+            row = {_column(h): v for h, v in zip(headers, values)}
+            key = _text(row.get('household')) or _text(row.get('membership_id')) or f"row-{number}"
+            if key in self.rejected:
+                self._reject(number, headers, values, self.rejected[key])
+                continue
+            try:
+                household, member = parse_row(row)
+            except RowError as e:
+                self._reject(number, headers, values, str(e))
+                if key not in self.households:
+                    self.rejected[key] = f"household was rejected on row {number}"
+                continue
+            parsed.append((number, headers, values, key, household, member))
+
+        # The first row of each new household key carries its details
+        first_rows = {}
+        for item in parsed:
+            if item[3] not in self.households:
+                first_rows.setdefault(item[3], item[4])
+
+        # Uniqueness against the database: one query per column per chunk
+        phones = {h['phone_number'] for h in first_rows.values() if h['phone_number']}
+        ids = {h['membership_id'] for h in first_rows.values() if h['membership_id']}
+        taken_phones = set(Household.objects.filter(phone_number__in=phones).values_list('phone_number', flat=True))
+        taken_ids = set(Household.objects.filter(membership_id__in=ids).values_list('membership_id', flat=True))
+
+        new_households = {}
+        for key, fields in first_rows.items():
+            problem = self._household_problem(fields, taken_phones, taken_ids)
+            if problem:
+                self.rejected[key] = problem
+                continue
+            if fields['phone_number']:
+                self.phones.add(fields['phone_number'])
+            if fields['membership_id']:
+                self.membership_ids.add(fields['membership_id'])
+                number_part = fields['membership_id'][len(self.prefix):]
+                if fields['membership_id'].startswith(self.prefix) and number_part.isdigit():
+                    self.highest_explicit_id = max(self.highest_explicit_id, int(number_part))
+            new_households[key] = Household(mosque_id=self.mosque_id, created_by_id=self.created_by_id, **fields)
+
+        with transaction.atomic():
+            self._number_households([h for h in new_households.values() if not h.membership_id])
+
+            # bulk_create skips save() and signals: no per-row ID lookup,
+            # audit entry or search refresh (done once per chunk below)
+            Household.objects.bulk_create(new_households.values())
+            for key, household in new_households.items():
+                self.households[key] = household.id
+
+            members = []
+            heads = set()
+            for number, headers, values, key, _, fields in parsed:
+                if key in self.rejected:
+                    self._reject(number, headers, values, self.rejected[key])
+                    continue
+                member = Member(mosque_id=self.mosque_id, household_id=self.households[key],
+                                created_by_id=self.created_by_id, search_name=fold(fields['full_name']), **fields)
+                members.append(member)
+                if member.is_head_of_family:
+                    heads.add(member.household_id)
+            # A new household without a marked head gets its first member
+            new_ids = {h.id for h in new_households.values()}
+            for member in members:
+                if member.household_id in new_ids and member.household_id not in heads:
+                    member.is_head_of_family = True
+                    heads.add(member.household_id)
+            Member.objects.bulk_create(members)
+
+            refresh_household_documents({m.household_id for m in members} | new_ids)
+            record_changes(self.mosque_id, 'household', [(pk, pk) for pk in new_ids])
+            record_changes(self.mosque_id, 'member', [(m.id, m.household_id) for m in members])
+
+        # bulk_create sends no signals
+        mark_census_stale(self.mosque_id)
+
+        # Rows are rejected at different stages; report them in file order
+        self.errors.writerows(sorted(self._chunk_errors, key=lambda r: r[0]))
+        self.processed += len(chunk)
+        self.households_created += len(new_households)
+        self.members_created += len(members)
+
+
+def run_import(import_id: int) -> None:
+    """
+    Import every row of an uploaded census file.
+
+    Rows are committed chunk by chunk, so a failure part way keeps what was
+    already imported; the import is marked FAILED with the error.
+    """
+    from django.utils import timezone
+    from .models import ActivityLog, CensusImport
+
+    census_import = CensusImport.objects.get(id=import_id)
+    if census_import.status != CensusImport.Status.PENDING:
+        # A redelivered task must not import the same file twice
+        return
+
+    Status = CensusImport.Status
+    CensusImport.objects.filter(id=import_id).update(status=Status.RUNNING, error='')
+
+    root = import_dir(census_import)
+    report_path = os.path.join(root, 'errors.csv')
+    try:
+        os.makedirs(root, exist_ok=True)
+        with open(report_path, 'w', newline='', encoding='utf-8') as report:
+            writer = csv.writer(report)
+            rows = read_rows(os.path.join(settings.CENSUS_IMPORT_DIR, census_import.source_path))
+            first = next(rows, None)
+            if first is not None:
+                writer.writerow(['row', 'error', *first[1]])
+                rows = itertools.chain([first], rows)
+
+            importer = CensusImporter(census_import, writer)
+            importer.run(rows, on_progress=lambda i: CensusImport.objects.filter(id=import_id).update(
+                processed_rows=i.processed, failed_rows=i.failed,
+                households_created=i.households_created, members_created=i.members_created,
+            ))
+
+        ActivityLog.objects.create(
+            mosque_id=census_import.mosque_id,
+            user_id=census_import.created_by_id,
+            action='CREATE',
+            module='jamath',
+            model_name='Household',
+            object_id=str(census_import.id),
+            details=(f"Imported {importer.households_created} households and {importer.members_created} "
+                     f"members from {census_import.source_name} ({importer.failed} rows rejected)"),
+        )
+        CensusImport.objects.filter(id=import_id).update(
+            status=Status.COMPLETED,
+            processed_rows=importer.processed,
+            failed_rows=importer.failed,
+            households_created=importer.households_created,
+            members_created=importer.members_created,
+            error_report_path=(os.path.relpath(report_path, settings.CENSUS_IMPORT_DIR)
+                               if importer.failed else ''),
+            completed_at=timezone.now(),
+        )
+        logger.info(f"Census import {import_id}: {importer.households_created} households, "
+                    f"{importer.members_created} members, {importer.failed} rejected rows")
+    except Exception as e:
+        logger.error(f"Census import {import_id} failed: {e}")
+        CensusImport.objects.filter(id=import_id).update(status=Status.FAILED, error=str(e))
+        raise
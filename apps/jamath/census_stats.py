@@ -0,0 +1,136 @@
+"""
+Census statistics for the dashboard and Basira.
+
+Every dimension (economic status, verification, gender, employment, marital
+status, age bands) is counted in a single conditional-aggregation query per
+mosque and stored in a `CensusSnapshot`. Saves and deletes only flag the
+snapshot stale (see signals.py); it is recomputed on the next read, and also
+once a day since age bands move with the date.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+def _years_before(today, years):
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:  # 29 February
+        return today.replace(year=today.year - years, day=28)
+
+
+def _households(mosque_id):
+    from .models import Household
+
+    households = Household.objects.all()
+    # No mosque means the totals across all mosques
+    return households if mosque_id is None else households.filter(mosque_id=mosque_id)
+
+
+def _household_count(condition=Q()):
+    # The member join repeats each household once per member
+    return Count('id', distinct=True, filter=condition)
+
+
+def _member_count(condition=Q()):
+    return Count('members', filter=Q(members__is_alive=True) & condition)
+
+
+def compute_census_stats(mosque_id, today=None):
+    """Count every census dimension for a mosque in one query."""
+    from .models import Household, Member
+
+    today = today or timezone.localdate()
+    adult_from, senior_from = _years_before(today, 18), _years_before(today, 60)
+
+    counts = _households(mosque_id).aggregate(
+        households=_household_count(),
+        zakat_eligible=_household_count(Q(economic_status=Household.EconomicStatus.ZAKAT_ELIGIBLE)),
+        verified=_household_count(Q(is_verified=True)),
+        own_house=_household_count(Q(housing_status=Household.HousingStatus.OWN)),
+        rented=_household_count(Q(housing_status=Household.HousingStatus.RENTED)),
+        family_property=_household_count(Q(housing_status=Household.HousingStatus.FAMILY)),
+
+        alive_members=_member_count(),
+        male=_member_count(Q(members__gender=Member.Gender.MALE)),
+        female=_member_count(Q(members__gender=Member.Gender.FEMALE)),
+        employed=_member_count(Q(members__is_employed=True)),
+        children=_member_count(Q(members__dob__gt=adult_from)),
+        adults=_member_count(Q(members__dob__lte=adult_from, members__dob__gt=senior_from)),
+        seniors=_member_count(Q(members__dob__lte=senior_from)),
+        single=_member_count(Q(members__marital_status=Member.MaritalStatus.SINGLE)),
+        married=_member_count(Q(members__marital_status=Member.MaritalStatus.MARRIED)),
+        widowed=_member_count(Q(members__marital_status=Member.MaritalStatus.WIDOWED)),
+        divorced=_member_count(Q(members__marital_status=Member.MaritalStatus.DIVORCED)),
+        pending_approval=Count('members', filter=Q(members__is_approved=False)),
+    )
+
+    aged = counts['children'] + counts['adults'] + counts['seniors']
+    return {
+        'households': {
+            'total_households': counts['households'],
+            'zakat_eligible': counts['zakat_eligible'],
+            'sahib_e_nisab': counts['households'] - counts['zakat_eligible'],
+            'verified': counts['verified'],
+            'unverified': counts['households'] - counts['verified'],
+            'own_house': counts['own_house'],
+            'rented': counts['rented'],
+            'family_property': counts['family_property'],
+        },
+        'members': {
+            'total_members': counts['alive_members'],
+            'male': counts['male'],
+            'female': counts['female'],
+            'employed': counts['employed'],
+            'unemployed': counts['alive_members'] - counts['employed'],
+            'children_under_18': counts['children'],
+            'adults_18_60': counts['adults'],
+            'seniors_above_60': counts['seniors'],
+            'age_unknown': counts['alive_members'] - aged,
+            'single': counts['single'],
+            'married': counts['married'],
+            'widowed': counts['widowed'],
+            'divorced': counts['divorced'],
+            'pending_approval': counts['pending_approval'],
+        },
+        'as_of': today.isoformat(),
+    }
+
+
+def refresh_census_snapshot(mosque_id):
+    """Recompute and store the snapshot for a mosque; returns the stats."""
+    from .models import CensusSnapshot
+
+    snapshots = CensusSnapshot.objects.filter(mosque_id=mosque_id)
+    # Cleared before computing: a change committed meanwhile sets it again,
+    # so the next read recomputes instead of keeping stale numbers
+    if not snapshots.update(is_stale=False):
+        try:
+            with transaction.atomic():
+                CensusSnapshot.objects.create(mosque_id=mosque_id, is_stale=False)
+        except IntegrityError:
+            pass  # Created by a concurrent refresh
+
+    stats = compute_census_stats(mosque_id)
+    snapshots.update(stats=stats, computed_at=timezone.now())
+    return stats
+
+
+def get_census_stats(mosque_id):
+    """Stats for a mosque (None = all mosques), recomputed only if stale or from another day."""
+    from .models import CensusSnapshot
+
+    snapshot = CensusSnapshot.objects.filter(mosque_id=mosque_id).first()
+    if (snapshot is None or snapshot.is_stale or not snapshot.computed_at
+            or snapshot.stats.get('as_of') != timezone.localdate().isoformat()):
+        return refresh_census_snapshot(mosque_id)
+    return snapshot.stats
+
+
+def mark_census_stale(*mosque_ids):
+    """Flag the snapshots of `mosque_ids` (and the all-mosques snapshot) for recomputation."""
+    from .models import CensusSnapshot
+
+    CensusSnapshot.objects.filter(
+        Q(mosque_id__in=[m for m in mosque_ids if m]) | Q(mosque__isnull=True), is_stale=False
+    ).update(is_stale=True)
@@ -0,0 +1,182 @@
+"""
+Querying Household and Member `custom_data`.
+
+`custom_data` holds the ad-hoc fields each mosque collects (village, blood
+group, income, ...). Both columns carry a GIN index, so filters are written
+as JSONB containment (`@>`) and key-exists (`?`) conditions it can answer:
+
+    ?custom.village=Rampur&custom.blood_group=O-    one containment: {"village": .., "blood_group": ..}
+    ?custom.blood_group__in=O-,O+                    any of the values
+    ?custom.widow__exists=true                       key present (false: absent)
+
+Values typed in a query string are also matched as numbers and booleans, so
+`custom.income=5000` finds both `"5000"` and `5000`.
+
+Keys a mosque filters on all the time can be registered as a
+`CustomDataIndex`. It gets a partial expression index on
+`(custom_data -> 'key')` limited to the mosque's rows, and equality filters
+on that key are written against the same expression so the planner can use it.
+"""
+import hashlib
+import logging
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+CUSTOM_PREFIX = 'custom.'
+
+_KEY = re.compile(r'^[\w\- ]{1,64}$')
+_NUMBER = re.compile(r'^-?\d+(\.\d+)?$')
+
+
+class InvalidCustomFilter(ValueError):
+    """Raised for malformed `custom.` parameters; the message is shown to the user."""
+
+
+def is_valid_key(key) -> bool:
+    return bool(_KEY.match(key)) and '__' not in key
+
+
+def is_indexable_key(key) -> bool:
+    # Django reads a numeric key transform as an array index (`-> 0`)
+    return is_valid_key(key) and not key.isdigit()
+
+
+def _alternatives(value):
+    """A query-string value and the JSON scalars it may have been stored as."""
+    values = [value]
+    if _NUMBER.match(value):
+        values.append(float(value) if '.' in value else int(value))
+    elif value.lower() in ('true', 'false'):
+        values.append(value.lower() == 'true')
+    return values
+
+
+def _any_of(conditions):
+    combined = Q()
+    for condition in conditions:
+        combined |= condition
+    return combined
+
+
+def custom_data_filter(params, indexed_keys=(), field='custom_data'):
+    """
+    Build a Q for the `custom.<key>` parameters in `params`.
+
+    Keys in `indexed_keys` are compared through `field -> key` to match their
+    expression index; everything else goes through the GIN index.
+    """
+    condition = Q()
+    contains = {}
+    for name, value in params.items():
+        if not name.startswith(CUSTOM_PREFIX):
+            continue
+        key, _, operator = name[len(CUSTOM_PREFIX):].partition('__')
+        if not is_valid_key(key):
+            raise InvalidCustomFilter(f"Invalid custom field '{key}'")
+
+        if operator == 'exists':
+            if value.lower() not in ('true', 'false'):
+                raise InvalidCustomFilter(f"'{name}' must be true or false")
+            exists = Q(**{f'{field}__has_key': key})
+            condition &= exists if value.lower() == 'true' else ~exists
+            continue
+        if operator == 'in':
+            values = [v for part in value.split(',') if part.strip() for v in _alternatives(part.strip())]
+        elif operator == '':
+            values = _alternatives(value)
+        else:
+            raise InvalidCustomFilter(f"Unknown operator '{operator}' in '{name}'")
+        if not values:
+            raise InvalidCustomFilter(f"'{name}' needs a value")
+
+        if key in indexed_keys:
+            # `field -> 'key'`; the explicit __exact keeps keys like "contains" from reading as lookups
+            condition &= _any_of(Q(**{f'{field}__{key}__exact': v}) for v in values)
+        elif len(values) == 1:
+            contains[key] = values[0]
+        else:
+            condition &= _any_of(Q(**{f'{field}__contains': {key: v}}) for v in values)
+
+    if contains:
+        # Single-valued keys share one containment lookup
+        condition &= Q(**{f'{field}__contains': contains})
+    return condition
+
+
+# ============================================================================
+# PER-MOSQUE EXPRESSION INDEXES
+# ============================================================================
+
+def _table(target):
+    from .models import CustomDataIndex, Household, Member
+
+    model = Household if target == CustomDataIndex.Target.HOUSEHOLD else Member
+    return model._meta.db_table
+
+
+def index_name(mosque_id, target, key) -> str:
+    # Keys are free text; the hash keeps names valid and under Postgres' 63 characters
+    digest = hashlib.sha1(key.encode()).hexdigest()[:10]
+    return f"jamath_cd_{target[0].lower()}{mosque_id or 0}_{digest}"
+
+
+def _index_valid(name):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid WHERE c.relname = %s',
+            [name],
+        )
+        row = cursor.fetchone()
+    return None if row is None else row[0]
+
+
+def _concurrently():
+    # CREATE/DROP INDEX CONCURRENTLY can't run inside a transaction block
+    return '' if connection.in_atomic_block else 'CONCURRENTLY '
+
+
+def drop_index(mosque_id, target, key):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP INDEX {_concurrently()}IF EXISTS "{index_name(mosque_id, target, key)}"')
+
+
+def build_index(index):
+    """Create the expression index for a CustomDataIndex; writes are not blocked while it builds."""
+    from .models import CustomDataIndex
+
+    name = index_name(index.mosque_id, index.target, index.key)
+    if _index_valid(name) is False:
+        # Left behind by an interrupted concurrent build; IF NOT EXISTS would keep it
+        drop_index(index.mosque_id, index.target, index.key)
+
+    scope = '"mosque_id" IS NULL' if index.mosque_id is None else '"mosque_id" = %s'
+    params = [index.key] + ([] if index.mosque_id is None else [index.mosque_id])
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE INDEX {_concurrently()}IF NOT EXISTS "{name}" '
+                f'ON "{_table(index.target)}" (("custom_data" -> %s)) WHERE {scope}',
+                params,
+            )
+    except Exception as exc:
+        logger.exception(f"Building custom data index {name} failed")
+        index.status, index.error = CustomDataIndex.Status.FAILED, str(exc)
+    else:
+        index.status, index.error = CustomDataIndex.Status.READY, ''
+    index.save(update_fields=['status', 'error'])
+
+
+def sync_index(mosque_id, target, key):
+    """Build the index if it is registered, drop it if it no longer is."""
+    from .models import CustomDataIndex
+
+    index = CustomDataIndex.objects.filter(mosque_id=mosque_id, target=target, key=key).first()
+    if index is None:
+        drop_index(mosque_id, target, key)
+    elif index.status != CustomDataIndex.Status.READY or not _index_valid(
+            index_name(mosque_id, target, key)):
+        build_index(index)
@@ -0,0 +1,240 @@
+"""
+Annual 80G Donor Statements for DigitalJamath.
+
+Batch pipeline behind `DonorStatementBatch`:
+- Receipts for the financial year are aggregated per donor in one SQL query
+- Consolidated PDFs are rendered in a process pool (reportlab is CPU-bound)
+  and written as part files, so a restarted job skips donors already done
+- Parts are then streamed into a single ZIP on disk for download
+"""
+import logging
+import os
+import re
+import shutil
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import groupby
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# How often (in donors) progress is written back to the batch row
+PROGRESS_EVERY = 25
+# A queued or running batch whose row hasn't been touched for this long is
+# presumed dead (its task message was lost, or its worker died)
+STALL_TIMEOUT = timedelta(minutes=15)
+# Financial years a batch (or a Tally export) may cover; April 1 of the year
+# after the last one must still be a valid date
+MIN_FINANCIAL_YEAR, MAX_FINANCIAL_YEAR = 1900, 9998
+
+
+def financial_year_bounds(financial_year: int):
+    return date(financial_year, 4, 1), date(financial_year + 1, 3, 31)
+
+
+def batch_dir(batch) -> str:
+    return os.path.join(settings.DONOR_STATEMENT_DIR, str(batch.mosque_id or 0), str(batch.id))
+
+
+def _slug(value: str) -> str:
+    return re.sub(r'[^A-Za-z0-9]+', '_', value or '').strip('_')[:60] or 'Donor'
+
+
+# ============================================================================
+# AGGREGATION
+# ============================================================================
+
+def collect_statements(batch):
+    """
+    Return one picklable payload per donor for the batch's financial year.
+
+    Receipt amounts are summed in the database; the rows come back ordered by
+    donor so they can be grouped in a single pass.
+    """
+    from django.db.models import Sum
+    from .models import JournalEntry, MembershipConfig
+
+    start, end = financial_year_bounds(batch.financial_year)
+    rows = (
+        JournalEntry.objects
+        .filter(mosque_id=batch.mosque_id, voucher_type='RECEIPT',
+                date__gte=start, date__lte=end, donor__isnull=False)
+        .annotate(amount=Sum('items__credit_amount'))
+        .values('id', 'date', 'payment_mode', 'donor_pan', 'donor_id',
+                'donor__full_name', 'donor__household__address', 'amount')
+        .order_by('donor_id', 'date', 'id')
+    )
+
+    config = MembershipConfig.for_mosque(batch.mosque_id)
+    org = {
+        'org_name': config.organization_name if config else "Digital Jamath",
+        'org_address': config.organization_address if config else "",
+        'org_pan': config.organization_pan if config else "",
+        'reg_80g': config.registration_number_80g if config else "",
+        'masjid_name': config.masjid_name if config else "",
+    }
+
+    statements = []
+    for donor_id, donor_rows in groupby(rows.iterator(chunk_size=2000), key=lambda r: r['donor_id']):
+        donor_rows = list(donor_rows)
+        receipts = [
+            {
+                'receipt_number': f"RCP-{r['date'].strftime('%Y%m%d')}-{r['id']:04d}",
+                'date': r['date'],
+                'payment_mode': r['payment_mode'],
+                'amount': r['amount'] or Decimal('0.00'),
+            }
+            for r in donor_rows
+        ]
+        first = donor_rows[0]
+        # Latest PAN quoted by the donor during the year
+        pan = next((r['donor_pan'] for r in reversed(donor_rows) if r['donor_pan']), "")
+        statements.append({
+            'donor_id': donor_id,
+            'statement_number': f"STM-{batch.financial_year}-{donor_id:05d}",
+            'financial_year': batch.financial_year,
+            'donor_name': first['donor__full_name'] or "Member",
+            'donor_address': first['donor__household__address'] or "",
+            'donor_pan': pan,
+            'receipts': receipts,
+            'total': sum((r['amount'] for r in receipts), Decimal('0.00')),
+            **org,
+        })
+    return statements
+
+
+# ============================================================================
+# RENDERING
+# ============================================================================
+
+def part_filename(payload) -> str:
+    return f"{payload['statement_number']}_{_slug(payload['donor_name'])}.pdf"
+
+
+def render_statement_part(payload: dict, path: str) -> str:
+    """Render one statement to `path`. Runs inside pool workers, so no DB access."""
+    from .receipt_generator import generate_donor_statement_pdf
+
+    kwargs = {k: v for k, v in payload.items() if k != 'donor_id'}
+    pdf_bytes = generate_donor_statement_pdf(**kwargs)
+
+    # Write-then-rename so a crash never leaves a truncated part behind
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as fh:
+        fh.write(pdf_bytes)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _worker_count() -> int:
+    return settings.DONOR_STATEMENT_WORKERS or os.cpu_count() or 1
+
+
+def write_zip(parts_dir: str, zip_path: str, names) -> None:
+    """
+    Stream the part files `names` into the archive one at a time (PDFs are
+    stored, not re-deflated). Other files in `parts_dir`, such as parts of
+    donors dropped from the batch since an earlier run, are left out.
+    """
+    tmp_path = f"{zip_path}.tmp"
+    with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for name in sorted(names):
+            with open(os.path.join(parts_dir, name), 'rb') as src, zf.open(name, 'w') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.replace(tmp_path, zip_path)
+
+
+def run_batch(batch_id: int) -> None:
+    """
+    Render every missing statement for a batch and assemble the ZIP.
+
+    Safe to call again after a crash: donors whose part file already exists
+    are skipped, so a redelivered task resumes where the last one stopped.
+    """
+    from django.db import connections
+    from django.utils import timezone
+    from .models import DonorStatementBatch
+
+    batch = DonorStatementBatch.objects.get(id=batch_id)
+    if batch.status == DonorStatementBatch.Status.COMPLETED:
+        return
+
+    Status = DonorStatementBatch.Status
+
+    def update(**fields):
+        # update() skips auto_now; updated_at doubles as the heartbeat resume() checks
+        DonorStatementBatch.objects.filter(id=batch.id).update(updated_at=timezone.now(), **fields)
+
+    update(status=Status.RUNNING, error='')
+
+    try:
+        statements = collect_statements(batch)
+
+        root = batch_dir(batch)
+        parts_dir = os.path.join(root, 'parts')
+        os.makedirs(parts_dir, exist_ok=True)
+
+        pending = []
+        for payload in statements:
+            path = os.path.join(parts_dir, part_filename(payload))
+            if not os.path.exists(path):
+                pending.append((payload, path))
+
+        processed = len(statements) - len(pending)
+        update(total_donors=len(statements), processed_donors=processed)
+        logger.info(f"Donor statements batch {batch.id}: {len(pending)} of {len(statements)} left to render")
+
+        workers = min(_worker_count(), len(pending))
+        if workers <= 1:
+            for payload, path in pending:
+                render_statement_part(payload, path)
+                processed += 1
+                if processed % PROGRESS_EVERY == 0:
+                    update(processed_donors=processed)
+        elif pending:
+            # Forked workers must not share the parent's database sockets
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(render_statement_part, payload, path) for payload, path in pending]
+                for future in as_completed(futures):
+                    future.result()
+                    processed += 1
+                    if processed % PROGRESS_EVERY == 0:
+                        update(processed_donors=processed)
+
+        zip_name = f"80G_Statements_FY{batch.financial_year}-{(batch.financial_year + 1) % 100:02d}.zip"
+        write_zip(parts_dir, os.path.join(root, zip_name), [part_filename(payload) for payload in statements])
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+        update(
+            status=Status.COMPLETED,
+            processed_donors=processed,
+            archive_path=os.path.relpath(os.path.join(root, zip_name), settings.DONOR_STATEMENT_DIR),
+            completed_at=timezone.now(),
+        )
+    except Exception as e:
+        logger.error(f"Donor statements batch {batch.id} failed: {e}")
+        update(status=Status.FAILED, error=str(e))
+        raise
+
+
+def claim_for_resume(batch) -> bool:
+    """
+    Move a FAILED batch, or a PENDING or RUNNING one that has shown no
+    progress for STALL_TIMEOUT (lost task message, dead worker), back to
+    PENDING. Returns False when the batch is still queued or being worked on
+    (or was claimed by a concurrent resume).
+    """
+    from django.db.models import Q
+    from django.utils import timezone
+    from .models import DonorStatementBatch
+
+    Status = DonorStatementBatch.Status
+    now = timezone.now()
+    resumable = Q(status=Status.FAILED) | Q(status__in=[Status.PENDING, Status.RUNNING],
+                                             updated_at__lt=now - STALL_TIMEOUT)
+    claimed = DonorStatementBatch.objects.filter(resumable, id=batch.id).update(status=Status.PENDING, updated_at=now)
+    return claimed == 1
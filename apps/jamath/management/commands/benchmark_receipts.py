@@ -0,0 +1,87 @@
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from apps.jamath.receipt_canvas import clear_templates, render_receipt_pdf
+from apps.jamath.receipt_generator import generate_receipt_pdf
+
+
+SAMPLE_CONFIG = {
+    'org_name': 'Jamia Masjid Trust',
+    'org_address': 'Old City, Hyderabad 500002',
+    'org_pan': 'AAATJ1234F',
+    'reg_80g': 'AAATJ1234FF20214',
+    'masjid_name': 'Jamia Masjid',
+}
+
+
+def sample_receipt(i: int) -> dict:
+    amount = Decimal(500 + (i * 37) % 20000)
+    return {
+        'receipt_number': f"RCP-20250401-{i:04d}",
+        'payment_date': date(2025, 4, 1 + i % 28),
+        'donor_name': f"Donor {i}",
+        'donor_address': "12 Station Road, Hyderabad" if i % 2 else "",
+        'donor_pan': "ABCDE1234F" if i % 3 else "",
+        'amount': amount,
+        'membership_portion': amount,
+        'donation_portion': 0,
+        'payment_mode': ('Cash', 'UPI', 'NEFT')[i % 3],
+        **SAMPLE_CONFIG,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare receipts/second per core of the platypus and precompiled receipt renderers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200, help='Receipts to render per renderer')
+        parser.add_argument('--verify', action='store_true',
+                            help='Rasterise a sample from both renderers and check they are pixel-identical')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        receipts = [sample_receipt(i) for i in range(count)]
+
+        legacy_rate = self._run('platypus (legacy)', generate_receipt_pdf, receipts)
+
+        clear_templates()
+        start = time.perf_counter()
+        for receipt in receipts[:6]:
+            render_receipt_pdf(**receipt)
+        self.stdout.write(f"  template compile (6 shapes): {(time.perf_counter() - start) * 1000:.1f} ms")
+        fast_rate = self._run('canvas (precompiled)', render_receipt_pdf, receipts)
+
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {fast_rate / legacy_rate:.1f}x"))
+
+        if options['verify']:
+            self._verify(receipts[:12])
+
+    def _run(self, label, render, receipts) -> float:
+        start = time.perf_counter()
+        for receipt in receipts:
+            render(**receipt)
+        elapsed = time.perf_counter() - start
+        rate = len(receipts) / elapsed
+        self.stdout.write(f"{label:>22}: {rate:8.1f} receipts/s ({elapsed:.2f}s for {len(receipts)})")
+        return rate
+
+    def _verify(self, receipts):
+        import pypdfium2 as pdfium
+        from PIL import ImageChops
+
+        def pages(pdf_bytes):
+            return [page.render(scale=2).to_pil().convert('RGB') for page in pdfium.PdfDocument(pdf_bytes)]
+
+        for receipt in receipts:
+            expected = pages(generate_receipt_pdf(**receipt))
+            actual = pages(render_receipt_pdf(**receipt))
+            same = len(expected) == len(actual) and all(
+                ImageChops.difference(a, b).getbbox() is None for a, b in zip(expected, actual)
+            )
+            if not same:
+                self.stdout.write(self.style.ERROR(f"Output differs for {receipt['receipt_number']}"))
+                return
+        self.stdout.write(self.style.SUCCESS(f"Verified {len(receipts)} receipts render pixel-identical"))
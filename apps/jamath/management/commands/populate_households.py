@@ -2,6 +2,7 @@ import random
 from django.core.management.base import BaseCommand
 from apps.jamath.models import Household, Member
 from apps.shared.models import Mosque
+from apps.shared.phone import normalize_phone
 
 class Command(BaseCommand):
     help = 'Populates the database with 10 demo households'
@@ -39,7 +40,7 @@ class Command(BaseCommand):
         count = 0
         for phone, head_name, spouse_name in data:
             # Check if exists
-            if Household.objects.filter(phone_number=phone, mosque=mosque).exists():
+            if Household.objects.filter(phone_number=normalize_phone(phone), mosque=mosque).exists():
                 self.stdout.write(self.style.WARNING(f'Household with phone {phone} already exists in this Mosque. Skipping.'))
                 continue
                 
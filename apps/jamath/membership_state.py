@@ -0,0 +1,122 @@
+"""
+Membership state kept on each Household.
+
+`Household.membership_status` and `membership_valid_until` summarise the
+household's subscriptions, so renewal lists, dashboard counts and the portal
+read one indexed table instead of joining subscriptions per household:
+
+- ACTIVE: a paid subscription ends today or later; valid until the latest
+- PENDING: otherwise, a partly paid one ends today or later; valid until then
+- EXPIRED: neither
+
+Subscription saves and deletes (payments included) refresh their household,
+see signals.py. Otherwise the state only goes out of date with the calendar,
+so readers treat a state past `membership_valid_until` as EXPIRED.
+
+`sweep_expired_memberships` runs nightly on Celery beat: per mosque it flips
+subscriptions past their end date to EXPIRED with one UPDATE and rewrites
+the lapsed household states, under an advisory lock so overlapping runs
+skip a mosque instead of doing it twice.
+"""
+import logging
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# First key of pg_try_advisory_xact_lock(key, mosque_id) for the sweep
+SWEEP_LOCK_KEY = 0x4A4D01
+
+
+def _last_end_date(subscriptions, status):
+    ends = subscriptions.filter(status=status).annotate(last=Max('end_date')).values('last')
+    return Subquery(ends[:1])
+
+
+def refresh_membership_state(households, today=None):
+    """
+    Recompute the state of the households in a queryset from their
+    subscriptions. Returns the ids of households whose state changed.
+    """
+    from .models import Household, Subscription
+    from .sync import record_changes
+
+    today = today or timezone.now().date()
+    Status = Household.MembershipStatus
+    current = Subscription.objects.filter(household=OuterRef('pk'), end_date__gte=today) \
+        .order_by().values('household')
+    rows = households.annotate(
+        active_until=_last_end_date(current, Subscription.Status.ACTIVE),
+        pending_until=_last_end_date(current, Subscription.Status.PENDING),
+    ).values_list('id', 'mosque_id', 'membership_status', 'membership_valid_until', 'active_until', 'pending_until')
+
+    # One UPDATE per distinct new state rather than one per household
+    groups = defaultdict(list)
+    changed = defaultdict(list)
+    for pk, mosque_id, status, valid_until, active_until, pending_until in rows.iterator():
+        if active_until:
+            state = (Status.ACTIVE, active_until)
+        elif pending_until:
+            state = (Status.PENDING, pending_until)
+        else:
+            state = (Status.EXPIRED, None)
+        if state != (status, valid_until):
+            groups[state].append(pk)
+            changed[mosque_id].append(pk)
+
+    with transaction.atomic():
+        for (status, valid_until), ids in groups.items():
+            Household.objects.filter(id__in=ids).update(membership_status=status, membership_valid_until=valid_until)
+        # update() sends no signals
+        for mosque_id, ids in changed.items():
+            record_changes(mosque_id, 'household', [(pk, pk) for pk in ids])
+    return [pk for ids in changed.values() for pk in ids]
+
+
+def _try_sweep_lock(mosque_id):
+    # Held until the surrounding transaction ends
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_xact_lock(%s, %s)', [SWEEP_LOCK_KEY, mosque_id or 0])
+        return cursor.fetchone()[0]
+
+
+def sweep_expired_memberships(today=None):
+    """
+    Expire subscriptions and household memberships that ran out before
+    `today`, mosque by mosque.
+
+    Returns `{mosque_id: {'subscriptions': n, 'households': n}}` for the
+    mosques swept; a mosque another sweep holds the lock on is left to it.
+    """
+    from .models import ActivityLog, Household, Subscription
+
+    today = today or timezone.now().date()
+    open_statuses = [Subscription.Status.ACTIVE, Subscription.Status.PENDING]
+    ended = Subscription.objects.filter(status__in=open_statuses, end_date__lt=today)
+    lapsed = Household.objects.filter(membership_status__in=open_statuses, membership_valid_until__lt=today)
+    mosque_ids = set(ended.order_by().values_list('mosque_id', flat=True).distinct()) \
+        | set(lapsed.order_by().values_list('mosque_id', flat=True).distinct())
+
+    report = {}
+    for mosque_id in sorted(mosque_ids, key=lambda pk: pk or 0):
+        with transaction.atomic():
+            if not _try_sweep_lock(mosque_id):
+                logger.info(f"Membership sweep for mosque {mosque_id} already running, skipped")
+                continue
+            # Status only: update() skips the per-subscription signals, the
+            # households are brought up to date below
+            subscriptions = ended.filter(mosque_id=mosque_id).update(status=Subscription.Status.EXPIRED)
+            households = len(refresh_membership_state(lapsed.filter(mosque_id=mosque_id), today))
+            if subscriptions or households:
+                ActivityLog.objects.create(
+                    mosque_id=mosque_id,
+                    action='UPDATE',
+                    module='jamath',
+                    model_name='Subscription',
+                    details=f"Expired {subscriptions} subscription(s) and {households} household membership(s)",
+                )
+        report[mosque_id] = {'subscriptions': subscriptions, 'households': households}
+    return report
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.9 on 2026-10-19 03:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jamath', '0006_membershipconfig_is_strict_accounting'),
+        ('shared', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['mosque', 'updated_at', 'id'], name='journal_sync_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.9 on 2026-10-19 03:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jamath', '0007_journalentry_sync_index'),
+        ('shared', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonorStatementBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('financial_year', models.PositiveIntegerField(help_text='Starting year, e.g. 2024 for FY 2024-25')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('total_donors', models.PositiveIntegerField(default=0)),
+                ('processed_donors', models.PositiveIntegerField(default=0)),
+                ('archive_path', models.CharField(blank=True, help_text='ZIP path relative to DONOR_STATEMENT_DIR', max_length=255)),
+                ('task_id', models.CharField(blank=True, max_length=255)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='donor_statement_batches', to=settings.AUTH_USER_MODEL)),
+                ('mosque', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_objects', to='shared.mosque')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.9 on 2026-10-19 03:32
+
+import logging
+import re
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+# Frozen copy of apps/shared/phone.py as of this migration, so later changes
+# to normalisation don't change what this backfill writes
+_SEPARATORS = re.compile(r'[\s\-().]')
+
+
+def normalize_phone(value):
+    if not value:
+        return None
+    value = _SEPARATORS.sub('', str(value))
+
+    if value.startswith('+'):
+        digits = value[1:]
+    elif value.startswith('00'):
+        digits = value[2:]
+    else:
+        digits = value.lstrip('0') if value.startswith('0') else value
+        country_code = getattr(settings, 'PHONE_DEFAULT_COUNTRY_CODE', '91')
+        if not (len(digits) > 10 and digits.startswith(country_code)):
+            digits = country_code + digits
+
+    if not digits.isdigit() or not 8 <= len(digits) <= 15:
+        return None
+    return f"+{digits}"
+
+
+def backfill_e164(apps, schema_editor):
+    """Rewrite stored phone numbers to E.164, skipping ones that would collide."""
+    Household = apps.get_model('jamath', 'Household')
+    taken = set(Household.objects.exclude(phone_number=None).values_list('phone_number', flat=True))
+
+    changed = []
+    for household in Household.objects.exclude(phone_number=None).only('id', 'phone_number').iterator(chunk_size=2000):
+        normalized = normalize_phone(household.phone_number)
+        if household.phone_number == '':
+            normalized = None
+        elif not normalized or normalized == household.phone_number:
+            continue
+        elif normalized in taken:
+            logger.warning(f"Household {household.id}: {household.phone_number} duplicates {normalized}, left as is")
+            continue
+
+        taken.discard(household.phone_number)
+        if normalized:
+            taken.add(normalized)
+        household.phone_number = normalized
+        changed.append(household)
+
+    Household.objects.bulk_update(changed, ['phone_number'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jamath', '0008_donorstatementbatch'),
+        ('shared', '0003_auth_user_lower_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='household',
+            name='phone_number',
+            field=models.CharField(blank=True, help_text='Primary contact for OTP login (E.164)', max_length=16, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_e164, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='household',
+            index=models.Index(fields=['phone_number'], name='household_phone_prefix', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='household',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Reverse('phone_number'), name='text_pattern_ops'), name='household_phone_suffix'),
+        ),
+    ]
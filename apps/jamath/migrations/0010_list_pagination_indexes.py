@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-19 03:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jamath', '0009_household_phone_e164'),
+        ('shared', '0003_auth_user_lower_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['-timestamp', '-id'], name='activity_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['mosque', '-date', '-created_at', '-id'], name='journal_page_idx'),
+        ),
+    ]
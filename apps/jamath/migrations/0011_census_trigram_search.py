@@ -0,0 +1,92 @@
+# Generated by Django 5.2.9 on 2026-10-19 03:40
+
+import re
+from collections import defaultdict
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+# Frozen copy of apps/jamath/search.py as of this migration, so later
+# changes to the folding rules don't change what this backfill writes
+_FOLDS = (
+    ('ph', 'f'), ('th', 't'), ('kh', 'k'), ('gh', 'g'), ('dh', 'd'), ('bh', 'b'),
+    ('q', 'k'), ('w', 'v'),
+    ('ee', 'i'), ('oo', 'o'), ('ou', 'o'), ('u', 'o'),
+)
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+_REPEATED_LETTER = re.compile(r'([a-z])\1+')
+
+
+def fold(text):
+    text = _NON_WORD.sub(' ', str(text or '').lower())
+    for old, new in _FOLDS:
+        text = text.replace(old, new)
+    return _REPEATED_LETTER.sub(r'\1', text).strip()
+
+
+def build_household_document(household, member_names):
+    phone = household.phone_number
+    digits = phone.lstrip('+') if phone else ''
+    phone_terms = [digits, digits[-10:]] if len(digits) > 10 else [digits] if digits else []
+    parts = [household.membership_id or '', *phone_terms, household.address or '', *member_names]
+    return fold(' '.join(parts))
+
+
+def backfill_search_text(apps, schema_editor):
+    Household = apps.get_model('jamath', 'Household')
+    Member = apps.get_model('jamath', 'Member')
+
+    names = defaultdict(list)
+    batch = []
+    for member in Member.objects.order_by('-is_head_of_family', 'id').only('id', 'household_id', 'full_name').iterator(chunk_size=5000):
+        names[member.household_id].append(member.full_name)
+        member.search_name = fold(member.full_name)
+        batch.append(member)
+        if len(batch) >= 5000:
+            Member.objects.bulk_update(batch, ['search_name'])
+            batch = []
+    Member.objects.bulk_update(batch, ['search_name'])
+
+    batch = []
+    for household in Household.objects.only('id', 'membership_id', 'phone_number', 'address').iterator(chunk_size=5000):
+        household.search_document = build_household_document(household, names[household.id])
+        batch.append(household)
+        if len(batch) >= 5000:
+            Household.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    Household.objects.bulk_update(batch, ['search_document'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jamath', '0010_list_pagination_indexes'),
+        ('shared', '0003_auth_user_lower_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='household',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='search_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        # Fill before indexing: one index build is cheaper than 100k index updates
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='household',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_document'], name='household_search_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_name'], name='member_search_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
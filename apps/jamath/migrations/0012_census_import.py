@@ -0,0 +1,53 @@
+# Generated by Django 5.2.9 on 2026-10-19 03:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jamath', '0011_census_trigram_search'),
+        ('shared', '0003_auth_user_lower_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CensusImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('source_name', models.CharField(help_text='Original file name', max_length=255)),
+                ('source_path', models.CharField(help_text='Upload path relative to CENSUS_IMPORT_DIR', max_length=255)),
+                ('processed_rows', models.PositiveIntegerField(default=0)),
+                ('failed_rows', models.PositiveIntegerField(default=0)),
+                ('households_created', models.PositiveIntegerField(default=0)),
+                ('members_created', models.PositiveIntegerField(default=0)),
+                ('error_report_path', models.CharField(blank=True, help_text='CSV path relative to CENSUS_IMPORT_DIR', max_length=255)),
+                ('task_id', models.CharField(blank=True, max_length=255)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='census_imports', to=settings.AUTH_USER_MODEL)),
+                ('mosque', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_objects', to='shared.mosque')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MembershipIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=10)),
+                ('last_value', models.PositiveIntegerField(default=0)),
+                ('mosque', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_objects', to='shared.mosque')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('mosque', 'prefix'), name='unique_membership_sequence', nulls_distinct=False)],
+            },
+        ),
+    ]
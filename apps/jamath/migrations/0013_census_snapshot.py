@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-19 04:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jamath', '0012_census_import'),
+        ('shared', '0003_auth_user_lower_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CensusSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stats', models.JSONField(default=dict)),
+                ('is_stale', models.BooleanField(default=True)),
+                ('computed_at', models.DateTimeField(blank=True, null=True)),
+                ('mosque', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_objects', to='shared.mosque')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('mosque',), name='unique_census_snapshot', nulls_distinct=False)],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.9 on 2026-10-19 04:10
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jamath', '0013_census_snapshot'),
+        ('shared', '0003_auth_user_lower_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomDataIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(choices=[('HOUSEHOLD', 'Household'), ('MEMBER', 'Member')], default='HOUSEHOLD', max_length=10)),
+                ('key', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='household',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['custom_data'], name='household_custom_data_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['custom_data'], name='member_custom_data_gin'),
+        ),
+        migrations.AddField(
+            model_name='customdataindex',
+            name='mosque',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_objects', to='shared.mosque'),
+        ),
+        migrations.AddConstraint(
+            model_name='customdataindex',
+            constraint=models.UniqueConstraint(fields=('mosque', 'target', 'key'), name='unique_custom_data_index', nulls_distinct=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 04:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jamath', '0014_custom_data_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='membershipconfig',
+            name='zakat_rules',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
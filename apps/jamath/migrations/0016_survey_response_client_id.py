@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-19 04:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_existing_scored(apps, schema_editor):
+    # Responses submitted so far were scored as they came in
+    SurveyResponse = apps.get_model('jamath', 'SurveyResponse')
+    SurveyResponse.objects.filter(scored_at__isnull=True).update(scored_at=models.F('submitted_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jamath', '0015_membershipconfig_zakat_rules'),
+        ('shared', '0003_auth_user_lower_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='surveyresponse',
+            name='client_id',
+            field=models.UUIDField(blank=True, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='surveyresponse',
+            name='scored_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_existing_scored, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='surveyresponse',
+            index=models.Index(condition=models.Q(('scored_at__isnull', True)), fields=['mosque'], name='surveyresponse_unscored'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.9 on 2026-10-19 04:21
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def seed_change_log(apps, schema_editor):
+    # One entry per existing record, so a first sync downloads everything
+    table = {name: apps.get_model('jamath', name)._meta.db_table
+             for name in ('Household', 'Member', 'Announcement', 'ServiceRequest', 'ChangeLogEntry', 'ChangeSequence')}
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"""
+            INSERT INTO "{table['ChangeLogEntry']}" (mosque_id, seq, model, object_id, household_id, is_deleted, changed_at)
+            SELECT mosque_id, row_number() OVER (PARTITION BY mosque_id ORDER BY model, object_id),
+                   model, object_id, household_id, false, now()
+            FROM (
+                SELECT mosque_id, 'household' AS model, id AS object_id, id AS household_id
+                FROM "{table['Household']}"
+                UNION ALL
+                SELECT mosque_id, 'member', id, household_id FROM "{table['Member']}"
+                UNION ALL
+                SELECT mosque_id, 'announcement', id, target_household_id FROM "{table['Announcement']}"
+                UNION ALL
+                SELECT mosque_id, 'service_request', id, household_id FROM "{table['ServiceRequest']}"
+            ) records
+        """)
+        cursor.execute(f"""
+            INSERT INTO "{table['ChangeSequence']}" (mosque_id, last_seq, pruned_seq)
+            SELECT mosque_id, max(seq), 0 FROM "{table['ChangeLogEntry']}" GROUP BY mosque_id
+        """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jamath', '0016_survey_response_client_id'),
+        ('shared', '0003_auth_user_lower_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.BigIntegerField()),
+                ('model', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('household_id', models.BigIntegerField(blank=True, null=True)),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('mosque', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_objects', to='shared.mosque')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['mosque', 'seq'], name='change_log_mosque_seq')],
+                'constraints': [models.UniqueConstraint(fields=('mosque', 'model', 'object_id'), name='unique_change_log_object', nulls_distinct=False)],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChangeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_seq', models.BigIntegerField(default=0)),
+                ('pruned_seq', models.BigIntegerField(default=0)),
+                ('mosque', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_objects', to='shared.mosque')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('mosque',), name='unique_change_sequence', nulls_distinct=False)],
+            },
+        ),
+        migrations.RunPython(seed_change_log, migrations.RunPython.noop),
+    ]
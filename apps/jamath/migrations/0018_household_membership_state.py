@@ -0,0 +1,53 @@
+# Generated by Django 5.2.9 on 2026-10-19 04:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_membership_state(apps, schema_editor):
+    # Same rules as apps/jamath/membership_state.py
+    household = apps.get_model('jamath', 'Household')._meta.db_table
+    subscription = apps.get_model('jamath', 'Subscription')._meta.db_table
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"""
+            UPDATE "{household}" h
+            SET membership_status = CASE WHEN s.active_until IS NOT NULL THEN 'ACTIVE' ELSE 'PENDING' END,
+                membership_valid_until = COALESCE(s.active_until, s.pending_until)
+            FROM (
+                SELECT household_id,
+                       max(end_date) FILTER (WHERE status = 'ACTIVE') AS active_until,
+                       max(end_date) FILTER (WHERE status = 'PENDING') AS pending_until
+                FROM "{subscription}"
+                WHERE end_date >= CURRENT_DATE
+                GROUP BY household_id
+            ) s
+            WHERE s.household_id = h.id
+              AND (s.active_until IS NOT NULL OR s.pending_until IS NOT NULL)
+        """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jamath', '0017_delta_sync_change_log'),
+        ('shared', '0003_auth_user_lower_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='household',
+            name='membership_status',
+            field=models.CharField(choices=[('ACTIVE', 'Active'), ('PENDING', 'Pending (Partial Payment)'), ('EXPIRED', 'Expired')], default='EXPIRED', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='household',
+            name='membership_valid_until',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='household',
+            index=models.Index(fields=['mosque', 'membership_status', 'membership_valid_until'], name='household_membership_state'),
+        ),
+        migrations.RunPython(backfill_membership_state, migrations.RunPython.noop),
+    ]
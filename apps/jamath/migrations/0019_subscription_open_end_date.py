@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 04:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jamath', '0018_household_membership_state'),
+        ('shared', '0003_auth_user_lower_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(condition=models.Q(('status__in', ['ACTIVE', 'PENDING'])), fields=['end_date'], name='subscription_open_end_date'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.9 on 2026-10-19 04:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jamath', '0019_subscription_open_end_date'),
+        ('shared', '0003_auth_user_lower_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedVoucher',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_id', models.BigIntegerField()),
+                ('voucher_number', models.CharField(max_length=50)),
+                ('voucher_type', models.CharField(choices=[('RECEIPT', 'Receipt Voucher'), ('PAYMENT', 'Payment Voucher'), ('JOURNAL', 'Journal Entry')], max_length=20)),
+                ('date', models.DateField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('mosque', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_objects', to='shared.mosque')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['mosque', 'id'], name='deleted_voucher_sync_idx')],
+            },
+        ),
+    ]
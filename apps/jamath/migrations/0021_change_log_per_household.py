@@ -0,0 +1,22 @@
+# Generated by Django 5.2.9 on 2026-10-19 04:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jamath', '0020_deleted_voucher'),
+        ('shared', '0003_auth_user_lower_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='changelogentry',
+            name='unique_change_log_object',
+        ),
+        migrations.AddConstraint(
+            model_name='changelogentry',
+            constraint=models.UniqueConstraint(fields=('mosque', 'model', 'object_id', 'household_id'), name='unique_change_log_object', nulls_distinct=False),
+        ),
+    ]
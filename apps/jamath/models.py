@@ -1,6 +1,11 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Coalesce, Reverse
 from apps.shared.models import MosqueScoped
+from apps.shared.phone import E164_MAX_LENGTH, normalize_phone
+from .search import fold
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from decimal import Decimal
 
@@ -8,6 +13,45 @@ from decimal import Decimal
 # HOUSEHOLD & MEMBER MODELS
 # ============================================================================
 
+class HouseholdQuerySet(models.QuerySet):
+    SUMMARY_FIELDS = ('member_count', 'head_name')
+
+    def with_summary(self, *fields):
+        """
+        Annotate member count and head of family name in SQL, so listing
+        households costs the same number of queries at any size.
+
+        Pass property names from SUMMARY_FIELDS to annotate only those.
+        """
+        fields = fields or self.SUMMARY_FIELDS
+        members = Member.objects.filter(household=models.OuterRef('pk'))
+        annotations = {}
+        if 'member_count' in fields:
+            member_count = members.order_by().values('household').annotate(n=models.Count('pk')).values('n')
+            annotations['num_members'] = Coalesce(models.Subquery(member_count), 0)
+        if 'head_name' in fields:
+            head = members.filter(is_head_of_family=True).order_by('pk').values('full_name')[:1]
+            annotations['head_full_name'] = models.Subquery(head)
+        return self.annotate(**annotations)
+
+    def with_membership(self, status):
+        """
+        Households whose membership is `status` today, from the stored state
+        (see apps/jamath/membership_state.py). A state past its
+        `membership_valid_until` counts as EXPIRED.
+        """
+        today = timezone.now().date()
+        if status == Household.MembershipStatus.EXPIRED:
+            return self.filter(models.Q(membership_status=status) | models.Q(membership_valid_until__isnull=True)
+                               | models.Q(membership_valid_until__lt=today))
+        return self.filter(membership_status=status, membership_valid_until__gte=today)
+
+    def renewals_due(self):
+        """Households without an active membership today."""
+        return self.exclude(membership_status=Household.MembershipStatus.ACTIVE,
+                            membership_valid_until__gte=timezone.now().date())
+
+
 class Household(MosqueScoped):
     class EconomicStatus(models.TextChoices):
         ZAKAT_ELIGIBLE = 'ZAKAT_ELIGIBLE', 'Zakat Eligible'
@@ -18,6 +62,11 @@ class Household(MosqueScoped):
         RENTED = 'RENTED', 'Rented'
         FAMILY = 'FAMILY', 'Family Property'
 
+    class MembershipStatus(models.TextChoices):
+        ACTIVE = 'ACTIVE', 'Active'
+        PENDING = 'PENDING', 'Pending (Partial Payment)'
+        EXPIRED = 'EXPIRED', 'Expired'
+
     address = models.TextField()
     economic_status = models.CharField(max_length=20, choices=EconomicStatus.choices, default=EconomicStatus.AAM)
     housing_status = models.CharField(max_length=20, choices=HousingStatus.choices, default=HousingStatus.OWN)
@@ -25,17 +74,53 @@ class Household(MosqueScoped):
     
     # Membership Identity
     membership_id = models.CharField(max_length=50, unique=True, null=True, blank=True, help_text="Jamath Membership ID (e.g., JM-001)")
-    phone_number = models.CharField(max_length=15, null=True, blank=True, unique=True, help_text="Primary contact for OTP login")
+    phone_number = models.CharField(max_length=E164_MAX_LENGTH, null=True, blank=True, unique=True, help_text="Primary contact for OTP login (E.164)")
     is_verified = models.BooleanField(default=False, help_text="Admin-verified household")
+
+    # Summary of the subscriptions; maintained by apps/jamath/membership_state.py
+    membership_status = models.CharField(max_length=20, choices=MembershipStatus.choices,
+                                         default=MembershipStatus.EXPIRED, editable=False)
+    membership_valid_until = models.DateField(null=True, blank=True, editable=False)
     
     custom_data = models.JSONField(default=dict, blank=True, help_text="Ad-hoc fields like Village, Blood Group")
     created_at = models.DateTimeField(auto_now_add=True, null=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='created_households')
 
+    # Folded ID, phone, address and member names; maintained by apps/jamath/search.py
+    search_document = models.TextField(blank=True, default='', editable=False)
+
+    objects = HouseholdQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Prefix and "last digits" phone searches by staff (see apps/shared/phone.py)
+            models.Index(fields=['phone_number'], name='household_phone_prefix',
+                         opclasses=['varchar_pattern_ops']),
+            models.Index(OpClass(Reverse('phone_number'), name='text_pattern_ops'),
+                         name='household_phone_suffix'),
+            GinIndex(fields=['search_document'], name='household_search_trgm', opclasses=['gin_trgm_ops']),
+            # Containment and key-exists filters on ad-hoc fields (apps/jamath/custom_data.py)
+            GinIndex(fields=['custom_data'], name='household_custom_data_gin'),
+            # Renewal lists and counts
+            models.Index(fields=['mosque', 'membership_status', 'membership_valid_until'],
+                         name='household_membership_state'),
+        ]
+
     def __str__(self):
         return f"Household {self.membership_id or self.id} - {self.economic_status}"
 
+    @classmethod
+    def find_by_phone(cls, phone):
+        """Household registered with `phone` (in any common format), or None."""
+        phone = normalize_phone(phone)
+        if not phone:
+            return None
+        return cls.objects.filter(phone_number=phone).first()
+
     def save(self, *args, **kwargs):
+        # Store E.164; values that can't be parsed are kept as entered
+        self.phone_number = normalize_phone(self.phone_number) or self.phone_number or None
+
         # Auto-generate membership_id if not set
         if not self.membership_id:
             self.membership_id = self._generate_membership_id()
@@ -43,44 +128,43 @@ class Household(MosqueScoped):
 
     def _generate_membership_id(self):
         """Generate a unique membership ID with configurable prefix."""
+        prefix = self.membership_id_prefix(self.mosque_id)
+        number = MembershipIdSequence.reserve(self.mosque_id, prefix)[0]
+        return f"{prefix}{number:03d}"
+
+    @staticmethod
+    def membership_id_prefix(mosque_id):
         try:
-            config = MembershipConfig.objects.filter(is_active=True, mosque=self.mosque).first()
-            prefix = config.membership_id_prefix if config else 'JM-'
-        except:
-            prefix = 'JM-'
-        
-        # Find the highest existing number with this prefix
-        from django.db.models import Max
-        from django.db.models.functions import Cast, Replace, Substr
-        
-        # Get all IDs with this prefix and find max number
-        existing = Household.objects.filter(
-            mosque=self.mosque,
-            membership_id__startswith=prefix
-        ).values_list('membership_id', flat=True)
-        
-        max_num = 0
-        for mid in existing:
-            try:
-                num_part = mid.replace(prefix, '')
-                num = int(num_part)
-                if num > max_num:
-                    max_num = num
-            except (ValueError, AttributeError):
-                continue
-        
-        # Generate new ID with zero-padding
-        new_num = max_num + 1
-        return f"{prefix}{new_num:03d}"
+            config = MembershipConfig.for_mosque(mosque_id)
+            return config.membership_id_prefix if config else 'JM-'
+        except Exception:
+            return 'JM-'
+
+    # member_count and head_name use the with_summary() annotations when present
 
     @property
     def member_count(self):
+        if 'num_members' in self.__dict__:
+            return self.num_members
         return self.members.count()
 
+    @property
+    def head_name(self):
+        if 'head_full_name' in self.__dict__:
+            return self.head_full_name or "Unknown"
+        head = self.members.filter(is_head_of_family=True).first()
+        return head.full_name if head else "Unknown"
+
+    @property
+    def current_membership_status(self):
+        """Stored membership status, or EXPIRED once its validity date has passed."""
+        if self.membership_valid_until is None or self.membership_valid_until < timezone.now().date():
+            return self.MembershipStatus.EXPIRED
+        return self.membership_status
+
     @property
     def is_membership_active(self):
-        """Check if household has an active subscription."""
-        return self.subscriptions.filter(status='ACTIVE', end_date__gte=timezone.now().date()).exists()
+        return self.current_membership_status == self.MembershipStatus.ACTIVE
 
 
 
@@ -132,10 +216,26 @@ class Member(MosqueScoped):
     
     custom_data = models.JSONField(default=dict, blank=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='created_members')
-    
+
+    # Folded full_name for fuzzy search (apps/jamath/search.py)
+    search_name = models.CharField(max_length=200, blank=True, default='', editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_name'], name='member_search_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['custom_data'], name='member_custom_data_gin'),
+        ]
+
     def __str__(self):
         return f"{self.full_name} ({'Head' if self.is_head_of_family else 'Member'})"
 
+    def save(self, *args, **kwargs):
+        self.search_name = fold(self.full_name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'full_name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'search_name'}
+        super().save(*args, **kwargs)
+
 
 # ============================================================================
 # MEMBERSHIP & SUBSCRIPTION MODELS
@@ -180,6 +280,9 @@ class MembershipConfig(MosqueScoped):
     household_label = models.CharField(max_length=50, default='Gharane', help_text="Display label for households (e.g., Gharane, Families, Khandan)")
     member_label = models.CharField(max_length=50, default='Afrad', help_text="Display label for members (e.g., Afrad, Members)")
     masjid_name = models.CharField(max_length=100, default='', blank=True, help_text="Display name for the masjid")
+
+    # Zakat eligibility scoring (apps/jamath/zakat_scoring.py); empty uses the defaults
+    zakat_rules = models.JSONField(default=dict, blank=True)
     
     
     is_strict_accounting = models.BooleanField(default=True, help_text="Enforce strict balance checks and double-entry validations")
@@ -192,6 +295,194 @@ class MembershipConfig(MosqueScoped):
     def __str__(self):
         return f"{self.cycle} - Min Fee: {self.currency} {self.minimum_fee}"
 
+    @classmethod
+    def for_mosque(cls, mosque_id):
+        """
+        Active config for a mosque, served from the tiered cache. The
+        namespace is bumped by a signal whenever a config is saved or deleted.
+        """
+        config = cache.get_or_compute(
+            config_cache_namespace(mosque_id), 'membership',
+            # False marks "no config" (None would read as a miss)
+            lambda: cls.objects.filter(is_active=True, mosque_id=mosque_id).first() or False,
+            CONFIG_CACHE_TIMEOUT,
+        )
+        return config or None
+
+
+CONFIG_CACHE_TIMEOUT = 60 * 60
+
+
+def config_cache_namespace(mosque_id) -> str:
+    return f"config:{mosque_id or 0}"
+
+
+class CustomDataIndex(MosqueScoped):
+    """
+    A `custom_data` key one mosque filters on often.
+
+    Backed by a partial expression index on that key for the mosque's rows,
+    built and dropped by Celery tasks (see apps/jamath/custom_data.py).
+    """
+    class Target(models.TextChoices):
+        HOUSEHOLD = 'HOUSEHOLD', 'Household'
+        MEMBER = 'MEMBER', 'Member'
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        READY = 'READY', 'Ready'
+        FAILED = 'FAILED', 'Failed'
+
+    target = models.CharField(max_length=10, choices=Target.choices, default=Target.HOUSEHOLD)
+    key = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['mosque', 'target', 'key'], name='unique_custom_data_index',
+                                    nulls_distinct=False),
+        ]
+
+    def __str__(self):
+        return f"{self.get_target_display()} custom_data -> {self.key}"
+
+    @classmethod
+    def ready_keys(cls, mosque_id, target):
+        """Keys with a built index for a mosque's households or members, from the tiered cache."""
+        indexes = cache.get_or_compute(
+            config_cache_namespace(mosque_id), 'custom-data-indexes',
+            lambda: list(cls.objects.filter(mosque_id=mosque_id, status=cls.Status.READY)
+                         .values_list('target', 'key')),
+            CONFIG_CACHE_TIMEOUT,
+        )
+        return {key for index_target, key in indexes if index_target == target}
+
+
+class ChangeSequence(MosqueScoped):
+    """Per-mosque change counter for delta sync (apps/jamath/sync.py)."""
+    last_seq = models.BigIntegerField(default=0)
+    # Tombstones up to here were pruned; older sync tokens must start over
+    pruned_seq = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['mosque'], name='unique_change_sequence', nulls_distinct=False),
+        ]
+
+    @classmethod
+    def reserve(cls, mosque_id, count=1):
+        """
+        Reserve `count` change numbers; returns them as a range.
+
+        The row stays locked until the caller's transaction commits, so a
+        mosque's changes become visible in sequence order. Keep that
+        transaction short (sync.number_pending_changes runs it after the
+        change commits).
+        """
+        from django.db import IntegrityError, transaction
+
+        with transaction.atomic():
+            sequence = cls.objects.select_for_update().filter(mosque_id=mosque_id).first()
+            if sequence is None:
+                try:
+                    with transaction.atomic():
+                        sequence = cls.objects.create(mosque_id=mosque_id)
+                except IntegrityError:
+                    sequence = cls.objects.select_for_update().get(mosque_id=mosque_id)
+            start = sequence.last_seq + 1
+            sequence.last_seq += count
+            sequence.save(update_fields=['last_seq'])
+        return range(start, start + count)
+
+
+class ChangeLogEntry(MosqueScoped):
+    """
+    The latest change to one synced record in one household. Each change
+    moves the entry to a new sequence number; deletions, and records moved
+    to another household, stay behind as tombstones until pruned.
+    """
+    # Null until the change has committed and been numbered
+    seq = models.BigIntegerField(null=True, blank=True)
+    model = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    # Household the record belongs (or belonged) to, for portal clients
+    household_id = models.BigIntegerField(null=True, blank=True)
+    is_deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['mosque', 'model', 'object_id', 'household_id'],
+                                    name='unique_change_log_object', nulls_distinct=False),
+        ]
+        indexes = [
+            models.Index(fields=['mosque', 'seq'], name='change_log_mosque_seq'),
+            models.Index(fields=['mosque'], condition=models.Q(seq__isnull=True), name='change_log_unnumbered'),
+        ]
+
+    def __str__(self):
+        return f"#{self.seq} {self.model}:{self.object_id}{' (deleted)' if self.is_deleted else ''}"
+
+
+class MembershipIdSequence(MosqueScoped):
+    """
+    Last membership number handed out per mosque and prefix.
+
+    Replaces scanning every household for the highest ID on each save; that
+    scan now runs once, to seed the sequence.
+    """
+    prefix = models.CharField(max_length=10)
+    last_value = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['mosque', 'prefix'], name='unique_membership_sequence',
+                                    nulls_distinct=False),
+        ]
+
+    def __str__(self):
+        return f"{self.prefix}{self.last_value:03d}"
+
+    @classmethod
+    def reserve(cls, mosque_id, prefix, count=1):
+        """Reserve `count` consecutive membership numbers; returns them as a range."""
+        from django.db import IntegrityError, transaction
+
+        with transaction.atomic():
+            sequence = cls.objects.select_for_update().filter(mosque_id=mosque_id, prefix=prefix).first()
+            if sequence is None:
+                try:
+                    with transaction.atomic():
+                        sequence = cls.objects.create(mosque_id=mosque_id, prefix=prefix,
+                                                      last_value=cls._highest_existing(mosque_id, prefix))
+                except IntegrityError:
+                    # Another request seeded it first
+                    sequence = cls.objects.select_for_update().get(mosque_id=mosque_id, prefix=prefix)
+            start = sequence.last_value + 1
+            sequence.last_value += count
+            sequence.save(update_fields=['last_value'])
+        return range(start, start + count)
+
+    @classmethod
+    def advance_past(cls, mosque_id, prefix, value):
+        """Make sure numbers up to `value` (e.g. imported IDs) are never handed out."""
+        cls.reserve(mosque_id, prefix, 0)
+        cls.objects.filter(mosque_id=mosque_id, prefix=prefix, last_value__lt=value).update(last_value=value)
+
+    @staticmethod
+    def _highest_existing(mosque_id, prefix):
+        highest = 0
+        existing = Household.objects.filter(
+            mosque_id=mosque_id, membership_id__startswith=prefix
+        ).values_list('membership_id', flat=True)
+        for membership_id in existing.iterator():
+            number = membership_id[len(prefix):]
+            if number.isdigit():
+                highest = max(highest, int(number))
+        return highest
+
 
 
 
@@ -211,6 +502,13 @@ class Subscription(MosqueScoped):
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Subscriptions the nightly sweep may expire (apps/jamath/membership_state.py)
+            models.Index(fields=['end_date'], name='subscription_open_end_date',
+                         condition=models.Q(status__in=['ACTIVE', 'PENDING'])),
+        ]
+
     def __str__(self):
         return f"{self.household.membership_id} - {self.status} ({self.start_date} to {self.end_date})"
 
@@ -322,6 +620,16 @@ class SurveyResponse(MosqueScoped):
     auditor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='audited_surveys')
     answers = models.JSONField(default=dict)
     submitted_at = models.DateTimeField(auto_now_add=True)
+    # Generated by the field app so a resubmitted batch doesn't duplicate rows
+    client_id = models.UUIDField(null=True, blank=True, unique=True)
+    # Set once the household has been rescored (apps/jamath/survey_ingest.py)
+    scored_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['mosque'], name='surveyresponse_unscored',
+                         condition=models.Q(scored_at__isnull=True)),
+        ]
 
     def __str__(self):
         return f"{self.survey.title} - {self.household.id}"
@@ -454,6 +762,12 @@ class JournalEntry(MosqueScoped):
         ordering = ['-date', '-created_at']
         verbose_name = "Journal Entry"
         verbose_name_plural = "Journal Entries"
+        indexes = [
+            # Incremental Tally sync walks entries by (updated_at, id)
+            models.Index(fields=['mosque', 'updated_at', 'id'], name='journal_sync_idx'),
+            # Voucher list pages (keyset on -date, -created_at, -id)
+            models.Index(fields=['mosque', '-date', '-created_at', '-id'], name='journal_page_idx'),
+        ]
 
     def __str__(self):
         return f"{self.voucher_number} - {self.get_voucher_type_display()}"
@@ -461,6 +775,9 @@ class JournalEntry(MosqueScoped):
     @property
     def total_amount(self):
         """Total transaction amount (sum of debits or credits)."""
+        # Summed in Python when the list view has prefetched the items
+        if 'items' in getattr(self, '_prefetched_objects_cache', {}):
+            return sum((item.debit_amount for item in self.items.all()), Decimal('0.00'))
         from django.db.models import Sum
         return self.items.aggregate(total=Sum('debit_amount'))['total'] or Decimal('0.00')
 
@@ -506,7 +823,7 @@ class JournalEntry(MosqueScoped):
             mosque_context = items[0].ledger.mosque
             
         # Fetch Config scoped to mosque
-        config = MembershipConfig.objects.filter(is_active=True, mosque=mosque_context).first()
+        config = MembershipConfig.for_mosque(mosque_context.id if mosque_context else None)
         is_strict = config.is_strict_accounting if config else True
         
         if is_strict:
@@ -683,6 +1000,118 @@ class JournalItem(MosqueScoped):
             raise ValidationError("Either debit or credit amount must be specified.")
 
 
+class DeletedVoucher(MosqueScoped):
+    """Tombstone of a deleted journal entry, so delta Tally exports can delete it there too."""
+    entry_id = models.BigIntegerField()
+    voucher_number = models.CharField(max_length=50)
+    voucher_type = models.CharField(max_length=20, choices=JournalEntry.VoucherType.choices)
+    date = models.DateField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Delta Tally exports read tombstones after the token's id
+            models.Index(fields=['mosque', 'id'], name='deleted_voucher_sync_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.voucher_number} (deleted)"
+
+
+class DonorStatementBatch(MosqueScoped):
+    """Year-end run that renders one consolidated 80G statement per donor into a ZIP."""
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        RUNNING = 'RUNNING', 'Running'
+        COMPLETED = 'COMPLETED', 'Completed'
+        FAILED = 'FAILED', 'Failed'
+
+    financial_year = models.PositiveIntegerField(help_text="Starting year, e.g. 2024 for FY 2024-25")
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    total_donors = models.PositiveIntegerField(default=0)
+    processed_donors = models.PositiveIntegerField(default=0)
+    archive_path = models.CharField(max_length=255, blank=True, help_text="ZIP path relative to DONOR_STATEMENT_DIR")
+    task_id = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True,
+                                    related_name='donor_statement_batches')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"80G statements FY {self.financial_year}-{(self.financial_year + 1) % 100:02d} ({self.status})"
+
+    @property
+    def progress(self):
+        """Percentage of donors rendered so far."""
+        if not self.total_donors:
+            return 100 if self.status == self.Status.COMPLETED else 0
+        return round(self.processed_donors * 100 / self.total_donors)
+
+
+# ============================================================================
+# CENSUS IMPORT
+# ============================================================================
+
+class CensusImport(MosqueScoped):
+    """Bulk upload of households and members from a CSV or XLSX file."""
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        RUNNING = 'RUNNING', 'Running'
+        COMPLETED = 'COMPLETED', 'Completed'
+        FAILED = 'FAILED', 'Failed'
+
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    source_name = models.CharField(max_length=255, help_text="Original file name")
+    source_path = models.CharField(max_length=255, help_text="Upload path relative to CENSUS_IMPORT_DIR")
+    processed_rows = models.PositiveIntegerField(default=0)
+    failed_rows = models.PositiveIntegerField(default=0)
+    households_created = models.PositiveIntegerField(default=0)
+    members_created = models.PositiveIntegerField(default=0)
+    error_report_path = models.CharField(max_length=255, blank=True, help_text="CSV path relative to CENSUS_IMPORT_DIR")
+    task_id = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True,
+                                    related_name='census_imports')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Census import {self.source_name} ({self.status})"
+
+
+# ============================================================================
+# CENSUS STATISTICS
+# ============================================================================
+
+class CensusSnapshot(MosqueScoped):
+    """
+    Precomputed census statistics for one mosque (see apps/jamath/census_stats.py).
+
+    The row with no mosque holds the totals across all mosques. Household and
+    member changes only set `is_stale`; the next read recomputes.
+    """
+    stats = models.JSONField(default=dict)
+    is_stale = models.BooleanField(default=True)
+    computed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['mosque'], name='unique_census_snapshot', nulls_distinct=False),
+        ]
+
+    def __str__(self):
+        return f"Census snapshot {self.mosque_id or 'all'} ({self.computed_at})"
+
+
 # ============================================================================
 # RBAC & STAFF MANAGEMENT
 # ============================================================================
@@ -731,6 +1160,10 @@ class ActivityLog(MosqueScoped):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Activity log pages (keyset on -timestamp, -id)
+            models.Index(fields=['-timestamp', '-id'], name='activity_page_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} {self.action} {self.model_name}"
@@ -0,0 +1,160 @@
+"""
+Content-addressed cache for generated receipt PDFs.
+
+Receipts are rendered once and stored on disk under a key derived from
+everything printed on them (entry, donor, amount and the organisation's 80G
+details). Any change to those inputs produces a new key, so stale PDFs are
+never served; signals only clean up files that can no longer be reached.
+"""
+import hashlib
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+# Bump when the PDF layout changes so previously cached files are ignored
+RENDERER_VERSION = '1'
+
+ADMIN = 'admin'
+PORTAL = 'portal'
+
+def get_storage():
+    return FileSystemStorage(location=settings.RECEIPT_CACHE_DIR)
+
+
+def receipt_number_for(entry) -> str:
+    return f"RCP-{entry.date.strftime('%Y%m%d')}-{entry.id:04d}"
+
+
+def build_receipt_kwargs(entry, config, variant: str = ADMIN) -> dict:
+    """Collect the `render_receipt_pdf` arguments for a receipt voucher."""
+    amount = entry.items.aggregate(total=Sum('credit_amount'))['total'] or Decimal('0.00')
+
+    donor_address = ""
+    if variant == PORTAL:
+        household = entry.donor.household if entry.donor else None
+        head_name = None
+        if household:
+            head_name = household.members.filter(
+                is_head_of_family=True
+            ).values_list('full_name', flat=True).first()
+            donor_address = household.address
+        if head_name:
+            donor_name = head_name
+        elif entry.donor:
+            donor_name = entry.donor.full_name
+        else:
+            donor_name = entry.donor_name_manual or "Member"
+    else:
+        if entry.donor:
+            donor_name = entry.donor.full_name
+        else:
+            donor_name = entry.donor_name_manual or entry.narration or "Member"
+
+    return {
+        'receipt_number': receipt_number_for(entry),
+        'payment_date': entry.date,
+        'donor_name': donor_name,
+        'donor_address': donor_address,
+        'donor_pan': entry.donor_pan or "",
+        'amount': amount,
+        'membership_portion': amount,  # Can be split if needed
+        'donation_portion': 0,
+        'payment_mode': entry.payment_mode or "Online",
+        'org_name': config.organization_name if config else "Digital Jamath",
+        'org_address': config.organization_address if config else "",
+        'org_pan': config.organization_pan if config else "",
+        'reg_80g': config.registration_number_80g if config else "",
+        'masjid_name': config.masjid_name if config else "",
+    }
+
+
+def receipt_digest(render_kwargs: dict) -> str:
+    """Stable hash of everything that ends up on the PDF."""
+    payload = json.dumps(render_kwargs, sort_keys=True, default=str)
+    return hashlib.sha256(f"{RENDERER_VERSION}:{payload}".encode()).hexdigest()
+
+
+def _entry_dir(mosque_id, entry_id) -> str:
+    return f"{mosque_id or 0}/{entry_id}"
+
+
+def get_or_render(entry, render_kwargs: dict, digest: str, variant: str) -> bytes:
+    """Return cached PDF bytes for `digest`, rendering and storing them on a miss."""
+    from .receipt_canvas import render_receipt_pdf
+
+    storage = get_storage()
+    directory = _entry_dir(entry.mosque_id, entry.id)
+    name = f"{directory}/{variant}-{digest}.pdf"
+
+    if storage.exists(name):
+        with storage.open(name, 'rb') as fh:
+            return fh.read()
+
+    pdf_bytes = render_receipt_pdf(**render_kwargs)
+
+    # Drop superseded renders of this receipt before storing the new one
+    if storage.exists(directory):
+        _, files = storage.listdir(directory)
+        for old in files:
+            if old.startswith(f"{variant}-"):
+                storage.delete(f"{directory}/{old}")
+    storage.save(name, ContentFile(pdf_bytes))
+    return pdf_bytes
+
+
+def purge_entry(mosque_id, entry_id) -> None:
+    storage = get_storage()
+    directory = _entry_dir(mosque_id, entry_id)
+    if not storage.exists(directory):
+        return
+    _, files = storage.listdir(directory)
+    for name in files:
+        storage.delete(f"{directory}/{name}")
+
+
+def purge_mosque(mosque_id) -> None:
+    storage = get_storage()
+    root = str(mosque_id or 0)
+    if not storage.exists(root):
+        return
+    entry_dirs, _ = storage.listdir(root)
+    for entry_id in entry_dirs:
+        purge_entry(mosque_id, entry_id)
+
+
+def serve_receipt_pdf(request, entry, config, variant: str = ADMIN) -> HttpResponse:
+    """
+    Build the receipt response with ETag/Last-Modified validators.
+
+    Returns 304 when the client already holds the current render, otherwise
+    serves the cached PDF (rendering it on first request).
+    """
+    render_kwargs = build_receipt_kwargs(entry, config, variant)
+    digest = receipt_digest(render_kwargs)
+    etag = quote_etag(digest)
+
+    stamps = [ts for ts in (entry.updated_at, getattr(config, 'updated_at', None)) if ts]
+    last_modified = int(max(stamps).timestamp()) if stamps else None
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is None:
+        pdf_bytes = get_or_render(entry, render_kwargs, digest, variant)
+        response = HttpResponse(pdf_bytes, content_type='application/pdf')
+        response['Content-Disposition'] = f'inline; filename="Receipt_{render_kwargs["receipt_number"]}.pdf"'
+    else:
+        response = not_modified
+
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    # Receipts contain PANs: keep them out of shared caches, but let the
+    # member's device revalidate instead of re-downloading
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,319 @@
+"""
+Fast receipt renderer for DigitalJamath.
+
+`receipt_generator.generate_receipt_pdf` rebuilds the stylesheet and lays out
+the whole platypus story for every receipt. Receipts have a fixed layout, so
+here the story is laid out once per organisation config and receipt "shape"
+(which optional rows are present) with placeholder values:
+
+- Static flowables (header, labels, table backgrounds and rules, 80G box,
+  signature, footer) are drawn once and their PDF operators are replayed
+  into each new canvas
+- Variable values are drawn straight onto the canvas at anchors taken from
+  the laid-out tables and paragraphs, using the same fonts and alignment
+
+The page is visually identical to the platypus version; anything the
+template cannot place exactly (e.g. multi-line values) falls back to it.
+
+Compiling reads reportlab internals (`Table._cellvalues`, `_colpositions`,
+`Canvas._code`, the document's font mapping), which is why requirements.txt
+pins reportlab exactly. If an upgrade moves them, receipts fall back to the
+platypus renderer rather than failing.
+"""
+import io
+import logging
+from datetime import datetime
+from decimal import Decimal
+from functools import lru_cache
+
+from reportlab.lib.fonts import ps2tt, tt2ps
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+from reportlab.platypus.doctemplate import ActionFlowable
+
+from .receipt_generator import (
+    build_receipt_styles, build_receipt_story, receipt_payment_rows, generate_receipt_pdf
+)
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = A4
+LEFT_MARGIN = RIGHT_MARGIN = 1.5 * cm
+TOP_MARGIN = BOTTOM_MARGIN = 1 * cm
+
+# Labelled one-line paragraphs whose value follows a bold label
+LABELLED_LINES = {
+    'payment_mode': 'Payment Mode:',
+    'amount_words': 'Amount in Words:',
+}
+
+TEMPLATE_CACHE_SIZE = 64
+
+# Private-use code points never occur in real receipt data
+_OPEN, _CLOSE = '\ue000', '\ue001'
+
+_styles = None
+# Set when compiling fails on this reportlab version
+_templates_unavailable = False
+
+
+def _sentinel(name: str) -> str:
+    return f"{_OPEN}{name}{_CLOSE}"
+
+
+def _get_styles():
+    global _styles
+    if _styles is None:
+        _styles = build_receipt_styles()
+    return _styles
+
+
+class _LayoutRecorder(SimpleDocTemplate):
+    """SimpleDocTemplate that notes where each flowable ends up instead of keeping the PDF."""
+
+    def __init__(self):
+        super().__init__(
+            io.BytesIO(),
+            pagesize=PAGE_SIZE,
+            leftMargin=LEFT_MARGIN,
+            rightMargin=RIGHT_MARGIN,
+            topMargin=TOP_MARGIN,
+            bottomMargin=BOTTOM_MARGIN
+        )
+        self.placed = []
+
+    def afterFlowable(self, flowable):
+        # Page/frame actions and spacers leave nothing on the page
+        if isinstance(flowable, (ActionFlowable, Spacer)):
+            return
+        frame = self.frame
+        avail_width = frame._getAvailableWidth()
+        # Tables keep their wrapped width in `_width`
+        width = flowable._width if isinstance(flowable, Table) else flowable.width
+        self.placed.append((
+            self.page - 1,
+            flowable,
+            frame._x + frame._leftExtraIndent,
+            frame._y + flowable.getSpaceAfter(),
+            avail_width,
+            avail_width - width,
+        ))
+
+
+class ReceiptTemplate:
+    """A receipt layout compiled for one organisation config and shape."""
+
+    def __init__(self, config_key: tuple, shape: tuple):
+        org_name, org_address, org_pan, reg_80g, masjid_name = config_key
+        has_address, has_pan, payment_labels = shape
+
+        values = {
+            'receipt_number': _sentinel('receipt_number'),
+            'date_text': _sentinel('date_text'),
+            'donor_name': _sentinel('donor_name'),
+            'donor_address': _sentinel('donor_address') if has_address else '',
+            'donor_pan': _sentinel('donor_pan') if has_pan else '',
+            'payment_rows': [(label, _sentinel(f'payment_{i}')) for i, label in enumerate(payment_labels)],
+            'total_text': _sentinel('total_text'),
+            'payment_mode': _sentinel('payment_mode'),
+            'amount_words': _sentinel('amount_words'),
+        }
+        story = build_receipt_story(
+            _get_styles(), org_name=org_name, org_address=org_address, org_pan=org_pan,
+            reg_80g=reg_80g, masjid_name=masjid_name, **values
+        )
+
+        # Let platypus do the layout (including page breaks and table splits) once
+        recorder = _LayoutRecorder()
+        recorder.build(story)
+
+        self.page_count = recorder.page
+        self.drawables = []   # (page, flowable, x, y, _sW)
+        self.anchors = []     # (page, key, font, size, color, align, x, y, max_width)
+
+        for page, flowable, x, y, avail_width, slack in recorder.placed:
+            if isinstance(flowable, Table):
+                self._compile_table(page, flowable, x, y, slack)
+            elif isinstance(flowable, Paragraph) and _OPEN in flowable.text:
+                flowable = self._compile_labelled_line(page, flowable, x, y, avail_width)
+            self.drawables.append((page, flowable, x, y, slack))
+
+        self._capture_static_pages()
+        # Only the captured operators are needed from here on
+        del self.drawables
+
+    def _compile_table(self, page, table, x, y, slack):
+        """Record anchors for placeholder cells and blank them in the skeleton."""
+        if table.hAlign in ('CENTER', 'CENTRE'):
+            x += slack * 0.5
+        elif table.hAlign == 'RIGHT':
+            x += slack
+
+        for row, cells in enumerate(table._cellvalues):
+            for col, value in enumerate(cells):
+                if not (isinstance(value, str) and value.startswith(_OPEN)):
+                    continue
+                key = value[1:-1]
+                style = table._cellStyles[row][col]
+                col_x = table._colpositions[col]
+                col_width = table._colpositions[col + 1] - col_x
+                row_y = table._rowpositions[row + 1]
+                row_height = table._rowpositions[row] - row_y
+
+                # Mirrors Table._drawCell for single-line string cells
+                if style.alignment == 'LEFT':
+                    ax = col_x + style.leftPadding
+                elif style.alignment in ('CENTRE', 'CENTER'):
+                    ax = col_x + (col_width + style.leftPadding - style.rightPadding) * 0.5
+                else:
+                    ax = col_x + col_width - style.rightPadding
+                if style.valign == 'BOTTOM':
+                    ay = row_y + style.bottomPadding + style.leading - style.fontsize
+                elif style.valign == 'TOP':
+                    ay = row_y + row_height - style.topPadding - style.fontsize
+                else:
+                    ay = row_y + (style.bottomPadding + row_height - style.topPadding + style.leading) / 2.0 - style.fontsize
+
+                # Cell text never re-flows the table, so there is no width limit
+                self.anchors.append((
+                    page, key, style.fontname, style.fontsize, style.color,
+                    style.alignment, x + ax, y + ay, None
+                ))
+                cells[col] = ''
+
+    def _compile_labelled_line(self, page, para, x, y, avail_width):
+        """Swap a '<b>Label:</b> value' paragraph for its label and anchor the value."""
+        key = para.text.split(_OPEN, 1)[1].split(_CLOSE, 1)[0]
+        label = LABELLED_LINES[key]
+        style = para.style
+
+        skeleton = Paragraph(f"<b>{label}</b>", style)
+        skeleton.wrap(avail_width, para.height)
+
+        family, _, italic = ps2tt(style.fontName)
+        bold_font = tt2ps(family, 1, italic)
+        offset = style.leftIndent + stringWidth(label, bold_font, style.fontSize) \
+            + stringWidth(' ', style.fontName, style.fontSize)
+        ay = y + para.height - style.fontSize
+        # A longer value would wrap onto a second line and move everything below
+        max_width = avail_width - offset - style.rightIndent
+        self.anchors.append((
+            page, key, style.fontName, style.fontSize, style.textColor, 'LEFT', x + offset, ay, max_width
+        ))
+        return skeleton
+
+    def fits(self, values: dict) -> bool:
+        """Whether every value can be placed without changing the compiled layout."""
+        for _, key, font, size, _, _, _, _, max_width in self.anchors:
+            if max_width is not None and stringWidth(values[key], font, size) > max_width:
+                return False
+        return True
+
+    def _capture_static_pages(self):
+        """Draw the static flowables once and keep the PDF operators of each page."""
+        canvas = Canvas(io.BytesIO(), pagesize=PAGE_SIZE)
+        self.page_code = []
+        for page in range(self.page_count):
+            for flowable_page, flowable, x, y, slack in self.drawables:
+                if flowable_page == page:
+                    flowable.drawOn(canvas, x, y, _sW=slack)
+            self.page_code.append(tuple(canvas._code))
+            canvas.showPage()
+        # Internal font names (/F1, /F2...) are handed out in order of first
+        # use, so fonts are registered in the same order before replaying
+        self.fonts = tuple(canvas._doc.fontMapping)
+
+    def render(self, values: dict) -> bytes:
+        buffer = io.BytesIO()
+        canvas = Canvas(buffer, pagesize=PAGE_SIZE)
+        for font in self.fonts:
+            canvas._doc.getInternalFontName(font)
+
+        for page, code in enumerate(self.page_code):
+            canvas._code.extend(code)
+
+            for anchor_page, key, font, size, color, align, x, y, _ in self.anchors:
+                text = values[key]
+                if anchor_page != page or not text:
+                    continue
+                canvas.setFont(font, size)
+                canvas.setFillColor(color)
+                if align == 'LEFT':
+                    canvas.drawString(x, y, text)
+                elif align == 'RIGHT':
+                    canvas.drawRightString(x, y, text)
+                else:
+                    canvas.drawCentredString(x, y, text)
+
+            canvas.showPage()
+
+        canvas.save()
+        return buffer.getvalue()
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def get_template(config_key: tuple, shape: tuple) -> ReceiptTemplate:
+    """Compiled template for an organisation config and receipt shape."""
+    return ReceiptTemplate(config_key, shape)
+
+
+def clear_templates() -> None:
+    get_template.cache_clear()
+
+
+def render_receipt_pdf(
+    receipt_number: str,
+    payment_date: datetime,
+    donor_name: str,
+    donor_address: str = "",
+    donor_pan: str = "",
+    amount: Decimal = Decimal("0"),
+    membership_portion: Decimal = Decimal("0"),
+    donation_portion: Decimal = Decimal("0"),
+    payment_mode: str = "Online",
+    org_name: str = "Digital Jamath",
+    org_address: str = "",
+    org_pan: str = "",
+    reg_80g: str = "",
+    masjid_name: str = "",
+) -> bytes:
+    """Drop-in replacement for `generate_receipt_pdf` using a compiled template."""
+    payment_rows = receipt_payment_rows(amount, membership_portion, donation_portion)
+    values = {
+        'receipt_number': str(receipt_number),
+        'date_text': payment_date.strftime('%d-%b-%Y'),
+        'donor_name': str(donor_name),
+        'donor_address': str(donor_address or ''),
+        'donor_pan': str(donor_pan or ''),
+        'total_text': f'{amount:,.2f}',
+        'payment_mode': str(payment_mode),
+        'amount_words': f"Rupees {int(amount):,} Only",
+    }
+    for i, (_, text) in enumerate(payment_rows):
+        values[f'payment_{i}'] = text
+
+    global _templates_unavailable
+    # Multi-line or markup-bearing values change the layout; let platypus handle them
+    if not _templates_unavailable and not any('\n' in v or '<' in v or '&' in v for v in values.values()):
+        config_key = (org_name, org_address, org_pan, reg_80g, masjid_name)
+        shape = (bool(values['donor_address']), bool(values['donor_pan']),
+                 tuple(label for label, _ in payment_rows))
+        try:
+            template = get_template(config_key, shape)
+            if template.fits(values):
+                return template.render(values)
+        except AttributeError:
+            # A reportlab release without the internals the template relies on
+            _templates_unavailable = True
+            logger.exception("Receipt templates unavailable, rendering receipts with platypus")
+
+    return generate_receipt_pdf(
+        receipt_number=receipt_number, payment_date=payment_date, donor_name=donor_name,
+        donor_address=donor_address, donor_pan=donor_pan, amount=amount,
+        membership_portion=membership_portion, donation_portion=donation_portion,
+        payment_mode=payment_mode, org_name=org_name, org_address=org_address,
+        org_pan=org_pan, reg_80g=reg_80g, masjid_name=masjid_name,
+    )
@@ -36,7 +36,11 @@ def generate_receipt_pdf(
 ) -> bytes:
     """
     Generate a PDF receipt and return as bytes.
-    
+
+    This is the original platypus renderer: styles and the full story are
+    rebuilt and laid out on every call. `receipt_canvas.render_receipt_pdf`
+    produces the same page from a precompiled template and is what the views use.
+
     Returns:
         PDF content as bytes
     """
@@ -49,7 +53,36 @@ def generate_receipt_pdf(
         topMargin=1*cm,
         bottomMargin=1*cm
     )
+
+    elements = build_receipt_story(
+        build_receipt_styles(),
+        receipt_number=receipt_number,
+        date_text=payment_date.strftime('%d-%b-%Y'),
+        donor_name=donor_name,
+        donor_address=donor_address,
+        donor_pan=donor_pan,
+        payment_rows=receipt_payment_rows(amount, membership_portion, donation_portion),
+        total_text=f'{amount:,.2f}',
+        payment_mode=payment_mode,
+        amount_words=f"Rupees {int(amount):,} Only",
+        org_name=org_name,
+        org_address=org_address,
+        org_pan=org_pan,
+        reg_80g=reg_80g,
+        masjid_name=masjid_name,
+    )
+
+    # Build PDF
+    doc.build(elements)
     
+    pdf_bytes = buffer.getvalue()
+    buffer.close()
+    
+    return pdf_bytes
+
+
+def build_receipt_styles() -> dict:
+    """Paragraph styles used by the receipt layout."""
     styles = getSampleStyleSheet()
     
     # Custom styles
@@ -84,7 +117,55 @@ def generate_receipt_pdf(
         fontSize=8,
         textColor=colors.grey
     )
+
+    address_style = ParagraphStyle('Address', parent=styles['Normal'], fontSize=9, alignment=TA_CENTER)
+
+    return {
+        'title': title_style,
+        'heading': heading_style,
+        'normal': normal_style,
+        'small': small_style,
+        'address': address_style,
+    }
+
+
+def receipt_payment_rows(amount, membership_portion, donation_portion) -> list:
+    """(description, formatted amount) rows above the receipt total."""
+    rows = []
+    if membership_portion > 0:
+        rows.append(('Membership Contribution', f'{membership_portion:,.2f}'))
     
+    if donation_portion > 0:
+        rows.append(('Donation (Sadaqah)', f'{donation_portion:,.2f}'))
+    
+    if membership_portion == 0 and donation_portion == 0:
+        rows.append(('Contribution', f'{amount:,.2f}'))
+    return rows
+
+
+def build_receipt_story(
+    styles: dict,
+    receipt_number: str,
+    date_text: str,
+    donor_name: str,
+    donor_address: str,
+    donor_pan: str,
+    payment_rows: list,
+    total_text: str,
+    payment_mode: str,
+    amount_words: str,
+    org_name: str,
+    org_address: str,
+    org_pan: str,
+    reg_80g: str,
+    masjid_name: str,
+) -> list:
+    """Platypus flowables for a receipt page, from already formatted values."""
+    title_style = styles['title']
+    heading_style = styles['heading']
+    normal_style = styles['normal']
+    small_style = styles['small']
+
     elements = []
     
     # Header - Organization Name
@@ -92,7 +173,7 @@ def generate_receipt_pdf(
     elements.append(Paragraph(f"<b>{display_name}</b>", title_style))
     
     if org_address:
-        elements.append(Paragraph(org_address, ParagraphStyle('Address', parent=styles['Normal'], fontSize=9, alignment=TA_CENTER)))
+        elements.append(Paragraph(org_address, styles['address']))
     
     elements.append(Spacer(1, 6*mm))
     
@@ -101,7 +182,7 @@ def generate_receipt_pdf(
     
     # Receipt details box
     receipt_data = [
-        ['Receipt No:', receipt_number, 'Date:', payment_date.strftime('%d-%b-%Y')],
+        ['Receipt No:', receipt_number, 'Date:', date_text],
     ]
     
     receipt_table = Table(receipt_data, colWidths=[3*cm, 5*cm, 2*cm, 4*cm])
@@ -144,18 +225,10 @@ def generate_receipt_pdf(
     payment_data = [
         ['Description', 'Amount (₹)'],
     ]
-    
-    if membership_portion > 0:
-        payment_data.append(['Membership Contribution', f'{membership_portion:,.2f}'])
-    
-    if donation_portion > 0:
-        payment_data.append(['Donation (Sadaqah)', f'{donation_portion:,.2f}'])
-    
-    if membership_portion == 0 and donation_portion == 0:
-        payment_data.append(['Contribution', f'{amount:,.2f}'])
+    payment_data.extend([label, value] for label, value in payment_rows)
     
     payment_data.append(['', ''])
-    payment_data.append(['Total', f'{amount:,.2f}'])
+    payment_data.append(['Total', total_text])
     
     payment_table = Table(payment_data, colWidths=[10*cm, 4*cm])
     payment_table.setStyle(TableStyle([
@@ -179,8 +252,7 @@ def generate_receipt_pdf(
     elements.append(Spacer(1, 10*mm))
     
     # Amount in words (simple version)
-    amount_int = int(amount)
-    elements.append(Paragraph(f"<b>Amount in Words:</b> Rupees {amount_int:,} Only", normal_style))
+    elements.append(Paragraph(f"<b>Amount in Words:</b> {amount_words}", normal_style))
     elements.append(Spacer(1, 15*mm))
     
     # 80G Section (if applicable)
@@ -223,13 +295,159 @@ def generate_receipt_pdf(
     elements.append(Spacer(1, 15*mm))
     elements.append(Paragraph("This is a computer-generated receipt.", small_style))
     elements.append(Paragraph("Thank you for your contribution. Jazakallah Khair.", small_style))
-    
-    # Build PDF
+
+    return elements
+
+
+def generate_donor_statement_pdf(
+    statement_number: str,
+    financial_year: int,
+    donor_name: str,
+    donor_address: str = "",
+    donor_pan: str = "",
+    receipts: list = None,
+    total: Decimal = Decimal("0"),
+    org_name: str = "Digital Jamath",
+    org_address: str = "",
+    org_pan: str = "",
+    reg_80g: str = "",
+    masjid_name: str = "",
+) -> bytes:
+    """
+    Generate a consolidated annual donation statement (Section 80G) as bytes.
+
+    `receipts` is a list of dicts with receipt_number, date, payment_mode and amount.
+    """
+    receipts = receipts or []
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=1.5*cm,
+        rightMargin=1.5*cm,
+        topMargin=1*cm,
+        bottomMargin=1*cm
+    )
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'Title',
+        parent=styles['Heading1'],
+        fontSize=18,
+        alignment=TA_CENTER,
+        spaceAfter=6,
+        textColor=colors.HexColor('#1a5f7a')
+    )
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=12,
+        alignment=TA_CENTER,
+        spaceAfter=12,
+        textColor=colors.HexColor('#333333')
+    )
+    normal_style = ParagraphStyle('CustomNormal', parent=styles['Normal'], fontSize=10, spaceAfter=4)
+    small_style = ParagraphStyle('Small', parent=styles['Normal'], fontSize=8, textColor=colors.grey)
+
+    elements = []
+
+    # Header - Organization Name
+    elements.append(Paragraph(f"<b>{masjid_name or org_name}</b>", title_style))
+    if org_address:
+        elements.append(Paragraph(org_address, ParagraphStyle('Address', parent=styles['Normal'], fontSize=9, alignment=TA_CENTER)))
+    elements.append(Spacer(1, 6*mm))
+
+    fy_label = f"{financial_year}-{(financial_year + 1) % 100:02d}"
+    elements.append(Paragraph(f"<b>ANNUAL DONATION STATEMENT — FY {fy_label}</b>", heading_style))
+
+    header_table = Table(
+        [['Statement No:', statement_number, 'Period:', f"01-Apr-{financial_year} to 31-Mar-{financial_year + 1}"]],
+        colWidths=[3*cm, 5*cm, 2*cm, 6*cm]
+    )
+    header_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ]))
+    elements.append(header_table)
+    elements.append(Spacer(1, 6*mm))
+
+    # Donor Details
+    elements.append(Paragraph("<b>Donor:</b>", normal_style))
+    donor_info = [['Name:', donor_name]]
+    if donor_address:
+        donor_info.append(['Address:', donor_address])
+    if donor_pan:
+        donor_info.append(['PAN:', donor_pan])
+    donor_table = Table(donor_info, colWidths=[3*cm, 12*cm])
+    donor_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ]))
+    elements.append(donor_table)
+    elements.append(Spacer(1, 6*mm))
+
+    # Receipts for the year
+    rows = [['Receipt No', 'Date', 'Mode', 'Amount (₹)']]
+    for receipt in receipts:
+        rows.append([
+            receipt['receipt_number'],
+            receipt['date'].strftime('%d-%b-%Y'),
+            receipt['payment_mode'] or 'Online',
+            f"{receipt['amount']:,.2f}",
+        ])
+    rows.append(['Total', '', '', f'{total:,.2f}'])
+
+    receipts_table = Table(rows, colWidths=[5*cm, 3.5*cm, 3.5*cm, 4*cm], repeatRows=1)
+    receipts_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, 1), (-1, -2), 'Helvetica'),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('ALIGN', (3, 0), (3, -1), 'RIGHT'),
+        ('LINEBELOW', (0, 0), (-1, 0), 1, colors.black),
+        ('LINEABOVE', (0, -1), (-1, -1), 1, colors.black),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f0f0f0')),
+        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#e8f5e9')),
+    ]))
+    elements.append(receipts_table)
+    elements.append(Spacer(1, 6*mm))
+    elements.append(Paragraph(f"<b>Total Contributions:</b> Rupees {int(total):,} Only", normal_style))
+    elements.append(Spacer(1, 10*mm))
+
+    # 80G Section (if applicable)
+    if reg_80g:
+        elements.append(Paragraph("<b>Tax Exemption Details (Section 80G)</b>", normal_style))
+        tax_table = Table([
+            ['Organization PAN:', org_pan or 'N/A'],
+            ['80G Registration No:', reg_80g],
+        ], colWidths=[5*cm, 10*cm])
+        tax_table.setStyle(TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#fff8e1')),
+            ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#ffc107')),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('LEFTPADDING', (0, 0), (-1, -1), 8),
+        ]))
+        elements.append(tax_table)
+        elements.append(Spacer(1, 10*mm))
+
+    elements.append(Paragraph("This is a computer-generated statement.", small_style))
+    elements.append(Paragraph("Thank you for your contribution. Jazakallah Khair.", small_style))
+
     doc.build(elements)
-    
+
     pdf_bytes = buffer.getvalue()
     buffer.close()
-    
+
     return pdf_bytes
 
 
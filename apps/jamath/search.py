@@ -0,0 +1,135 @@
+"""
+Census search shared by the household list, staff lookup and Basira.
+
+Each household keeps a denormalised `search_document` (membership ID, phone,
+address and every member's name), and each member a `search_name`. Both are
+"folded" so common transliteration variants of Indian names meet:
+Muhammad/Mohammed, Yusuf/Yousuf, Khadija/Khadeeja and Fathima/Fatima fold
+to the same or nearly the same text. They are matched with pg_trgm word
+similarity through GIN indexes, so a fuzzy lookup over 100k members reads
+a handful of index pages instead of joining and scanning every member.
+
+Documents are rebuilt by signals on Household/Member saves; bulk writers
+(imports, bulk_create) must call `refresh_household_documents` themselves.
+"""
+import re
+from collections import defaultdict
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Q, Value
+
+from apps.shared.phone import phone_search_q
+
+# Applied in order; both the stored text and the query go through them
+_FOLDS = (
+    # Aspirated consonants are written with or without the h (Khalil/Kalil)
+    ('ph', 'f'), ('th', 't'), ('kh', 'k'), ('gh', 'g'), ('dh', 'd'), ('bh', 'b'),
+    ('q', 'k'), ('w', 'v'),
+    ('ee', 'i'), ('oo', 'o'), ('ou', 'o'), ('u', 'o'),
+)
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+_REPEATED_LETTER = re.compile(r'([a-z])\1+')
+
+# Terms shorter than this are too short for trigrams to tell anything apart
+MIN_TERM_LENGTH = 2
+
+
+def fold(text) -> str:
+    """Lowercase, drop punctuation and collapse spelling variants."""
+    text = _NON_WORD.sub(' ', str(text or '').lower())
+    for old, new in _FOLDS:
+        text = text.replace(old, new)
+    return _REPEATED_LETTER.sub(r'\1', text).strip()
+
+
+def _phone_terms(phone):
+    if not phone:
+        return []
+    digits = phone.lstrip('+')
+    # The full number and the last ten digits, as people type either
+    return [digits, digits[-10:]] if len(digits) > 10 else [digits]
+
+
+def build_household_document(household, member_names) -> str:
+    parts = [household.membership_id or '', *_phone_terms(household.phone_number),
+             household.address or '', *member_names]
+    return fold(' '.join(parts))
+
+
+def refresh_household_documents(household_ids) -> None:
+    """Rebuild `search_document` for the given households (two queries + update)."""
+    from .models import Household, Member
+
+    household_ids = [pk for pk in set(household_ids) if pk]
+    if not household_ids:
+        return
+
+    names = defaultdict(list)
+    members = Member.objects.filter(household_id__in=household_ids).order_by('-is_head_of_family', 'id')
+    for household_id, full_name in members.values_list('household_id', 'full_name'):
+        names[household_id].append(full_name)
+
+    households = list(Household.objects.filter(pk__in=household_ids)
+                      .only('id', 'membership_id', 'phone_number', 'address', 'search_document'))
+    changed = []
+    for household in households:
+        document = build_household_document(household, names[household.id])
+        if document != household.search_document:
+            household.search_document = document
+            changed.append(household)
+    Household.objects.bulk_update(changed, ['search_document'], batch_size=1000)
+
+
+def _terms(query):
+    return [term for term in fold(query).split() if len(term) >= MIN_TERM_LENGTH]
+
+
+def _term_match(field, term):
+    # Numbers (IDs, phones, house numbers) must match exactly: every phone
+    # shares trigrams with every other, so fuzzy matching them matches all
+    if any(ch.isdigit() for ch in term):
+        return Q(**{f"{field}__contains": term})
+    # Word similarity for typos and spelling variants
+    return Q(**{f"{field}__trigram_word_similar": term})
+
+
+def _ranked(queryset, field, terms, match_all):
+    condition = Q()
+    for term in terms:
+        term_q = _term_match(field, term)
+        condition = (condition & term_q) if match_all else (condition | term_q)
+
+    similarities = [TrigramWordSimilarity(Value(term), field) for term in terms]
+    rank = sum(similarities[1:], similarities[0])
+    return queryset.filter(condition).annotate(search_rank=rank).order_by('-search_rank', 'pk')
+
+
+def search_households(query, queryset=None, match_all=True):
+    """
+    Households matching `query`, best match first (annotated `search_rank`).
+
+    With `match_all` every term must match; otherwise any term may (used by
+    Basira, which passes loose keywords from a question).
+    """
+    from .models import Household
+
+    queryset = Household.objects.all() if queryset is None else queryset
+    terms = _terms(query)
+    if not terms:
+        return queryset.none()
+    return _ranked(queryset, 'search_document', terms, match_all)
+
+
+def search_members(query, queryset=None):
+    """Members whose name (or household phone, for digit queries) matches `query`."""
+    from .models import Member
+
+    queryset = Member.objects.all() if queryset is None else queryset
+    phone_q = phone_search_q('household__phone_number', query)
+    if phone_q is not None:
+        return queryset.filter(phone_q).order_by('pk')
+
+    terms = _terms(query)
+    if not terms:
+        return queryset.none()
+    return _ranked(queryset, 'search_name', terms, match_all=True)
@@ -1,28 +1,41 @@
 
 from rest_framework import serializers
 
+from apps.shared.sparse_fields import SparseFieldsetMixin
+
 from .models import Survey, SurveyResponse, StaffRole, StaffMember
 
-class SurveySerializer(serializers.ModelSerializer):
+class SurveySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Survey
         fields = '__all__'
 
-class SurveyResponseSerializer(serializers.ModelSerializer):
+class SurveyResponseSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = SurveyResponse
         fields = '__all__'
+        read_only_fields = ['scored_at']
+
+    def validate(self, attrs):
+        from .survey_ingest import compile_survey_schema
+        survey = attrs.get('survey') or getattr(self.instance, 'survey', None)
+        if survey is not None and 'answers' in attrs:
+            answers, errors = compile_survey_schema(survey.schema)(attrs['answers'])
+            if errors:
+                raise serializers.ValidationError({'answers': errors})
+            attrs['answers'] = answers
+        return attrs
 
 # ============================================================================
 # RBAC SERIALIZERS
 # ============================================================================
 
-class StaffRoleSerializer(serializers.ModelSerializer):
+class StaffRoleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = StaffRole
         fields = '__all__'
 
-class StaffMemberSerializer(serializers.ModelSerializer):
+class StaffMemberSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user_email = serializers.EmailField(source='user.email', read_only=True)
     role_name = serializers.CharField(source='role.name', read_only=True)
 
@@ -0,0 +1,270 @@
+"""
+Signal handlers for the jamath app.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.shared.rbac import bump_permission_version
+from apps.shared.tokens import revoke_tokens
+
+from .models import (
+    Announcement, CustomDataIndex, Household, ServiceRequest, JournalEntry, JournalItem, Ledger, Member, MembershipConfig, StaffMember, StaffRole,
+    DeletedVoucher, Subscription, config_cache_namespace,
+)
+from . import receipt_cache
+from .census_stats import mark_census_stale
+from .membership_state import refresh_membership_state
+from .search import refresh_household_documents
+from .sync import record_changes, record_instance
+
+
+# ============================================================================
+# DATABASE EXTENSIONS
+# ============================================================================
+# Connected in JamathConfig.ready(). Migration 0011 also installs pg_trgm, but
+# test databases built without migrations need it before the GIN indexes.
+
+def ensure_postgres_extensions(sender, using, **kwargs):
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+
+# ============================================================================
+# CENSUS SEARCH DOCUMENTS
+# ============================================================================
+
+@receiver(post_save, sender=Household)
+def refresh_search_on_household_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_household_documents([instance.pk])
+
+
+@receiver(pre_save, sender=Member)
+def note_member_household(sender, instance, raw=False, **kwargs):
+    # A member moved to another household leaves the old one out of date too
+    instance._previous_household_id = None if raw or instance.pk is None else \
+        sender.objects.filter(pk=instance.pk).values_list('household_id', flat=True).first()
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def refresh_search_on_member_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_household_documents([instance.household_id, getattr(instance, '_previous_household_id', None)])
+
+
+# ============================================================================
+# CENSUS STATISTICS
+# ============================================================================
+
+@receiver(post_save, sender=Household)
+@receiver(post_delete, sender=Household)
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def mark_census_stats_stale(sender, instance, raw=False, **kwargs):
+    if not raw:
+        mark_census_stale(instance.mosque_id)
+
+
+# ============================================================================
+# DELTA SYNC CHANGE LOG
+# ============================================================================
+
+@receiver(post_save, sender=Household)
+@receiver(post_save, sender=Member)
+@receiver(post_save, sender=Announcement)
+@receiver(post_save, sender=ServiceRequest)
+def record_sync_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_instance(instance)
+
+
+@receiver(post_save, sender=Member)
+def record_sync_member_move(sender, instance, raw=False, **kwargs):
+    # The old household's portal client has to drop the member
+    previous = getattr(instance, '_previous_household_id', None)
+    if not raw and previous and previous != instance.household_id:
+        record_changes(instance.mosque_id, 'member', [(instance.pk, previous)], deleted=True)
+
+
+@receiver(post_delete, sender=Household)
+@receiver(post_delete, sender=Member)
+@receiver(post_delete, sender=Announcement)
+@receiver(post_delete, sender=ServiceRequest)
+def record_sync_deletion(sender, instance, **kwargs):
+    record_instance(instance, deleted=True)
+
+
+# ============================================================================
+# HOUSEHOLD MEMBERSHIP STATE
+# ============================================================================
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def refresh_membership_on_subscription_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_membership_state(Household.objects.filter(pk=instance.household_id))
+
+
+# ============================================================================
+# RECEIPT PDF CACHE
+# ============================================================================
+# Cache keys already change with the receipt contents, so these handlers only
+# reclaim disk space for renders that can no longer be requested.
+
+@receiver(post_save, sender=JournalEntry)
+def purge_receipt_on_entry_save(sender, instance, created, **kwargs):
+    if not created and instance.voucher_type == 'RECEIPT':
+        receipt_cache.purge_entry(instance.mosque_id, instance.id)
+
+
+@receiver(post_delete, sender=JournalEntry)
+def purge_receipt_on_entry_delete(sender, instance, **kwargs):
+    receipt_cache.purge_entry(instance.mosque_id, instance.id)
+
+
+@receiver(post_save, sender=MembershipConfig)
+def purge_receipts_on_config_save(sender, instance, **kwargs):
+    # Organisation name, PAN or 80G registration may have changed
+    receipt_cache.purge_mosque(instance.mosque_id)
+
+
+# ============================================================================
+# TIERED CACHE NAMESPACES
+# ============================================================================
+
+@receiver(post_save, sender=MembershipConfig)
+@receiver(post_delete, sender=MembershipConfig)
+def invalidate_config_cache(sender, instance, **kwargs):
+    cache.bump(config_cache_namespace(instance.mosque_id))
+
+
+@receiver(post_save, sender=CustomDataIndex)
+@receiver(post_delete, sender=CustomDataIndex)
+def invalidate_custom_data_indexes(sender, instance, **kwargs):
+    # Filters switch to a key's expression index once it is READY
+    cache.bump(config_cache_namespace(instance.mosque_id))
+
+
+def ledger_reports_namespace(mosque_id) -> str:
+    return f"ledger-reports:{mosque_id or 0}"
+
+
+@receiver(post_save, sender=JournalEntry)
+@receiver(post_delete, sender=JournalEntry)
+@receiver(post_save, sender=Ledger)
+@receiver(post_delete, sender=Ledger)
+def invalidate_ledger_reports(sender, instance, **kwargs):
+    cache.bump(ledger_reports_namespace(instance.mosque_id))
+
+
+@receiver(post_save, sender=JournalItem)
+@receiver(post_delete, sender=JournalItem)
+def invalidate_ledger_reports_on_item(sender, instance, **kwargs):
+    # Items aren't always stamped with a mosque; balances follow the ledger's
+    mosque_ids = {instance.mosque_id, instance.ledger.mosque_id}
+    cache.bump(*(ledger_reports_namespace(mosque_id) for mosque_id in mosque_ids))
+
+
+# ============================================================================
+# TALLY XML SYNC
+# ============================================================================
+# Delta exports pick up entries by updated_at and deletions by tombstone.
+
+@receiver(post_save, sender=JournalItem)
+@receiver(post_delete, sender=JournalItem)
+def touch_entry_on_item_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        JournalEntry.objects.filter(pk=instance.journal_entry_id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=JournalEntry)
+def record_deleted_voucher(sender, instance, **kwargs):
+    DeletedVoucher.objects.create(
+        mosque_id=instance.mosque_id, entry_id=instance.pk, voucher_number=instance.voucher_number,
+        voucher_type=instance.voucher_type, date=instance.date,
+    )
+
+
+# ============================================================================
+# PERMISSION CACHE
+# ============================================================================
+# Cached effective permissions are keyed by a per-user version; bumping it is
+# enough to make the next request re-read the role and overrides.
+
+@receiver(post_save, sender=StaffMember)
+@receiver(post_delete, sender=StaffMember)
+def invalidate_staff_permissions(sender, instance, **kwargs):
+    bump_permission_version([instance.user_id])
+
+
+@receiver(post_save, sender=StaffRole)
+def invalidate_role_permissions(sender, instance, **kwargs):
+    bump_permission_version(instance.members.values_list('user_id', flat=True))
+
+
+@receiver(pre_delete, sender=StaffRole)
+def invalidate_role_permissions_on_delete(sender, instance, **kwargs):
+    # Members are detached (SET_NULL) before post_delete fires, so collect them now
+    bump_permission_version(list(instance.members.values_list('user_id', flat=True)))
+
+
+# ============================================================================
+# TOKEN REVOCATION
+# ============================================================================
+# Requests trust the token (portal users never load their row), so losing
+# access has to revoke the tokens already issued.
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def note_user_deactivation(sender, instance, raw=False, **kwargs):
+    instance._deactivated = (
+        not raw and instance.pk is not None and not instance.is_active
+        and sender.objects.filter(pk=instance.pk, is_active=True).exists()
+    )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def revoke_tokens_on_deactivation(sender, instance, **kwargs):
+    if getattr(instance, '_deactivated', False):
+        revoke_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=Household)
+def revoke_portal_tokens_on_household_delete(sender, instance, **kwargs):
+    from django.contrib.auth import get_user_model
+
+    # Portal logins use the `member_<household id>` user (see PortalLoginView)
+    user_id = get_user_model().objects.filter(username=f"member_{instance.pk}") \
+        .values_list('pk', flat=True).first()
+    if user_id is not None:
+        revoke_tokens(user_id)
+
+
+# ============================================================================
+# CUSTOM DATA INDEXES
+# ============================================================================
+# Status updates from the build task save the row again; only registering
+# and removing a key needs the index built or dropped.
+
+@receiver(post_save, sender=CustomDataIndex)
+def build_custom_data_index(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        _sync_custom_data_index(instance)
+
+
+@receiver(post_delete, sender=CustomDataIndex)
+def drop_custom_data_index(sender, instance, **kwargs):
+    _sync_custom_data_index(instance)
+
+
+def _sync_custom_data_index(instance):
+    from .tasks import sync_custom_data_index_task
+
+    args = (instance.mosque_id, instance.target, instance.key)
+    transaction.on_commit(lambda: sync_custom_data_index_task.delay(*args))
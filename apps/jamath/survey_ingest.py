@@ -0,0 +1,212 @@
+"""
+Bulk survey response submission for field auditors.
+
+Volunteers on patchy mobile data queue responses offline and upload them in
+batches, retrying until a batch goes through:
+- Each response carries a `client_id` generated on the device; one that is
+  already stored is reported as a duplicate, so a retried batch is harmless
+- Answers are checked against `Survey.schema` (the form builder's question
+  list) with a validator compiled once per survey per batch
+- Valid responses are inserted with one `bulk_create`; invalid ones are
+  reported per item and don't hold the rest back
+- Households are rescored later, in bulk, by `score_pending_responses`
+"""
+import uuid
+
+from django.db import transaction
+from django.utils import timezone
+
+# Responses accepted per request
+MAX_BATCH = 500
+MAX_TEXT_LENGTH = 2000
+
+_TRUE = {'true', 'yes', '1'}
+_FALSE = {'false', 'no', '0'}
+
+
+def _text(value):
+    if not isinstance(value, str):
+        raise ValueError('must be text')
+    if len(value) > MAX_TEXT_LENGTH:
+        raise ValueError(f'must be at most {MAX_TEXT_LENGTH} characters')
+    return value
+
+
+def _number(value):
+    if isinstance(value, bool):
+        raise ValueError('must be a number')
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        number = float(str(value).strip())
+    except ValueError:
+        raise ValueError('must be a number') from None
+    return int(number) if number.is_integer() else number
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE or text in _FALSE:
+        return text in _TRUE
+    raise ValueError('must be true or false')
+
+
+def _select(options):
+    choices = [option.strip() for option in options.split(',') if option.strip()] \
+        if isinstance(options, str) else list(options or [])
+
+    def check(value):
+        if value not in choices:
+            raise ValueError(f"must be one of: {', '.join(map(str, choices))}")
+        return value
+    return check
+
+
+def compile_survey_schema(schema):
+    """
+    Turn a survey's question list into `validate(answers) -> (cleaned, errors)`.
+
+    Questions are `{"id", "label", "type": text|number|boolean|select,
+    "options": "a,b,c", "required": bool}`; answers map question ids to values.
+    """
+    checks = {}
+    required = set()
+    for question in schema or []:
+        if not isinstance(question, dict) or not question.get('id'):
+            continue
+        kind = question.get('type', 'text')
+        checks[question['id']] = _select(question.get('options')) if kind == 'select' else {
+            'number': _number, 'boolean': _boolean,
+        }.get(kind, _text)
+        if question.get('required'):
+            required.add(question['id'])
+
+    def validate(answers):
+        if not isinstance(answers, dict):
+            return None, {'answers': 'must be an object of question id to answer'}
+        cleaned, errors = {}, {}
+        for question_id, value in answers.items():
+            check = checks.get(question_id)
+            if check is None:
+                errors[question_id] = 'unknown question'
+            elif value is None or value == '':
+                if question_id in required:
+                    errors[question_id] = 'required'
+            else:
+                try:
+                    cleaned[question_id] = check(value)
+                except ValueError as e:
+                    errors[question_id] = str(e)
+        for question_id in required - answers.keys():
+            errors[question_id] = 'required'
+        return cleaned, errors
+    return validate
+
+
+def _pk(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _client_id(value):
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def ingest_responses(mosque_id, auditor, items):
+    """
+    Validate and store a batch of `{client_id, survey, household, answers}`.
+
+    Returns one result per item, in order: `created` or `duplicate` with the
+    stored response id, or `invalid` with the errors. client_id is unique
+    across mosques, so one already used by another mosque is invalid.
+    """
+    from .models import Household, Survey, SurveyResponse
+    from .tasks import score_survey_responses_task
+
+    def stored(ids):
+        # {client_id: (mosque_id, response id)}, whichever mosque has it
+        rows = SurveyResponse.objects.filter(client_id__in=ids).values_list('client_id', 'mosque_id', 'id')
+        return {client_id: (owner, pk) for client_id, owner, pk in rows}
+
+    items = [item if isinstance(item, dict) else {} for item in items]
+    client_ids = [_client_id(item.get('client_id')) for item in items]
+    existing = stored([c for c in client_ids if c])
+    surveys = {survey.id: survey for survey in Survey.objects.filter(
+        mosque_id=mosque_id, is_active=True, id__in={_pk(item.get('survey')) for item in items} - {None},
+    )}
+    household_ids = set(Household.objects.filter(
+        mosque_id=mosque_id, id__in={_pk(item.get('household')) for item in items} - {None},
+    ).values_list('id', flat=True))
+
+    validators = {}
+    results, new = [], {}
+    for item, client_id in zip(items, client_ids):
+        if client_id is None:
+            results.append({'client_id': item.get('client_id'), 'status': 'invalid',
+                            'errors': {'client_id': 'must be a UUID'}})
+            continue
+        result = {'client_id': str(client_id)}
+        results.append(result)
+        if client_id in existing or client_id in new:
+            result['status'] = 'duplicate'
+            continue
+
+        errors = {}
+        survey = surveys.get(_pk(item.get('survey')))
+        household_id = _pk(item.get('household'))
+        if survey is None:
+            errors['survey'] = 'unknown or inactive survey'
+        if household_id not in household_ids:
+            errors['household'] = 'unknown household'
+        if survey is not None:
+            if survey.id not in validators:
+                validators[survey.id] = compile_survey_schema(survey.schema)
+            answers, answer_errors = validators[survey.id](item.get('answers'))
+            if answer_errors:
+                errors['answers'] = answer_errors
+        if errors:
+            result.update(status='invalid', errors=errors)
+            continue
+
+        result['status'] = 'created'
+        new[client_id] = SurveyResponse(
+            mosque_id=mosque_id, survey=survey, household_id=household_id, auditor=auditor,
+            answers=answers, client_id=client_id,
+        )
+
+    if new:
+        # A concurrent retry of the same batch may have stored some already
+        SurveyResponse.objects.bulk_create(new.values(), ignore_conflicts=True)
+        existing.update(stored(list(new)))
+        transaction.on_commit(lambda: score_survey_responses_task.delay(mosque_id))
+
+    for result in results:
+        if result['status'] == 'invalid':
+            continue
+        owner, response_id = existing[uuid.UUID(result['client_id'])]
+        if owner == mosque_id:
+            result['id'] = response_id
+        else:
+            result.update(status='invalid', errors={'client_id': 'already used'})
+    return results
+
+
+def score_pending_responses(mosque_id):
+    """Rescore the households of a mosque's unscored responses; returns how many responses."""
+    from .models import SurveyResponse
+    from .zakat_scoring import rescore_mosque
+
+    pending = SurveyResponse.objects.filter(mosque_id=mosque_id, scored_at__isnull=True)
+    rows = list(pending.values_list('id', 'household_id'))
+    if not rows:
+        return 0
+    rescore_mosque(mosque_id, household_ids={household_id for _, household_id in rows})
+    SurveyResponse.objects.filter(id__in=[response_id for response_id, _ in rows]).update(scored_at=timezone.now())
+    return len(rows)
@@ -0,0 +1,170 @@
+"""
+Delta sync for offline census and portal clients.
+
+Every save or delete of a synced model moves that record's `ChangeLogEntry`
+to the next number in its mosque's `ChangeSequence`. A client keeps the
+opaque token from its last sync and asks for what changed after it:
+
+    GET /api/jamath/sync/?token=<token>&models=household,member
+
+The answer lists the current state of records changed since, the ids of
+records deleted (or no longer visible to the client), and a new token. The
+log holds one entry per record and household, so a first sync without a
+token is a full download and later ones cost only what changed; a member
+moved to another household leaves a deleted entry behind for the old one,
+so that household's portal client drops them.
+
+Entries are written in the transaction that makes the change, without a
+number. Once it commits they are numbered in a short transaction of their
+own, so the mosque's `ChangeSequence` row is locked only for that and not
+for the whole change, and a client never sees a later number before an
+earlier one has committed. If the process dies between the commit and the
+numbering, the entries stay unnumbered until the next sync of that mosque
+(or the nightly `prune_tombstones`) numbers them: late, but never lost.
+
+Deleted records are kept as tombstones for `TOMBSTONE_RETENTION`; a token
+older than the pruned tombstones gets `reset`, and the client starts over.
+
+Bulk writes that skip model signals (`bulk_create`, `update()`) must call
+`record_changes` themselves.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+
+SYNC_MODELS = ('household', 'member', 'announcement', 'service_request')
+# Change log entries returned per page
+PAGE_SIZE = 500
+TOMBSTONE_RETENTION = timedelta(days=90)
+
+_TOKEN_SALT = 'jamath.sync'
+
+
+def model_name(instance):
+    from .models import Announcement, Household, Member, ServiceRequest
+
+    return {Household: 'household', Member: 'member', Announcement: 'announcement',
+            ServiceRequest: 'service_request'}.get(type(instance))
+
+
+def household_of(name, instance):
+    if name == 'household':
+        return instance.pk
+    if name == 'announcement':
+        return instance.target_household_id
+    return instance.household_id
+
+
+def record_changes(mosque_id, name, objects, deleted=False):
+    """
+    Log changes to `objects`, `(object_id, household_id)` pairs of one synced
+    model. The entries are numbered when the current transaction commits.
+    """
+    from .models import ChangeLogEntry
+
+    # One conflict update per row: keep the last household seen for each object
+    objects = dict(objects)
+    if not objects:
+        return
+    now = timezone.now()
+    ChangeLogEntry.objects.bulk_create(
+        [ChangeLogEntry(mosque_id=mosque_id, seq=None, model=name, object_id=object_id,
+                        household_id=household_id, is_deleted=deleted, changed_at=now)
+         for object_id, household_id in objects.items()],
+        update_conflicts=True, unique_fields=['mosque', 'model', 'object_id', 'household_id'],
+        update_fields=['seq', 'is_deleted', 'changed_at'],
+    )
+    # A failure here must not fail the committed change; the next sync retries
+    transaction.on_commit(lambda: number_pending_changes(mosque_id), robust=True)
+
+
+def number_pending_changes(mosque_id):
+    """Give the mosque's committed, unnumbered entries the next change numbers; returns how many."""
+    from .models import ChangeLogEntry, ChangeSequence
+
+    with transaction.atomic():
+        # Entries another transaction is still rewriting get numbered by its own commit
+        pending = list(ChangeLogEntry.objects.select_for_update(skip_locked=True)
+                       .filter(mosque_id=mosque_id, seq__isnull=True).order_by('id').only('id'))
+        if not pending:
+            return 0
+        for entry, seq in zip(pending, ChangeSequence.reserve(mosque_id, len(pending))):
+            entry.seq = seq
+        ChangeLogEntry.objects.bulk_update(pending, ['seq'], batch_size=1000)
+    return len(pending)
+
+
+def record_instance(instance, deleted=False):
+    name = model_name(instance)
+    record_changes(instance.mosque_id, name, [(instance.pk, household_of(name, instance))], deleted)
+
+
+# ============================================================================
+# TOKENS
+# ============================================================================
+
+def make_token(mosque_id, seq, as_of):
+    return signing.dumps({'m': mosque_id or 0, 's': seq, 't': int(as_of.timestamp())},
+                         salt=_TOKEN_SALT, compress=True)
+
+
+def read_token(token, mosque_id):
+    """`(seq, as_of)` from a token issued for this mosque, or None if it can't be used."""
+    try:
+        data = signing.loads(token, salt=_TOKEN_SALT)
+    except signing.BadSignature:
+        return None
+    if not isinstance(data, dict) or data.get('m') != (mosque_id or 0):
+        return None
+    return data['s'], datetime.fromtimestamp(data['t'], tz=dt_timezone.utc)
+
+
+def changes_since(mosque_id, since, names, household_id=None, limit=None):
+    """
+    Entries after `since` for the given models, oldest first.
+
+    Returns `(entries, has_more)`. With `household_id` (portal clients) only
+    that household's records are included, plus every announcement so
+    retargeted ones can be withdrawn.
+    """
+    from django.db.models import Q
+    from .models import ChangeLogEntry
+
+    limit = limit or PAGE_SIZE
+    # Entries whose numbering was lost with their process
+    number_pending_changes(mosque_id)
+    entries = ChangeLogEntry.objects.filter(mosque_id=mosque_id, seq__gt=since, model__in=names).order_by('seq')
+    if household_id is not None:
+        entries = entries.filter(Q(model='announcement') | Q(household_id=household_id))
+    page = list(entries.values('seq', 'model', 'object_id')[:limit + 1])
+    return page[:limit], len(page) > limit
+
+
+def needs_reset(mosque_id, since):
+    from .models import ChangeSequence
+
+    pruned = ChangeSequence.objects.filter(mosque_id=mosque_id).values_list('pruned_seq', flat=True).first()
+    return since < (pruned or 0)
+
+
+def prune_tombstones(older_than=None):
+    """Drop tombstones older than the retention period; returns how many."""
+    from django.db.models import Max
+    from .models import ChangeLogEntry, ChangeSequence
+
+    # Also the nightly sweep for entries left unnumbered in mosques nobody synced
+    unnumbered = ChangeLogEntry.objects.filter(seq__isnull=True).order_by().values_list('mosque_id', flat=True)
+    for mosque_id in set(unnumbered.distinct()):
+        number_pending_changes(mosque_id)
+
+    cutoff = older_than or timezone.now() - TOMBSTONE_RETENTION
+    expired = ChangeLogEntry.objects.filter(is_deleted=True, changed_at__lt=cutoff, seq__isnull=False)
+    pruned = 0
+    for row in expired.values('mosque_id').annotate(through=Max('seq')):
+        with transaction.atomic():
+            ChangeSequence.objects.filter(mosque_id=row['mosque_id'], pruned_seq__lt=row['through']) \
+                .update(pruned_seq=row['through'])
+            pruned += expired.filter(mosque_id=row['mosque_id'], seq__lte=row['through']).delete()[0]
+    return pruned
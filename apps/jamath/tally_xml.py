@@ -0,0 +1,194 @@
+"""
+Tally XML Voucher Export for DigitalJamath.
+
+Streams Mizan journal entries as a Tally-compatible import envelope:
+- One <VOUCHER> per journal entry, written by a generator so large
+  financial years never sit in memory
+- Incremental sync tokens based on (updated_at, id), so daily syncs only
+  carry vouchers created or changed since the previous export; editing a
+  line item touches its entry's updated_at (see signals.py)
+- Entries deleted since the previous export are sent as ACTION="Delete"
+  vouchers, from `DeletedVoucher` tombstones whose id the token also carries
+"""
+import base64
+from decimal import Decimal
+from xml.sax.saxutils import escape, quoteattr
+
+from django.core.signing import Signer, BadSignature
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+SYNC_TOKEN_SALT = 'tally-xml-sync'
+
+VOUCHER_TYPE_NAMES = {
+    'RECEIPT': 'Receipt',
+    'PAYMENT': 'Payment',
+    'JOURNAL': 'Journal',
+}
+
+
+class InvalidSyncToken(ValueError):
+    """Raised when a `since` token is malformed or has been tampered with."""
+
+
+# ============================================================================
+# SYNC TOKENS
+# ============================================================================
+
+def make_sync_token(updated_at, entry_id, deleted_id=0) -> str:
+    """Encode the (updated_at, id) and tombstone high-water marks as an opaque signed token."""
+    raw = f"{updated_at.isoformat()}|{entry_id}|{deleted_id}"
+    signed = Signer(salt=SYNC_TOKEN_SALT).sign(raw)
+    return base64.urlsafe_b64encode(signed.encode()).decode().rstrip('=')
+
+
+def parse_sync_token(token: str):
+    """
+    Decode a token produced by `make_sync_token` into (updated_at, id,
+    deleted_id). Tokens from before tombstones existed carry no deleted_id.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        signed = base64.urlsafe_b64decode(padded.encode()).decode()
+        raw = Signer(salt=SYNC_TOKEN_SALT).unsign(signed)
+        stamp, entry_id, *deleted_id = raw.split('|')
+        updated_at = parse_datetime(stamp)
+        if updated_at is None or len(deleted_id) > 1:
+            raise ValueError(stamp)
+        return updated_at, int(entry_id), int(deleted_id[0]) if deleted_id else 0
+    except (BadSignature, ValueError, UnicodeDecodeError) as e:
+        raise InvalidSyncToken(str(e))
+
+
+def filter_since(queryset, since):
+    """Restrict entries to those created or changed after the (updated_at, id) mark."""
+    if not since:
+        return queryset
+    updated_at, entry_id = since[:2]
+    return queryset.filter(
+        Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=entry_id)
+    )
+
+
+def filter_until(queryset, until):
+    """Restrict entries to those at or before the (updated_at, id) mark."""
+    updated_at, entry_id = until[:2]
+    return queryset.filter(
+        Q(updated_at__lt=updated_at) | Q(updated_at=updated_at, id__lte=entry_id)
+    )
+
+
+# ============================================================================
+# XML WRITER
+# ============================================================================
+
+def _el(tag: str, value) -> str:
+    return f"<{tag}>{escape(str(value if value is not None else ''))}</{tag}>"
+
+
+def _amount(value: Decimal) -> str:
+    return f"{value:.2f}"
+
+
+def _ledger_name(ledger) -> str:
+    return f"{ledger.code} - {ledger.name}"
+
+
+def _party_name(entry) -> str:
+    if entry.donor_id:
+        return entry.donor.full_name
+    if entry.supplier_id:
+        return entry.supplier.name
+    return entry.donor_name_manual or ''
+
+
+def render_voucher(entry, since=None) -> str:
+    """
+    Render a single journal entry as a Tally <TALLYMESSAGE> block.
+
+    Tally's sign convention: debit lines are ISDEEMEDPOSITIVE=Yes with a
+    negative AMOUNT, credit lines are ISDEEMEDPOSITIVE=No with a positive AMOUNT.
+    """
+    vch_type = VOUCHER_TYPE_NAMES.get(entry.voucher_type, 'Journal')
+    # Vouchers that already existed at the previous sync are alterations
+    action = 'Alter' if since and entry.created_at and entry.created_at <= since[0] else 'Create'
+    remote_id = f"digitaljamath-{entry.mosque_id or 0}-{entry.id}"
+
+    parts = [
+        '<TALLYMESSAGE xmlns:UDF="TallyUDF">',
+        f'<VOUCHER REMOTEID={quoteattr(remote_id)} VCHTYPE={quoteattr(vch_type)} ACTION={quoteattr(action)}>',
+        _el('DATE', entry.date.strftime('%Y%m%d')),
+        _el('GUID', remote_id),
+        _el('VOUCHERTYPENAME', vch_type),
+        _el('VOUCHERNUMBER', entry.voucher_number),
+        _el('NARRATION', entry.narration),
+    ]
+
+    party = _party_name(entry)
+    if party:
+        parts.append(_el('PARTYLEDGERNAME', party))
+    if entry.vendor_invoice_no:
+        parts.append(_el('REFERENCE', entry.vendor_invoice_no))
+
+    for item in entry.items.all():
+        is_debit = item.debit_amount > 0
+        amount = -item.debit_amount if is_debit else item.credit_amount
+        parts.extend([
+            '<ALLLEDGERENTRIES.LIST>',
+            _el('LEDGERNAME', _ledger_name(item.ledger)),
+            _el('ISDEEMEDPOSITIVE', 'Yes' if is_debit else 'No'),
+            _el('AMOUNT', _amount(amount)),
+        ])
+        if item.particulars:
+            parts.append(_el('NARRATION', item.particulars))
+        parts.append('</ALLLEDGERENTRIES.LIST>')
+
+    parts.append('</VOUCHER>')
+    parts.append('</TALLYMESSAGE>')
+    return ''.join(parts) + '\n'
+
+
+def render_deletion(deleted) -> str:
+    """Render a `DeletedVoucher` tombstone as a Tally delete message."""
+    vch_type = VOUCHER_TYPE_NAMES.get(deleted.voucher_type, 'Journal')
+    remote_id = f"digitaljamath-{deleted.mosque_id or 0}-{deleted.entry_id}"
+    return ''.join([
+        '<TALLYMESSAGE xmlns:UDF="TallyUDF">',
+        f'<VOUCHER REMOTEID={quoteattr(remote_id)} VCHTYPE={quoteattr(vch_type)} ACTION="Delete">',
+        _el('DATE', deleted.date.strftime('%Y%m%d')),
+        _el('GUID', remote_id),
+        _el('VOUCHERTYPENAME', vch_type),
+        _el('VOUCHERNUMBER', deleted.voucher_number),
+        '</VOUCHER>',
+        '</TALLYMESSAGE>',
+    ]) + '\n'
+
+
+def iter_tally_xml(entries, company_name: str = '', since=None, deleted=()):
+    """
+    Yield a complete Tally import envelope chunk by chunk.
+
+    `entries` should be an iterator (e.g. `queryset.iterator(chunk_size=...)`)
+    so that only one chunk of vouchers is ever held in memory. `deleted`
+    tombstones come first, so a voucher number reused by a new entry isn't
+    deleted after it was created.
+    """
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<ENVELOPE>\n'
+    yield '<HEADER><TALLYREQUEST>Import Data</TALLYREQUEST></HEADER>\n'
+    yield '<BODY><IMPORTDATA>\n'
+    yield '<REQUESTDESC><REPORTNAME>Vouchers</REPORTNAME>'
+    if company_name:
+        yield f'<STATICVARIABLES>{_el("SVCURRENTCOMPANY", company_name)}</STATICVARIABLES>'
+    yield '</REQUESTDESC>\n'
+    yield '<REQUESTDATA>\n'
+
+    for tombstone in deleted:
+        yield render_deletion(tombstone)
+    for entry in entries:
+        yield render_voucher(entry, since=since)
+
+    yield '</REQUESTDATA>\n'
+    yield '</IMPORTDATA></BODY>\n'
+    yield '</ENVELOPE>\n'
@@ -0,0 +1,78 @@
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def generate_donor_statements_task(self, batch_id):
+    """
+    Render the consolidated 80G statements for a DonorStatementBatch.
+
+    acks_late + reject_on_worker_lost return the message to the queue if the
+    worker dies mid-run; `run_batch` then resumes from the rendered parts.
+    """
+    from .donor_statements import run_batch
+
+    logger.info(f"Starting donor statements batch {batch_id}")
+    run_batch(batch_id)
+
+
+@shared_task(bind=True)
+def import_census_task(self, import_id):
+    """
+    Import an uploaded census file (see `census_import.run_import`).
+
+    Not acks_late: chunks commit as they go, so a redelivered message would
+    import the first rows twice. `run_import` ignores imports already started.
+    """
+    from .census_import import run_import
+
+    logger.info(f"Starting census import {import_id}")
+    run_import(import_id)
+
+
+@shared_task(bind=True)
+def sync_custom_data_index_task(self, mosque_id, target, key):
+    """
+    Build or drop the expression index for a custom_data key (see
+    `custom_data.sync_index`), whichever matches the registered indexes now,
+    so a late task can't undo a newer change.
+    """
+    from .custom_data import sync_index
+
+    logger.info(f"Syncing custom data index {target}:{key} for mosque {mosque_id}")
+    sync_index(mosque_id, target, key)
+
+
+@shared_task(bind=True)
+def score_survey_responses_task(self, mosque_id):
+    """
+    Rescore households with new survey responses (see
+    `survey_ingest.score_pending_responses`). Each run takes whatever is
+    pending, so tasks queued by several uploads cost one rescoring.
+    """
+    from .survey_ingest import score_pending_responses
+
+    scored = score_pending_responses(mosque_id)
+    logger.info(f"Scored {scored} survey responses for mosque {mosque_id}")
+
+
+@shared_task(bind=True)
+def prune_change_log_task(self):
+    """Number stray delta sync entries and drop tombstones past their retention (see `sync.prune_tombstones`)."""
+    from .sync import prune_tombstones
+
+    logger.info(f"Pruned {prune_tombstones()} sync tombstones")
+
+
+@shared_task(bind=True)
+def expire_memberships_task(self):
+    """Nightly: expire ended subscriptions and lapsed memberships (see `membership_state`)."""
+    from .membership_state import sweep_expired_memberships
+
+    report = sweep_expired_memberships()
+    logger.info(f"Expired {sum(r['subscriptions'] for r in report.values())} subscriptions and "
+                f"{sum(r['households'] for r in report.values())} household memberships "
+                f"across {len(report)} mosques")
+    return report
@@ -0,0 +1,64 @@
+import csv
+import io
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+
+from apps.jamath.models import Household, Member, StaffMember, StaffRole
+from apps.shared.models import Mosque
+
+
+class CensusExportTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        role = StaffRole.objects.create(mosque=self.mosque, name='Secretary', permissions={'jamath': 'read'})
+        user = User.objects.create_user('secretary', password='x')
+        StaffMember.objects.create(mosque=self.mosque, user=user, role=role)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+        first = Household.objects.create(mosque=self.mosque, address='12 Market Street', phone_number='9876543210',
+                                         is_verified=True, custom_data={'ward': 'North'})
+        Member.objects.create(mosque=self.mosque, household=first, full_name='Abdul Rahman', is_head_of_family=True)
+        Member.objects.create(mosque=self.mosque, household=first, full_name='=HYPERLINK("x")',
+                              relationship_to_head='SON')
+        Household.objects.create(mosque=self.mosque, address='4 Mill Road', custom_data={'ward': 'South'})
+
+        other = Mosque.objects.create(name='Masjid-e-Noor')
+        Household.objects.create(mosque=other, membership_id='MN-001', address='Elsewhere')
+
+    def _csv(self, query=''):
+        response = self.client.get(f'/api/jamath/households/export/{query}')
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        return list(csv.reader(io.StringIO(content)))
+
+    def test_member_rows(self):
+        rows = self._csv()
+        self.assertEqual(rows[0][:3], ['Membership ID', 'Phone', 'Address'])
+        # Two members of the first household, the empty household once, nothing from the other mosque
+        self.assertEqual([r[2] for r in rows[1:]], ['12 Market Street', '12 Market Street', '4 Mill Road'])
+        self.assertEqual(rows[1][1], '+919876543210')
+        # Formula-looking names are escaped
+        self.assertEqual(rows[2][6], '\'=HYPERLINK("x")')
+
+    def test_columns_and_filters(self):
+        rows = self._csv('?rows=households&columns=address,member_count,custom.ward&is_verified=false')
+        self.assertEqual(rows, [['Address', 'Members', 'ward'], ['4 Mill Road', '0', 'South']])
+
+        rows = self._csv('?rows=households&columns=address&custom.ward=North')
+        self.assertEqual(rows, [['Address'], ['12 Market Street']])
+
+    def test_unknown_column(self):
+        response = self.client.get('/api/jamath/households/export/?columns=password')
+        self.assertEqual(response.status_code, 400)
+
+    def test_xlsx(self):
+        response = self.client.get('/api/jamath/households/export/?type=xlsx&columns=membership_id,full_name')
+        self.assertEqual(response.status_code, 200)
+        workbook = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True)
+        rows = list(workbook.active.iter_rows(values_only=True))
+        self.assertEqual(rows[0], ('Membership ID', 'Name'))
+        self.assertEqual(len(rows), 4)
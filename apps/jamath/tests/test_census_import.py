@@ -0,0 +1,98 @@
+import csv
+import os
+import tempfile
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from apps.jamath.census_import import import_dir, run_import
+from apps.jamath.models import ActivityLog, CensusImport, Household, Member
+from apps.shared.models import Mosque
+
+ROWS = [
+    ['Family', 'Membership ID', 'Name', 'Relation', 'Phone', 'Address', 'Date of Birth', 'Ward'],
+    ['F1', '', 'Abdul Rahman', 'Self', '9876543210', '12 Market Street', '12/03/1970', 'North'],
+    ['F1', '', 'Ayesha', 'Spouse', '', '', '1975-06-01', ''],
+    ['F2', 'JM-050', 'Yusuf Khan', 'Self', '9876500000', '4 Mill Road', '', 'South'],
+    ['F3', '', 'Bilal', 'Self', '98765 43210', '7 Lake View', '', ''],   # phone already used by F1
+    ['F3', '', 'Sana', 'Daughter', '', '', '', ''],
+    ['F4', '', 'Imran', 'Cousin', '', '9 Hill Road', '', ''],            # unknown relationship
+    ['F5', '', 'Zubair', 'Self', '', '3 Fort Lane', 'yesterday', ''],    # bad date
+    ['F6', '', 'Hamid', 'Self', '', '5 Bay Road', '', ''],
+]
+
+
+@override_settings(CENSUS_IMPORT_DIR=tempfile.mkdtemp())
+class CensusImportTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        Household.objects.create(mosque=self.mosque, membership_id='JM-001', address='1 Station Road')
+
+        self.census_import = self._upload(ROWS)
+
+    def _upload(self, rows):
+        census_import = CensusImport.objects.create(mosque=self.mosque, source_name='census.csv')
+        root = import_dir(census_import)
+        os.makedirs(root)
+        with open(os.path.join(root, 'source.csv'), 'w', newline='') as f:
+            csv.writer(f).writerows(rows)
+        census_import.source_path = os.path.relpath(os.path.join(root, 'source.csv'), settings.CENSUS_IMPORT_DIR)
+        census_import.save()
+        return census_import
+
+    def test_imports_valid_rows_and_reports_rejected_ones(self):
+        run_import(self.census_import.id)
+
+        self.census_import.refresh_from_db()
+        self.assertEqual(self.census_import.status, CensusImport.Status.COMPLETED)
+        self.assertEqual(self.census_import.processed_rows, 8)
+        self.assertEqual(self.census_import.households_created, 3)
+        self.assertEqual(self.census_import.members_created, 4)
+        self.assertEqual(self.census_import.failed_rows, 4)
+
+        first = Household.objects.get(phone_number='+919876543210')
+        self.assertEqual(first.custom_data, {'ward': 'North'})
+        self.assertEqual(first.member_count, 2)
+        self.assertEqual(first.head_name, 'Abdul Rahman')
+        self.assertIn('ayesha', first.search_document)
+        self.assertEqual(Member.objects.get(full_name='Ayesha').search_name, 'ayesha')
+
+        # Generated IDs come from one reserved block after existing numbers;
+        # the explicit JM-050 moves the sequence past it for later sign-ups
+        ids = set(Household.objects.values_list('membership_id', flat=True))
+        self.assertEqual(ids, {'JM-001', 'JM-002', 'JM-003', 'JM-050'})
+        later = Household.objects.create(mosque=self.mosque, address='New')
+        self.assertEqual(later.membership_id, 'JM-051')
+
+        with open(os.path.join(settings.CENSUS_IMPORT_DIR, self.census_import.error_report_path)) as f:
+            report = list(csv.reader(f))
+        self.assertEqual(report[0][:3], ['row', 'error', 'Family'])
+        self.assertEqual([r[0] for r in report[1:]], ['5', '6', '7', '8'])
+        self.assertIn('already registered', report[1][1])
+        self.assertIn('already registered', report[2][1])
+
+        logs = ActivityLog.objects.filter(model_name='Household')
+        self.assertEqual(logs.count(), 1)
+        self.assertIn('Imported 3 households and 4 members', logs.get().details)
+
+    def test_started_import_is_not_run_again(self):
+        run_import(self.census_import.id)
+        run_import(self.census_import.id)
+        self.assertEqual(Household.objects.count(), 4)
+
+    def test_generated_ids_skip_explicit_ones(self):
+        census_import = self._upload([
+            ['Family', 'Membership ID', 'Name', 'Address'],
+            ['F1', 'JM-003', 'Yusuf Khan', '4 Mill Road'],
+            ['F2', '', 'Abdul Rahman', '12 Market Street'],
+            ['F3', '', 'Bilal', '7 Lake View'],
+            ['F4', '', 'Hamid', '5 Bay Road'],
+        ])
+        run_import(census_import.id)
+
+        census_import.refresh_from_db()
+        self.assertEqual(census_import.status, CensusImport.Status.COMPLETED)
+        self.assertEqual(census_import.households_created, 4)
+        self.assertEqual(set(Household.objects.values_list('membership_id', flat=True)),
+                         {'JM-001', 'JM-002', 'JM-003', 'JM-004', 'JM-005'})
+        self.assertEqual(Household.objects.create(mosque=self.mosque, address='New').membership_id, 'JM-006')
@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.jamath.models import Household, Member, StaffMember, StaffRole
+from apps.jamath.search import fold, search_households, search_members
+from apps.shared.models import Mosque
+
+
+class CensusSearchTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        self.yusuf = Household.objects.create(mosque=self.mosque, address='12 Bunder Road',
+                                              phone_number='9876543210')
+        Member.objects.create(mosque=self.mosque, household=self.yusuf, full_name='Mohammed Yousuf',
+                              is_head_of_family=True)
+        Member.objects.create(mosque=self.mosque, household=self.yusuf, full_name='Khadeeja Banu',
+                              relationship_to_head='SPOUSE')
+
+        self.ibrahim = Household.objects.create(mosque=self.mosque, address='4 Market Street')
+        Member.objects.create(mosque=self.mosque, household=self.ibrahim, full_name='Ibrahim Khalil',
+                              is_head_of_family=True)
+
+    def test_spelling_variants_fold_together(self):
+        self.assertEqual(fold('Yusuf'), fold('Yousuf'))
+        self.assertEqual(fold('Khadija'), fold('Khadeeja'))
+        self.assertEqual(fold('Fathima'), fold('Fatima'))
+
+    def test_document_follows_member_changes(self):
+        self.yusuf.refresh_from_db()
+        self.assertIn(fold('Khadeeja'), self.yusuf.search_document)
+
+        zainab = Member.objects.create(mosque=self.mosque, household=self.yusuf, full_name='Zainab')
+        self.yusuf.refresh_from_db()
+        self.assertIn('zainab', self.yusuf.search_document)
+
+        # Moving her updates both households
+        zainab.household = self.ibrahim
+        zainab.save()
+        self.yusuf.refresh_from_db()
+        self.ibrahim.refresh_from_db()
+        self.assertNotIn('zainab', self.yusuf.search_document)
+        self.assertIn('zainab', self.ibrahim.search_document)
+
+    def test_fuzzy_household_search(self):
+        self.assertEqual(list(search_households('Muhammad Yusuf')), [self.yusuf])
+        self.assertEqual(list(search_households('khadija')), [self.yusuf])
+        self.assertEqual(list(search_households('ibraheem')), [self.ibrahim])
+        self.assertEqual(list(search_households('9876543210')), [self.yusuf])
+        self.assertEqual(list(search_households(self.ibrahim.membership_id)), [self.ibrahim])
+
+    def test_member_search_by_name_and_phone(self):
+        self.assertEqual([m.full_name for m in search_members('yusuf')], ['Mohammed Yousuf'])
+        self.assertEqual(len(search_members('3210')), 2)
+
+    def test_household_list_search(self):
+        role = StaffRole.objects.create(mosque=self.mosque, name='Secretary', permissions={'jamath': 'admin'})
+        user = User.objects.create_user('secretary', password='x')
+        StaffMember.objects.create(mosque=self.mosque, user=user, role=role)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.get('/api/jamath/households/', {'search': 'Kalil'})
+        self.assertEqual([h['id'] for h in response.json()], [self.ibrahim.id])
+
+        # Pages keep the relevance order: the best match first, not by membership ID
+        Member.objects.create(mosque=self.mosque, household=self.yusuf, full_name='Khalid Yousuf')
+        expected = [h.id for h in search_households('Khalil')]
+        self.assertEqual(expected, [self.ibrahim.id, self.yusuf.id])
+        response = client.get('/api/jamath/households/', {'search': 'Khalil', 'page_size': 1})
+        page = response.json()
+        self.assertEqual([h['id'] for h in page['results']], expected[:1])
+        response = client.get(page['next'])
+        self.assertEqual([h['id'] for h in response.json()['results']], expected[1:])
+
+        response = client.get('/api/jamath/households/', {'search': 'Khalil', 'page_size': 1, 'cursor': 'WyJ4IiwxXQ=='})
+        self.assertEqual(response.status_code, 404)
+
@@ -0,0 +1,62 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.jamath.census_stats import compute_census_stats, get_census_stats
+from apps.jamath.models import CensusSnapshot, Household, Member, StaffMember, StaffRole
+from apps.shared.models import Mosque
+
+
+class CensusStatsTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        first = Household.objects.create(mosque=self.mosque, address='1 Market Street',
+                                         economic_status='ZAKAT_ELIGIBLE', is_verified=True)
+        Member.objects.create(mosque=self.mosque, household=first, full_name='Abdul', is_head_of_family=True,
+                              dob=date(1950, 1, 1), marital_status='WIDOWED', is_employed=True)
+        Member.objects.create(mosque=self.mosque, household=first, full_name='Sana', gender='FEMALE',
+                              dob=date(2015, 1, 1))
+        Member.objects.create(mosque=self.mosque, household=first, full_name='Late Karim', is_alive=False)
+        Household.objects.create(mosque=self.mosque, address='2 Mill Road', housing_status='RENTED')
+
+        other = Mosque.objects.create(name='Masjid-e-Noor')
+        household = Household.objects.create(mosque=other, membership_id='MN-001', address='Elsewhere')
+        Member.objects.create(mosque=other, household=household, full_name='Yusuf')
+
+    def test_counts_in_one_query(self):
+        with self.assertNumQueries(1):
+            stats = compute_census_stats(self.mosque.id, today=date(2026, 6, 1))
+
+        self.assertEqual(stats['households'], {
+            'total_households': 2, 'zakat_eligible': 1, 'sahib_e_nisab': 1, 'verified': 1, 'unverified': 1,
+            'own_house': 1, 'rented': 1, 'family_property': 0,
+        })
+        members = stats['members']
+        self.assertEqual((members['total_members'], members['male'], members['female']), (2, 1, 1))
+        self.assertEqual((members['children_under_18'], members['adults_18_60'], members['seniors_above_60']),
+                         (1, 0, 1))
+        self.assertEqual((members['employed'], members['widowed'], members['single']), (1, 1, 1))
+
+    def test_snapshot_is_reused_until_a_change(self):
+        get_census_stats(self.mosque.id)
+        with self.assertNumQueries(1):
+            stats = get_census_stats(self.mosque.id)
+        self.assertEqual(stats['members']['total_members'], 2)
+
+        household = Household.objects.filter(mosque=self.mosque).first()
+        Member.objects.create(mosque=self.mosque, household=household, full_name='Imran')
+        self.assertTrue(CensusSnapshot.objects.get(mosque=self.mosque).is_stale)
+        self.assertEqual(get_census_stats(self.mosque.id)['members']['total_members'], 3)
+
+    def test_endpoint_is_scoped_to_the_staff_mosque(self):
+        role = StaffRole.objects.create(mosque=self.mosque, name='Secretary', permissions={'jamath': 'read'})
+        user = User.objects.create_user('secretary', password='x')
+        StaffMember.objects.create(mosque=self.mosque, user=user, role=role)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.get('/api/jamath/census-stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['households']['total_households'], 2)
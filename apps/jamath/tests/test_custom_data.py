@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.jamath.custom_data import _index_valid, build_index, custom_data_filter, index_name, sync_index
+from apps.jamath.models import CustomDataIndex, Household, Member, StaffMember, StaffRole
+from apps.shared.models import Mosque
+
+
+class CustomDataFilterTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        role = StaffRole.objects.create(mosque=self.mosque, name='Secretary', permissions={'jamath': 'read'})
+        user = User.objects.create_user('secretary', password='x')
+        StaffMember.objects.create(mosque=self.mosque, user=user, role=role)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+        self.rampur = Household.objects.create(mosque=self.mosque, address='1 Rampur',
+                                               custom_data={'village': 'Rampur', 'income': 4000, 'widow': True})
+        self.sitapur = Household.objects.create(mosque=self.mosque, address='2 Sitapur',
+                                                custom_data={'village': 'Sitapur', 'income': '9000'})
+        Member.objects.create(mosque=self.mosque, household=self.rampur, full_name='Ayesha',
+                              custom_data={'blood_group': 'O-'})
+        Member.objects.create(mosque=self.mosque, household=self.sitapur, full_name='Bilal',
+                              custom_data={'blood_group': 'B+'})
+
+        other = Mosque.objects.create(name='Masjid-e-Noor')
+        Household.objects.create(mosque=other, membership_id='MN-001', custom_data={'village': 'Rampur'})
+
+    def _addresses(self, query):
+        response = self.client.get(f'/api/jamath/households/{query}')
+        self.assertEqual(response.status_code, 200, response.data)
+        return sorted(h['address'] for h in response.data)
+
+    def test_households(self):
+        self.assertEqual(self._addresses('?custom.village=Rampur'), ['1 Rampur'])
+        self.assertEqual(self._addresses('?custom.village=Rampur&custom.widow=true'), ['1 Rampur'])
+        self.assertEqual(self._addresses('?custom.village__in=Rampur,Sitapur'), ['1 Rampur', '2 Sitapur'])
+        self.assertEqual(self._addresses('?custom.widow__exists=false'), ['2 Sitapur'])
+        # Numbers match whether stored as JSON numbers or strings
+        self.assertEqual(self._addresses('?custom.income=4000'), ['1 Rampur'])
+        self.assertEqual(self._addresses('?custom.income=9000'), ['2 Sitapur'])
+
+    def test_members(self):
+        response = self.client.get('/api/jamath/members/?custom.blood_group=O-')
+        self.assertEqual([m['full_name'] for m in response.data], ['Ayesha'])
+
+    def test_invalid_filter(self):
+        self.assertEqual(self.client.get('/api/jamath/households/?custom.village__like=R').status_code, 400)
+        self.assertEqual(self.client.get('/api/jamath/households/?custom.a__b=R').status_code, 400)
+
+    def test_single_valued_keys_share_one_containment(self):
+        query = str(Household.objects.filter(
+            custom_data_filter({'custom.village': 'Rampur', 'custom.blood_group': 'O-'})).query)
+        self.assertEqual(query.count('@>'), 1)
+
+    def test_expression_index(self):
+        index = CustomDataIndex.objects.create(mosque=self.mosque, key='village')
+        with connection.cursor() as cursor:
+            # Postgres won't index a table with deferred FK checks pending in the test transaction
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        build_index(index)
+        self.assertEqual(index.status, CustomDataIndex.Status.READY)
+        self.assertEqual(CustomDataIndex.ready_keys(self.mosque.id, CustomDataIndex.Target.HOUSEHOLD), {'village'})
+        self.assertEqual(self._addresses('?custom.village=Rampur'), ['1 Rampur'])
+
+        households = Household.objects.filter(
+            custom_data_filter({'custom.village': 'Rampur'}, indexed_keys={'village'}), mosque=self.mosque)
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        self.assertIn(index_name(self.mosque.id, 'HOUSEHOLD', 'village'), households.explain())
+
+        index.delete()
+        self.assertEqual(CustomDataIndex.ready_keys(self.mosque.id, CustomDataIndex.Target.HOUSEHOLD), set())
+        sync_index(self.mosque.id, 'HOUSEHOLD', 'village')
+        self.assertIsNone(_index_valid(index_name(self.mosque.id, 'HOUSEHOLD', 'village')))
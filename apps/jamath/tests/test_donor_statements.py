@@ -0,0 +1,118 @@
+import os
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.jamath.donor_statements import batch_dir, collect_statements, part_filename, run_batch
+from apps.jamath.models import (
+    DonorStatementBatch, Household, JournalEntry, JournalItem, Ledger, Member, StaffMember, StaffRole
+)
+from apps.shared.models import Mosque
+
+
+@override_settings(DONOR_STATEMENT_DIR=tempfile.mkdtemp(), DONOR_STATEMENT_WORKERS=1)
+class DonorStatementBatchTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        household = Household.objects.create(mosque=self.mosque, membership_id='JM-001', address='1 Station Road')
+        cash = Ledger.objects.create(mosque=self.mosque, code='1001', name='Cash', account_type='ASSET')
+        income = Ledger.objects.create(mosque=self.mosque, code='4001', name='Donations', account_type='INCOME')
+
+        for i, name in enumerate(['Ahmed', 'Bilal']):
+            donor = Member.objects.create(mosque=self.mosque, household=household, full_name=name)
+            for month in (5, 9):
+                entry = JournalEntry.objects.create(
+                    mosque=self.mosque, voucher_number=f'RCP-{i}-{month}', voucher_type='RECEIPT',
+                    date=date(2024, month, 1), narration='Donation', donor=donor,
+                )
+                JournalItem.objects.create(mosque=self.mosque, journal_entry=entry, ledger=cash, debit_amount=Decimal('250'))
+                JournalItem.objects.create(mosque=self.mosque, journal_entry=entry, ledger=income, credit_amount=Decimal('250'))
+
+        self.batch = DonorStatementBatch.objects.create(mosque=self.mosque, financial_year=2024)
+
+    def test_collect_statements_aggregates_per_donor(self):
+        statements = collect_statements(self.batch)
+        self.assertEqual(len(statements), 2)
+        self.assertEqual([len(s['receipts']) for s in statements], [2, 2])
+        self.assertEqual(statements[0]['total'], Decimal('500'))
+
+    def test_resume_skips_rendered_parts(self):
+        first = collect_statements(self.batch)[0]
+        parts_dir = os.path.join(batch_dir(self.batch), 'parts')
+        os.makedirs(parts_dir)
+        with open(os.path.join(parts_dir, part_filename(first)), 'wb') as fh:
+            fh.write(b'already rendered')
+
+        run_batch(self.batch.id)
+
+        self.batch.refresh_from_db()
+        self.assertEqual(self.batch.status, DonorStatementBatch.Status.COMPLETED)
+        self.assertEqual(self.batch.processed_donors, 2)
+
+        with zipfile.ZipFile(os.path.join(settings.DONOR_STATEMENT_DIR, self.batch.archive_path)) as zf:
+            self.assertEqual(len(zf.namelist()), 2)
+            self.assertEqual(zf.read(part_filename(first)), b'already rendered')
+
+    def test_archive_leaves_out_parts_of_dropped_donors(self):
+        parts_dir = os.path.join(batch_dir(self.batch), 'parts')
+        os.makedirs(parts_dir)
+        orphan = 'DS-2024-25-0099_Former_Donor.pdf'
+        with open(os.path.join(parts_dir, orphan), 'wb') as fh:
+            fh.write(b'left over')
+
+        run_batch(self.batch.id)
+
+        self.batch.refresh_from_db()
+        with zipfile.ZipFile(os.path.join(settings.DONOR_STATEMENT_DIR, self.batch.archive_path)) as zf:
+            self.assertEqual(sorted(zf.namelist()),
+                             sorted(part_filename(payload) for payload in collect_statements(self.batch)))
+
+    def test_resume_only_failed_or_stalled_batches(self):
+        role = StaffRole.objects.create(mosque=self.mosque, name='Treasurer', permissions={'finance': 'admin'})
+        user = User.objects.create_user('treasurer', password='x')
+        StaffMember.objects.create(mosque=self.mosque, user=user, role=role)
+        client = APIClient()
+        client.force_authenticate(user)
+        url = f'/api/ledger/donor-statements/{self.batch.id}/resume/'
+        Status = DonorStatementBatch.Status
+
+        def set_state(status, age=timedelta()):
+            DonorStatementBatch.objects.filter(id=self.batch.id).update(status=status,
+                                                                         updated_at=timezone.now() - age)
+
+        for status in (Status.PENDING, Status.RUNNING):
+            set_state(status)
+            self.assertEqual(client.post(url).status_code, 409)
+
+        # Queued but never picked up (its task message was lost)
+        set_state(Status.PENDING, timedelta(hours=1))
+        self.assertEqual(client.post(url).status_code, 202)
+
+        set_state(Status.RUNNING, timedelta(hours=1))
+        self.assertEqual(client.post(url).status_code, 202)
+        self.batch.refresh_from_db()
+        self.assertEqual(self.batch.status, Status.PENDING)
+        # A second resume of the same batch doesn't queue another worker
+        self.assertEqual(client.post(url).status_code, 409)
+
+        set_state(Status.FAILED)
+        self.assertEqual(client.post(url).status_code, 202)
+
+    def test_financial_year_is_validated(self):
+        role = StaffRole.objects.create(mosque=self.mosque, name='Treasurer', permissions={'finance': 'admin'})
+        user = User.objects.create_user('treasurer', password='x')
+        StaffMember.objects.create(mosque=self.mosque, user=user, role=role)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        for year in (0, 99999):
+            response = client.post('/api/ledger/donor-statements/', {'financial_year': year}, format='json')
+            self.assertEqual(response.status_code, 400, year)
+            self.assertIn('financial_year', response.data)
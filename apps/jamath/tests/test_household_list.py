@@ -0,0 +1,64 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.jamath.models import Household, Member, StaffMember, StaffRole, Subscription
+from apps.shared.models import Mosque
+
+
+class HouseholdListQueryTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        role = StaffRole.objects.create(mosque=self.mosque, name='Secretary', permissions={'jamath': 'admin'})
+        self.user = User.objects.create_user('secretary', password='x')
+        StaffMember.objects.create(mosque=self.mosque, user=self.user, role=role)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _add_households(self, count):
+        today = timezone.now().date()
+        for i in range(count):
+            household = Household.objects.create(mosque=self.mosque, address=f'{i} Mohalla', created_by=self.user)
+            Member.objects.create(mosque=self.mosque, household=household, full_name=f'Head {i}',
+                                  is_head_of_family=True, created_by=self.user)
+            Member.objects.create(mosque=self.mosque, household=household, full_name=f'Child {i}',
+                                  relationship_to_head='SON', created_by=self.user)
+            if i % 2 == 0:
+                Subscription.objects.create(mosque=self.mosque, household=household, status='ACTIVE',
+                                            start_date=today - timedelta(days=30), end_date=today + timedelta(days=30),
+                                            amount_paid=Decimal('1200'), minimum_required=Decimal('1200'))
+
+    def _list(self, expected_count):
+        # Households plus the prefetched members, whatever the number of rows
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/jamath/households/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), expected_count)
+        return response.json()
+
+    def test_query_count_is_independent_of_page_size(self):
+        self._add_households(2)
+        self.client.get('/api/jamath/households/')  # warm the permission cache
+        self._list(2)
+
+        self._add_households(8)
+        self._list(10)
+
+    def test_summary_fields(self):
+        self._add_households(2)
+        self.client.get('/api/jamath/households/')
+        data = self._list(2)
+
+        first = next(h for h in data if h['head_name'] == 'Head 0')
+        self.assertEqual(first['member_count'], 2)
+        self.assertTrue(first['is_membership_active'])
+        self.assertEqual(first['created_by_name'], 'secretary')
+        self.assertEqual([m['full_name'] for m in first['members']], ['Head 0', 'Child 0'])
+
+        second = next(h for h in data if h['head_name'] == 'Head 1')
+        self.assertFalse(second['is_membership_active'])
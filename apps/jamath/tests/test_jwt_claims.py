@@ -0,0 +1,111 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.jamath.models import Household, Ledger, StaffMember, StaffRole
+from apps.shared.models import Mosque
+from apps.shared.tokens import revoke_tokens
+
+
+class TenantClaimsTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        self.household = Household.objects.create(
+            mosque=self.mosque, membership_id='JM-001', phone_number='9876543210', address='Old City'
+        )
+        self.client = APIClient()
+
+    def _portal_login(self):
+        response = self.client.post('/api/portal/login/', {
+            'identifier': 'JM-001', 'password': '123456'
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['access']
+
+    def test_portal_request_needs_no_identity_queries(self):
+        access = self._portal_login()
+        claims = AccessToken(access)
+        self.assertEqual(claims['household_id'], self.household.id)
+        self.assertEqual(claims['mosque_id'], self.mosque.id)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/portal/announcements/')
+        self.assertEqual(response.status_code, 200)
+        identity_tables = ('auth_user', 'jamath_household', 'jamath_staffmember', 'shared_usertokenversion')
+        self.assertFalse([q for q in ctx.captured_queries if any(t in q['sql'] for t in identity_tables)])
+
+    def test_revoked_token_is_rejected(self):
+        access = self._portal_login()
+        revoke_tokens(User.objects.get(username=f'member_{self.household.id}').pk)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(self.client.get('/api/portal/announcements/').status_code, 401)
+
+    def test_staff_claims_fall_back_when_role_changes(self):
+        role = StaffRole.objects.create(mosque=self.mosque, name='Treasurer', permissions={'finance': 'admin'})
+        user = User.objects.create_user('treasurer', password='secret-pass')
+        StaffMember.objects.create(mosque=self.mosque, user=user, role=role)
+        Ledger.objects.create(mosque=self.mosque, code='1001', name='Cash', account_type='ASSET')
+
+        response = self.client.post('/api/token/', {'username': 'treasurer', 'password': 'secret-pass'}, format='json')
+        access = response.json()['access']
+        self.assertEqual(AccessToken(access)['staff']['permissions'], {'finance': 'admin'})
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get('/api/ledger/accounts/').status_code, 200)
+        self.assertFalse([q for q in ctx.captured_queries if 'jamath_staffmember' in q['sql']])
+
+        # The token's snapshot is stale once the role changes
+        role.permissions = {'finance': 'none'}
+        role.save()
+        self.assertEqual(self.client.get('/api/ledger/accounts/').status_code, 403)
+
+    def test_deactivated_staff_is_rejected(self):
+        user = User.objects.create_user('treasurer', password='secret-pass')
+        tokens = self.client.post('/api/token/', {'username': 'treasurer', 'password': 'secret-pass'},
+                                  format='json').json()
+
+        user.is_active = False
+        user.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self.client.get('/api/ledger/accounts/').status_code, 401)
+        self.client.credentials()
+        response = self.client.post('/api/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_deleted_household_is_rejected(self):
+        access = self._portal_login()
+        self.household.delete()
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(self.client.get('/api/portal/announcements/').status_code, 401)
+
+    def test_portal_account_edits_are_stored(self):
+        access = self._portal_login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        response = self.client.put('/api/user/profile/', {'first_name': 'Abdul', 'last_name': 'Rahman'},
+                                   format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post('/api/user/change-email/', {'new_email': 'abdul@example.com',
+                                                                'password': '123456'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        user = User.objects.get(username=f'member_{self.household.id}')
+        self.assertEqual((user.first_name, user.last_name, user.email), ('Abdul', 'Rahman', 'abdul@example.com'))
+
+    def test_portal_user_matches_its_row(self):
+        from apps.shared.authentication import PortalUser
+
+        access = self._portal_login()
+        portal_user = PortalUser(AccessToken(access))
+        user = User.objects.get(username=f'member_{self.household.id}')
+        self.assertEqual(portal_user, user)
+        self.assertEqual(portal_user.pk, user.pk)
+        with self.assertRaises(AttributeError):
+            portal_user.first_name = 'Changed'
@@ -0,0 +1,23 @@
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+
+@override_settings(PORTAL_PBKDF2_ITERATIONS=1000)
+class EmailBackendTests(TestCase):
+    def test_login_by_username_or_email_is_case_insensitive(self):
+        user = User.objects.create_user('Imam.Sahab', email='Imam@Example.com', password='secret-pass')
+        self.assertEqual(authenticate(username='imam.sahab', password='secret-pass'), user)
+        self.assertEqual(authenticate(username='IMAM@example.COM', password='secret-pass'), user)
+        self.assertIsNone(authenticate(username='imam@example.com', password='wrong'))
+        self.assertIsNone(authenticate(username='nobody@example.com', password='secret-pass'))
+
+    def test_portal_password_kept_on_portal_profile(self):
+        User.objects.create_user('member_7', password='123456')
+        self.assertIsNotNone(authenticate(username='member_7', password='123456'))
+
+        # First login moves the hash onto the portal profile, later logins leave it alone
+        encoded = User.objects.get(username='member_7').password
+        self.assertTrue(encoded.startswith('pbkdf2_sha256_portal$1000$'))
+        self.assertIsNotNone(authenticate(username='member_7', password='123456'))
+        self.assertEqual(User.objects.get(username='member_7').password, encoded)
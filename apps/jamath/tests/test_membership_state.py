@@ -0,0 +1,77 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.jamath.membership_state import sweep_expired_memberships
+from apps.jamath.models import Household, MembershipConfig, StaffMember, StaffRole, Subscription
+from apps.jamath.services import MembershipService
+from apps.shared.models import Mosque
+
+
+class MembershipStateTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        MembershipConfig.objects.create(mosque=self.mosque, minimum_fee=Decimal('1200'))
+        self.household = Household.objects.create(mosque=self.mosque, membership_id='JM-001')
+        self.today = timezone.now().date()
+
+    def _subscribe(self, household, status, days_left):
+        return Subscription.objects.create(
+            mosque=self.mosque, household=household, status=status,
+            start_date=self.today - timedelta(days=30), end_date=self.today + timedelta(days=days_left),
+            amount_paid=Decimal('0'), minimum_required=Decimal('1200'),
+        )
+
+    def _state(self, household):
+        household.refresh_from_db()
+        return household.membership_status, household.membership_valid_until
+
+    def test_payment_updates_state(self):
+        self.assertEqual(self._state(self.household), ('EXPIRED', None))
+
+        MembershipService.process_payment(self.household, Decimal('500'))
+        status, valid_until = self._state(self.household)
+        self.assertEqual(status, 'PENDING')
+        self.assertFalse(self.household.is_membership_active)
+
+        MembershipService.process_payment(self.household, Decimal('700'))
+        self.assertEqual(self._state(self.household), ('ACTIVE', valid_until))
+        self.assertTrue(self.household.is_membership_active)
+        self.assertEqual(MembershipService.get_membership_status(self.household)['status'], 'ACTIVE')
+
+        Subscription.objects.filter(household=self.household).get().delete()
+        self.assertEqual(self._state(self.household), ('EXPIRED', None))
+
+    def test_lapsed_memberships_expire(self):
+        lapsing = Household.objects.create(mosque=self.mosque, membership_id='JM-002')
+        self._subscribe(lapsing, 'ACTIVE', 0)
+        renewed = Household.objects.create(mosque=self.mosque, membership_id='JM-003')
+        self._subscribe(renewed, 'ACTIVE', 0)
+        self._subscribe(renewed, 'PENDING', 365)
+
+        self.assertEqual(sweep_expired_memberships(), {})
+        self.assertEqual(Household.objects.renewals_due().count(), 1)
+
+        tomorrow = self.today + timedelta(days=1)
+        self.assertEqual(sweep_expired_memberships(tomorrow)[self.mosque.id]['households'], 2)
+        self.assertEqual(self._state(lapsing), ('EXPIRED', None))
+        self.assertEqual(self._state(renewed), ('PENDING', self.today + timedelta(days=365)))
+
+    def test_renewal_list(self):
+        self._subscribe(self.household, 'ACTIVE', 30)
+        due = Household.objects.create(mosque=self.mosque, membership_id='JM-002')
+
+        role = StaffRole.objects.create(mosque=self.mosque, name='Secretary', permissions={'jamath': 'read'})
+        user = User.objects.create_user('secretary', password='x')
+        StaffMember.objects.create(mosque=self.mosque, user=user, role=role)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.get('/api/jamath/households/', {'membership': 'due'})
+        self.assertEqual([h['id'] for h in response.data], [due.id])
+        response = client.get('/api/jamath/households/', {'membership': 'active'})
+        self.assertEqual([(h['id'], h['membership_status']) for h in response.data], [(self.household.id, 'ACTIVE')])
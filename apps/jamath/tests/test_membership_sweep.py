@@ -0,0 +1,53 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.jamath.membership_state import SWEEP_LOCK_KEY, sweep_expired_memberships
+from apps.jamath.models import ActivityLog, Household, Subscription
+from apps.shared.models import Mosque
+
+
+class MembershipSweepTests(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        self.other = Mosque.objects.create(name='Masjid-e-Noor')
+        for i, (mosque, status, days_left) in enumerate(((self.mosque, 'ACTIVE', -1), (self.mosque, 'PENDING', -10),
+                                                         (self.mosque, 'ACTIVE', 30), (self.other, 'PENDING', -1))):
+            household = Household.objects.create(mosque=mosque, membership_id=f'HH-{i}')
+            Subscription.objects.create(
+                mosque=mosque, household=household, status=status,
+                start_date=self.today - timedelta(days=365), end_date=self.today + timedelta(days=days_left),
+                amount_paid=Decimal('0'), minimum_required=Decimal('1200'),
+            )
+
+    def test_sweep_expires_ended_subscriptions(self):
+        report = sweep_expired_memberships()
+        self.assertEqual(report, {self.mosque.id: {'subscriptions': 2, 'households': 0},
+                                  self.other.id: {'subscriptions': 1, 'households': 0}})
+        self.assertEqual(Subscription.objects.filter(mosque=self.mosque, status='EXPIRED').count(), 2)
+        self.assertEqual(Subscription.objects.get(end_date__gt=self.today).status, 'ACTIVE')
+        self.assertEqual(ActivityLog.objects.get(mosque=self.mosque).details,
+                         'Expired 2 subscription(s) and 0 household membership(s)')
+
+        self.assertEqual(sweep_expired_memberships(), {})
+
+    def test_locked_mosque_is_skipped(self):
+        other_session = connections.create_connection('default')
+        try:
+            with other_session.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_lock(%s, %s)', [SWEEP_LOCK_KEY, self.mosque.id])
+            report = sweep_expired_memberships()
+        finally:
+            other_session.close()
+        self.assertEqual(list(report), [self.other.id])
+        self.assertEqual(Subscription.objects.filter(mosque=self.mosque, status='EXPIRED').count(), 0)
+
+    def test_beat_schedule(self):
+        tasks = {entry['task'] for entry in settings.CELERY_BEAT_SCHEDULE.values()}
+        self.assertIn('apps.jamath.tasks.expire_memberships_task', tasks)
+        self.assertIn('apps.jamath.tasks.prune_change_log_task', tasks)
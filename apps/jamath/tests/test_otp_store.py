@@ -0,0 +1,73 @@
+import threading
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.jamath.models import Household
+from apps.shared.models import Mosque
+from apps.shared.otp import (
+    MAX_ATTEMPTS, IDENTIFIER_RATE_LIMIT, OTPError, OTPRateLimited, portal_otp_store, registration_otp_store
+)
+
+
+class OTPStoreTests(TestCase):
+    def test_code_is_burnt_after_too_many_wrong_guesses(self):
+        code = registration_otp_store.issue('imam@example.com')
+        wrong = '000000' if code != '000000' else '111111'
+        for _ in range(MAX_ATTEMPTS - 1):
+            with self.assertRaisesMessage(OTPError, 'Invalid OTP'):
+                registration_otp_store.verify('imam@example.com', wrong)
+        with self.assertRaisesMessage(OTPError, 'Too many incorrect attempts'):
+            registration_otp_store.verify('imam@example.com', wrong)
+        # Even the right code no longer works
+        with self.assertRaisesMessage(OTPError, 'OTP expired or not found'):
+            registration_otp_store.verify('imam@example.com', code)
+
+    def test_requests_are_rate_limited_per_identifier(self):
+        limit, _ = IDENTIFIER_RATE_LIMIT
+        for _ in range(limit):
+            portal_otp_store.check_rate_limit('9876543210', '10.0.0.1')
+        with self.assertRaises(OTPRateLimited):
+            portal_otp_store.check_rate_limit('9876543210', '10.0.0.2')
+        portal_otp_store.check_rate_limit('9123456789', '10.0.0.1')
+
+    def test_unregistered_numbers_are_rate_limited_too(self):
+        limit, _ = IDENTIFIER_RATE_LIMIT
+        client = APIClient()
+        for _ in range(limit):
+            response = client.post('/api/portal/request-otp/', {'phone_number': '9000000001'}, format='json')
+            self.assertEqual(response.status_code, 404)
+        response = client.post('/api/portal/request-otp/', {'phone_number': '9000000001'}, format='json')
+        self.assertEqual(response.status_code, 429)
+
+    def test_portal_verify_consumes_code(self):
+        mosque = Mosque.objects.create(name='Jamia Masjid')
+        household = Household.objects.create(mosque=mosque, membership_id='JM-001', phone_number='9876543210')
+        code = portal_otp_store.issue('+919876543210', code='482913', household_id=household.id)
+
+        client = APIClient()
+        response = client.post('/api/portal/verify-otp/', {'phone_number': '9876543210', 'otp': code}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['household_id'], household.id)
+
+        response = client.post('/api/portal/verify-otp/', {'phone_number': '9876543210', 'otp': code}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_concurrent_verifications_consume_once(self):
+        code = registration_otp_store.issue('imam@example.com', purpose_id=7)
+        start = threading.Barrier(8)
+        results = []
+
+        def verify():
+            start.wait()
+            try:
+                results.append(registration_otp_store.verify('imam@example.com', code))
+            except OTPError:
+                results.append(None)
+
+        threads = [threading.Thread(target=verify) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([r for r in results if r], [{'purpose_id': 7}])
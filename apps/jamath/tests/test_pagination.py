@@ -0,0 +1,91 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.jamath.models import Announcement, Household, StaffMember, StaffRole
+from apps.shared.models import Mosque
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        role = StaffRole.objects.create(mosque=self.mosque, name='Imam', permissions={'announcements': 'admin', 'jamath': 'read'})
+        user = User.objects.create_user('imam', password='x')
+        StaffMember.objects.create(mosque=self.mosque, user=user, role=role)
+
+        # Pairs share a published_at so the id tie-break is exercised
+        now = timezone.now()
+        for i in range(7):
+            Announcement.objects.create(mosque=self.mosque, title=f'Notice {i}', content='-',
+                                        published_at=now - timedelta(hours=i // 2))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def _walk(self, url):
+        titles, pages = [], 0
+        while url:
+            data = self.client.get(url).json()
+            titles += [a['title'] for a in data['results']]
+            url, pages = data['next'], pages + 1
+        return titles, pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        expected = list(Announcement.objects.order_by('-published_at', '-id').values_list('title', flat=True))
+        titles, pages = self._walk('/api/jamath/announcements/?page_size=3')
+        self.assertEqual(titles, expected)
+        self.assertEqual(pages, 3)
+
+    def test_legacy_clients_get_a_plain_list(self):
+        response = self.client.get('/api/jamath/announcements/')
+        self.assertEqual(len(response.json()), 7)
+
+        with override_settings(API_LEGACY_UNPAGINATED_LISTS=False):
+            data = self.client.get('/api/jamath/announcements/').json()
+        self.assertEqual(len(data['results']), 7)
+        self.assertIsNone(data['next'])
+
+    def test_count_is_opt_in_and_bad_cursors_are_rejected(self):
+        data = self.client.get('/api/jamath/announcements/?page_size=1000&count=true').json()
+        self.assertEqual(data['count'], 7)
+        self.assertNotIn('count', self.client.get('/api/jamath/announcements/?page_size=2').json())
+
+        response = self.client.get('/api/jamath/announcements/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_malformed_cursor_values_are_rejected(self):
+        Household.objects.create(mosque=self.mosque, membership_id='JM-001', address='Old City')
+
+        def cursor(values):
+            return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+        for url, values in (('/api/jamath/households/', ['JM-001', 'x']),
+                            ('/api/jamath/households/', ['JM-001', None]),
+                            ('/api/jamath/households/', [['JM-001'], 1]),
+                            ('/api/jamath/announcements/', ['yesterday', 1]),
+                            ('/api/jamath/announcements/', [timezone.now().isoformat(), {'id': 1}])):
+            response = self.client.get(url, {'cursor': cursor(values)})
+            self.assertEqual(response.status_code, 404, values)
+
+        valid = self.client.get('/api/jamath/households/', {'cursor': cursor(['JM-000', 0])})
+        self.assertEqual([h['membership_id'] for h in valid.json()['results']], ['JM-001'])
+
+    def test_null_ordering_values_are_paged(self):
+        households = [Household.objects.create(mosque=self.mosque, membership_id=membership_id)
+                      for membership_id in ('JM-001', 'JM-002', 'JM-003')]
+        # Imports and legacy rows can lack a membership ID
+        Household.objects.filter(id__in=[h.id for h in households[1:]]).update(membership_id=None)
+        expected = [households[0].id, households[1].id, households[2].id]
+
+        for ordering, ids in (('membership_id', expected), ('-membership_id', expected[::-1])):
+            seen, url, params = [], '/api/jamath/households/', {'page_size': 1, 'ordering': ordering}
+            while url:
+                data = self.client.get(url, params).json()
+                seen += [h['id'] for h in data['results']]
+                url, params = data['next'], None
+            self.assertEqual(seen, ids, ordering)
@@ -0,0 +1,79 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.jamath.models import ActivityLog, ChangeLogEntry, Household, JournalEntry, Member, StaffMember, StaffRole
+from apps.shared.models import Mosque
+
+
+class PendingMembersTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        role = StaffRole.objects.create(mosque=self.mosque, name='Admin', permissions={'users': 'admin'})
+        user = User.objects.create_user('admin', password='x', is_staff=True)
+        StaffMember.objects.create(mosque=self.mosque, user=user, role=role)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+        household = Household.objects.create(mosque=self.mosque, membership_id='JM-001')
+        self.pending = [Member.objects.create(mosque=self.mosque, household=household, full_name=f'Applicant {i}',
+                                              is_approved=False) for i in range(4)]
+        Member.objects.create(mosque=self.mosque, household=household, full_name='Approved', is_approved=True)
+
+        other = Mosque.objects.create(name='Masjid-e-Noor')
+        other_household = Household.objects.create(mosque=other, membership_id='MN-001')
+        self.outsider = Member.objects.create(mosque=other, household=other_household, full_name='Outsider',
+                                              is_approved=False)
+
+    def _post(self, **data):
+        return self.client.post('/api/admin/pending-members/', data, format='json')
+
+    def test_queue_is_scoped_and_paginated(self):
+        response = self.client.get('/api/admin/pending-members/')
+        self.assertEqual([m['id'] for m in response.data], [m.id for m in self.pending])
+
+        first = self.client.get('/api/admin/pending-members/', {'page_size': 3})
+        self.assertEqual(len(first.data['results']), 3)
+        second = self.client.get(first.data['next'])
+        self.assertEqual([m['id'] for m in second.data['results']], [self.pending[3].id])
+        self.assertIsNone(second.data['next'])
+
+    def test_batch_approve(self):
+        ids = [m.id for m in self.pending[:3]]
+        response = self._post(action='approve', member_ids=ids + [self.outsider.id])
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data, {'approved': 3, 'not_found': [self.outsider.id]})
+        self.assertEqual(Member.objects.filter(id__in=ids, is_approved=True).count(), 3)
+        self.outsider.refresh_from_db()
+        self.assertFalse(self.outsider.is_approved)
+
+        log = ActivityLog.objects.get()
+        self.assertEqual((log.mosque_id, log.action, log.module), (self.mosque.id, 'UPDATE', 'users'))
+        self.assertIn('Approved 3 member(s)', log.details)
+
+    def test_batch_reject(self):
+        ids = [m.id for m in self.pending[:2]]
+        entry = JournalEntry.objects.create(mosque=self.mosque, voucher_type='RECEIPT', date='2026-01-01',
+                                            narration='Fee', donor=self.pending[0])
+        response = self._post(action='reject', member_ids=ids)
+        self.assertEqual(response.data, {'rejected': 2, 'not_found': []})
+        self.assertFalse(Member.objects.filter(id__in=ids).exists())
+        self.assertEqual(ActivityLog.objects.get().action, 'DELETE')
+        self.assertEqual(set(ChangeLogEntry.objects.filter(model='member', is_deleted=True)
+                             .values_list('object_id', flat=True)), set(ids))
+        entry.refresh_from_db()
+        self.assertIsNone(entry.donor_id)
+
+    def test_reject_handles_every_relation_to_member(self):
+        # reject_members deletes without Django's cascade and clears these by hand
+        relations = {(f.related_model._meta.label, f.field.name, f.on_delete.__name__)
+                     for f in Member._meta.related_objects}
+        self.assertEqual(relations, {('jamath.JournalEntry', 'donor', 'SET_NULL')})
+        self.assertEqual(Member._meta.many_to_many, ())
+
+    def test_single_member_form(self):
+        response = self._post(action='approve', member_id=self.pending[0].id)
+        self.assertEqual(response.data['approved'], 1)
+        self.assertEqual(self._post(action='reject', member_id=self.outsider.id).status_code, 404)
+        self.assertTrue(Member.objects.filter(id=self.outsider.id).exists())
+        self.assertEqual(self._post(action='ban', member_ids=[self.pending[1].id]).status_code, 400)
@@ -0,0 +1,43 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.jamath.models import Household, Member
+from apps.shared.models import Mosque
+from apps.shared.phone import normalize_phone, phone_search_q
+
+
+@override_settings(PHONE_DEFAULT_COUNTRY_CODE='91')
+class PhoneNumberTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        self.household = Household.objects.create(mosque=self.mosque, address='1 Mohalla',
+                                                  phone_number='098765 43210')
+        Member.objects.create(mosque=self.mosque, household=self.household,
+                              full_name='Mohammed Yusuf', is_head_of_family=True)
+
+    def test_normalize_phone(self):
+        for raw in ('9876543210', '+91 98765-43210', '919876543210', '00919876543210', '(098765) 43210'):
+            self.assertEqual(normalize_phone(raw), '+919876543210', raw)
+        self.assertEqual(normalize_phone('+44 20 7946 0958'), '+442079460958')
+        self.assertIsNone(normalize_phone('JM-001'))
+        self.assertIsNone(normalize_phone(''))
+
+    def test_stored_in_e164_and_found_in_one_query(self):
+        self.household.refresh_from_db()
+        self.assertEqual(self.household.phone_number, '+919876543210')
+        with self.assertNumQueries(1):
+            self.assertEqual(Household.find_by_phone('98765 43210'), self.household)
+
+    def test_portal_login_with_national_number(self):
+        response = APIClient().post('/api/portal/login/', {
+            'identifier': '9876543210', 'password': '123456'
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['household_id'], self.household.id)
+
+    def test_staff_lookup_matches_prefix_and_last_digits(self):
+        for query in ('98765', '3210', '+9198765', '9876543210'):
+            matches = Household.objects.filter(phone_search_q('phone_number', query))
+            self.assertEqual(list(matches), [self.household], query)
+        self.assertIsNone(phone_search_q('phone_number', 'Yusuf'))
+        self.assertFalse(Household.objects.filter(phone_search_q('phone_number', '4321')).exists())
@@ -0,0 +1,47 @@
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.jamath.models import JournalEntry, JournalItem, Ledger, MembershipConfig
+
+
+@override_settings(RECEIPT_CACHE_DIR=tempfile.mkdtemp())
+class ReceiptPDFCacheTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('treasurer', password='x', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+        self.config = MembershipConfig.objects.create(organization_name='Jamia Masjid')
+        cash = Ledger.objects.create(code='1001', name='Cash', account_type='ASSET')
+        income = Ledger.objects.create(code='4001', name='Donations', account_type='INCOME')
+        self.entry = JournalEntry.objects.create(
+            voucher_number='RCP-T-001', voucher_type='RECEIPT', date=date(2025, 4, 1),
+            narration='Donation', donor_name_manual='Guest Donor',
+        )
+        JournalItem.objects.create(journal_entry=self.entry, ledger=cash, debit_amount=Decimal('500'))
+        JournalItem.objects.create(journal_entry=self.entry, ledger=income, credit_amount=Decimal('500'))
+        self.url = f'/api/ledger/receipt/{self.entry.id}/pdf/'
+
+    def test_conditional_get_returns_not_modified(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['Content-Type'], 'application/pdf')
+
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], first['ETag'])
+
+    def test_config_change_invalidates_etag(self):
+        first = self.client.get(self.url)
+
+        self.config.registration_number_80g = 'AAATJ1234F/80G'
+        self.config.save()
+
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
@@ -0,0 +1,37 @@
+from datetime import date
+from decimal import Decimal
+
+import pypdfium2 as pdfium
+from django.test import SimpleTestCase
+from PIL import ImageChops
+
+from apps.jamath.receipt_canvas import render_receipt_pdf
+from apps.jamath.receipt_generator import generate_receipt_pdf
+
+
+def _pages(pdf_bytes):
+    return [page.render(scale=2).to_pil().convert('RGB') for page in pdfium.PdfDocument(pdf_bytes)]
+
+
+class ReceiptCanvasRendererTests(SimpleTestCase):
+    def assertSameRender(self, **receipt):
+        expected = _pages(generate_receipt_pdf(**receipt))
+        actual = _pages(render_receipt_pdf(**receipt))
+        self.assertEqual(len(actual), len(expected))
+        for a, b in zip(expected, actual):
+            self.assertIsNone(ImageChops.difference(a, b).getbbox())
+
+    def test_matches_platypus_output(self):
+        self.assertSameRender(
+            receipt_number='RCP-20250401-0042', payment_date=date(2025, 4, 1),
+            donor_name='Mohammed Abdul Rahman', donor_address='12 Station Road, Hyderabad',
+            donor_pan='ABCDE1234F', amount=Decimal('12345.50'), membership_portion=Decimal('2000'),
+            donation_portion=Decimal('10345.50'), payment_mode='UPI', org_name='Jamia Masjid Trust',
+            org_address='Old City, Hyderabad', org_pan='AAATJ1234F', reg_80g='AAATJ1234FF20214',
+        )
+
+    def test_long_value_falls_back_to_platypus(self):
+        self.assertSameRender(
+            receipt_number='RCP-20250401-0043', payment_date=date(2025, 4, 1), donor_name='Guest',
+            amount=Decimal('500'), payment_mode='Cheque ' * 30,
+        )
@@ -0,0 +1,81 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.jamath.models import (
+    Household, JournalEntry, JournalItem, Ledger, Member, StaffMember, StaffRole, Supplier
+)
+from apps.shared.models import Mosque
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        role = StaffRole.objects.create(mosque=self.mosque, name='Secretary',
+                                        permissions={'jamath': 'admin', 'finance': 'admin'})
+        self.user = User.objects.create_user('secretary', password='x')
+        StaffMember.objects.create(mosque=self.mosque, user=self.user, role=role)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        for i in range(3):
+            household = Household.objects.create(mosque=self.mosque, address=f'{i} Mohalla', created_by=self.user)
+            Member.objects.create(mosque=self.mosque, household=household, full_name=f'Head {i}',
+                                  is_head_of_family=True, created_by=self.user)
+            Member.objects.create(mosque=self.mosque, household=household, full_name=f'Child {i}',
+                                  relationship_to_head='SON', created_by=self.user)
+        self.client.get('/api/jamath/households/')  # warm the permission cache
+
+    def test_household_list_with_only_summary_fields(self):
+        # One query: no member prefetch, no created_by join, one annotation
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/jamath/households/?fields=id,membership_id,head_name')
+        rows = response.json()
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(set(rows[0]), {'id', 'membership_id', 'head_name'})
+        self.assertEqual(sorted(r['head_name'] for r in rows), ['Head 0', 'Head 1', 'Head 2'])
+
+    def test_nested_fields(self):
+        response = self.client.get('/api/jamath/households/?fields=id,members.full_name')
+        row = response.json()[0]
+        self.assertEqual(set(row), {'id', 'members'})
+        self.assertEqual([set(m) for m in row['members']], [{'full_name'}, {'full_name'}])
+
+    def test_default_representation_unchanged(self):
+        row = self.client.get('/api/jamath/households/').json()[0]
+        self.assertIn('members', row)
+        self.assertIn('created_by_name', row['members'][0])
+        self.assertEqual(row['member_count'], 2)
+
+    def test_expand_member_household(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/jamath/members/?fields=id,household&expand=household')
+        member = response.json()[0]
+        self.assertEqual(set(member), {'id', 'household'})
+        self.assertEqual(set(member['household']),
+                         {'id', 'membership_id', 'address', 'phone_number', 'economic_status', 'is_verified'})
+
+        default = self.client.get('/api/jamath/members/').json()[0]
+        self.assertIsInstance(default['household'], int)
+
+    def test_voucher_list_queries_do_not_grow_with_rows(self):
+        cash = Ledger.objects.create(mosque=self.mosque, code='1001', name='Cash', account_type='ASSET')
+        rent = Ledger.objects.create(mosque=self.mosque, code='5001', name='Rent', account_type='EXPENSE')
+        supplier = Supplier.objects.create(mosque=self.mosque, name='Landlord')
+        for i in range(4):
+            entry = JournalEntry.objects.create(mosque=self.mosque, voucher_number=f'PAY-{i}', voucher_type='PAYMENT',
+                                                date=date(2026, 4, i + 1), narration='Rent', supplier=supplier, created_by=self.user)
+            JournalItem.objects.create(mosque=self.mosque, journal_entry=entry, ledger=rent, debit_amount=Decimal('100'))
+            JournalItem.objects.create(mosque=self.mosque, journal_entry=entry, ledger=cash, credit_amount=Decimal('100'))
+
+        # Entries with donor/supplier/creator joined, plus one prefetch for items
+        with self.assertNumQueries(2):
+            rows = self.client.get('/api/ledger/journal-entries/').json()
+        self.assertEqual([r['total_amount'] for r in rows], ['100.00'] * 4)
+
+        with self.assertNumQueries(1):
+            rows = self.client.get('/api/ledger/journal-entries/?fields=voucher_number,supplier&expand=supplier').json()
+        self.assertEqual(rows[0]['supplier']['name'], 'Landlord')
@@ -0,0 +1,86 @@
+import uuid
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.jamath.models import Household, StaffMember, StaffRole, Survey, SurveyResponse
+from apps.jamath.survey_ingest import compile_survey_schema, score_pending_responses
+from apps.shared.models import Mosque
+
+SCHEMA = [
+    {'id': 'q1', 'label': 'Monthly income', 'type': 'number', 'required': True},
+    {'id': 'q2', 'label': 'Widow in family', 'type': 'boolean'},
+    {'id': 'q3', 'label': 'Housing', 'type': 'select', 'options': 'Own, Rented'},
+]
+
+
+class SurveyIngestTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        role = StaffRole.objects.create(mosque=self.mosque, name='Auditor', permissions={'jamath': 'write'})
+        user = User.objects.create_user('auditor', password='x')
+        StaffMember.objects.create(mosque=self.mosque, user=user, role=role)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+        self.survey = Survey.objects.create(mosque=self.mosque, title='Census 2026', schema=SCHEMA)
+        self.household = Household.objects.create(
+            mosque=self.mosque, custom_data={'income': 3000, 'widow': True, 'has_critical_illness': True})
+
+    def _item(self, **overrides):
+        return {'client_id': str(uuid.uuid4()), 'survey': self.survey.id, 'household': self.household.id,
+                'answers': {'q1': '4500', 'q2': 'yes', 'q3': 'Rented'}, **overrides}
+
+    def _post(self, items):
+        response = self.client.post('/api/jamath/responses/bulk/', {'responses': items}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data['results']
+
+    def test_validator(self):
+        validate = compile_survey_schema(SCHEMA)
+        self.assertEqual(validate({'q1': '4500', 'q2': 'no'}), ({'q1': 4500, 'q2': False}, {}))
+        _, errors = validate({'q2': 'maybe', 'q3': 'Tent', 'q9': 1})
+        self.assertEqual(set(errors), {'q1', 'q2', 'q3', 'q9'})
+
+    def test_bulk_submission_is_idempotent(self):
+        first, second = self._item(), self._item()
+        invalid = self._item(answers={'q1': 'lots'})
+        results = self._post([first, second, invalid, self._item(household=999999)])
+        self.assertEqual([r['status'] for r in results], ['created', 'created', 'invalid', 'invalid'])
+        self.assertEqual(results[2]['errors'], {'answers': {'q1': 'must be a number'}})
+
+        stored = SurveyResponse.objects.get(client_id=first['client_id'])
+        self.assertEqual(stored.answers, {'q1': 4500, 'q2': True, 'q3': 'Rented'})
+        self.assertIsNone(stored.scored_at)
+
+        # A retry after a dropped connection stores nothing new
+        retry = self._post([first, second])
+        self.assertEqual([r['status'] for r in retry], ['duplicate', 'duplicate'])
+        self.assertEqual([r['id'] for r in retry], [r['id'] for r in results[:2]])
+        self.assertEqual(SurveyResponse.objects.count(), 2)
+
+    def test_client_id_used_by_another_mosque(self):
+        other = Mosque.objects.create(name='Masjid-e-Noor')
+        taken = SurveyResponse.objects.create(
+            mosque=other, survey=Survey.objects.create(mosque=other, title='Census', schema=SCHEMA),
+            household=Household.objects.create(mosque=other, membership_id='MN-001'),
+            answers={}, client_id=uuid.uuid4())
+
+        results = self._post([self._item(client_id=str(taken.client_id))])
+        self.assertEqual(results, [{'client_id': str(taken.client_id), 'status': 'invalid',
+                                    'errors': {'client_id': 'already used'}}])
+        self.assertFalse(SurveyResponse.objects.filter(mosque=self.mosque).exists())
+
+    def test_deferred_scoring(self):
+        self._post([self._item(), self._item()])
+        self.assertEqual(score_pending_responses(self.mosque.id), 2)
+        self.household.refresh_from_db()
+        self.assertEqual(self.household.zakat_score, 100)
+        self.assertFalse(SurveyResponse.objects.filter(scored_at__isnull=True).exists())
+        self.assertEqual(score_pending_responses(self.mosque.id), 0)
+
+    def test_rejects_oversized_batch(self):
+        response = self.client.post('/api/jamath/responses/bulk/',
+                                    {'responses': [self._item() for _ in range(501)]}, format='json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,171 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.jamath.models import Announcement, ChangeLogEntry, Household, Member, StaffMember, StaffRole
+from apps.jamath import sync
+from apps.jamath.sync import prune_tombstones
+from apps.shared.models import Mosque
+
+
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        role = StaffRole.objects.create(mosque=self.mosque, name='Secretary',
+                                        permissions={'jamath': 'read', 'announcements': 'read'})
+        user = User.objects.create_user('secretary', password='x')
+        StaffMember.objects.create(mosque=self.mosque, user=user, role=role)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+        self.household = Household.objects.create(mosque=self.mosque, membership_id='JM-001',
+                                                  phone_number='9876543210', address='Old City')
+        self.member = Member.objects.create(mosque=self.mosque, household=self.household, full_name='Abdul Rahman',
+                                            is_head_of_family=True)
+        other = Mosque.objects.create(name='Masjid-e-Noor')
+        Household.objects.create(mosque=other, membership_id='MN-001')
+
+    def _sync(self, token=None, client=None, **params):
+        if token:
+            params['token'] = token
+        response = (client or self.client).get('/api/jamath/sync/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def _ids(self, data, model, kind='changed'):
+        items = data['changes'][model][kind]
+        return [item['id'] for item in items] if kind == 'changed' else items
+
+    def test_full_then_delta(self):
+        first = self._sync()
+        self.assertEqual(set(first['changes']), {'household', 'member', 'announcement'})
+        self.assertEqual(self._ids(first, 'household'), [self.household.id])
+        self.assertNotIn('members', first['changes']['household']['changed'][0])
+        self.assertEqual(self._ids(first, 'member'), [self.member.id])
+
+        # Nothing changed
+        second = self._sync(first['token'])
+        self.assertEqual(self._ids(second, 'household') + self._ids(second, 'member'), [])
+
+        self.member.profession = 'Tailor'
+        self.member.save()
+        third = self._sync(second['token'], models='member')
+        self.assertEqual([m['profession'] for m in third['changes']['member']['changed']], ['Tailor'])
+        self.assertEqual(list(third['changes']), ['member'])
+
+        household_id, member_id = self.household.id, self.member.id
+        self.household.delete()
+        fourth = self._sync(third['token'])
+        self.assertEqual(self._ids(fourth, 'household', 'deleted'), [household_id])
+        self.assertEqual(self._ids(fourth, 'member', 'deleted'), [member_id])
+
+    def test_paging(self):
+        for i in range(3):
+            Member.objects.create(mosque=self.mosque, household=self.household, full_name=f'Child {i}')
+        page_size, sync.PAGE_SIZE = sync.PAGE_SIZE, 2
+        try:
+            seen, token, pages = [], None, 0
+            while True:
+                data = self._sync(token, models='member')
+                seen += self._ids(data, 'member')
+                pages += 1
+                token = data['token']
+                if not data['has_more']:
+                    break
+        finally:
+            sync.PAGE_SIZE = page_size
+        self.assertEqual((len(set(seen)), pages), (4, 2))
+
+    def test_member_moved_between_households(self):
+        other_household = Household.objects.create(mosque=self.mosque, membership_id='JM-002')
+        portal_tokens = {}
+        for membership_id in ('JM-001', 'JM-002'):
+            portal = APIClient()
+            access = portal.post('/api/portal/login/', {'identifier': membership_id, 'password': '123456'},
+                                 format='json').json()['access']
+            portal.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+            portal_tokens[membership_id] = (portal, self._sync(client=portal)['token'])
+        staff_token = self._sync()['token']
+
+        self.member.household = other_household
+        self.member.save()
+
+        portal, token = portal_tokens['JM-001']
+        data = self._sync(token, client=portal, models='member')
+        self.assertEqual(self._ids(data, 'member', 'deleted'), [self.member.id])
+        portal, token = portal_tokens['JM-002']
+        data = self._sync(token, client=portal, models='member')
+        self.assertEqual(self._ids(data, 'member'), [self.member.id])
+
+        # Staff see the member once, as changed, even after moving them back
+        self.member.household = self.household
+        self.member.save()
+        data = self._sync(staff_token, models='member')
+        self.assertEqual(self._ids(data, 'member'), [self.member.id])
+        self.assertEqual(self._ids(data, 'member', 'deleted'), [])
+
+    def test_entries_are_numbered_on_commit(self):
+        token = self._sync()['token']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.profession = 'Tailor'
+            self.member.save()
+            entry = ChangeLogEntry.objects.get(model='member', object_id=self.member.id)
+            # Not visible to clients until the change commits
+            self.assertIsNone(entry.seq)
+        entry.refresh_from_db()
+        self.assertIsNotNone(entry.seq)
+        self.assertEqual(self._ids(self._sync(token), 'member'), [self.member.id])
+
+    def test_entries_left_unnumbered_are_picked_up_by_the_next_sync(self):
+        token = self._sync()['token']
+        # As if the process died between the commit and the numbering
+        self.member.profession = 'Tailor'
+        self.member.save()
+        self.assertTrue(ChangeLogEntry.objects.filter(object_id=self.member.id, seq__isnull=True).exists())
+        self.assertEqual(self._ids(self._sync(token), 'member'), [self.member.id])
+        self.assertFalse(ChangeLogEntry.objects.filter(mosque=self.mosque, seq__isnull=True).exists())
+
+    def test_rolled_back_changes_are_not_logged(self):
+        before = ChangeLogEntry.objects.count()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Member.objects.create(mosque=self.mosque, household=self.household, full_name='Never Saved')
+            raise RuntimeError
+        self.assertEqual(ChangeLogEntry.objects.count(), before)
+
+    def test_reset(self):
+        self.assertTrue(self._sync('not-a-token')['reset'])
+
+        token = self._sync()['token']
+        self.member.delete()
+        ChangeLogEntry.objects.filter(is_deleted=True).update(changed_at=timezone.now() - timedelta(days=100))
+        self.assertEqual(prune_tombstones(), 1)
+        data = self._sync(token)
+        self.assertTrue(data['reset'])
+        self.assertEqual(self._ids(data, 'household'), [self.household.id])
+
+    def test_portal_scope(self):
+        other_household = Household.objects.create(mosque=self.mosque, membership_id='JM-002')
+        Member.objects.create(mosque=self.mosque, household=other_household, full_name='Someone Else')
+        general = Announcement.objects.create(mosque=self.mosque, title='Eid prayers', content='7 AM')
+        targeted = Announcement.objects.create(mosque=self.mosque, title='Dues', content='Pending',
+                                               target_household=other_household)
+
+        portal = APIClient()
+        access = portal.post('/api/portal/login/', {'identifier': 'JM-001', 'password': '123456'},
+                             format='json').json()['access']
+        portal.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        data = self._sync(client=portal)
+        self.assertEqual(self._ids(data, 'household'), [self.household.id])
+        self.assertEqual(self._ids(data, 'member'), [self.member.id])
+        self.assertEqual(self._ids(data, 'announcement'), [general.id])
+        self.assertEqual(self._ids(data, 'announcement', 'deleted'), [targeted.id])
+
+        general.is_active = False
+        general.save()
+        data = self._sync(data['token'], client=portal)
+        self.assertEqual(self._ids(data, 'announcement', 'deleted'), [general.id])
@@ -0,0 +1,104 @@
+import base64
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.signing import Signer
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.jamath.models import DeletedVoucher, JournalEntry, JournalItem, Ledger, StaffMember, StaffRole
+from apps.jamath.tally_xml import SYNC_TOKEN_SALT, make_sync_token, parse_sync_token
+from apps.shared.models import Mosque
+
+
+class TallyXMLExportTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        role = StaffRole.objects.create(mosque=self.mosque, name='Treasurer', permissions={'finance': 'admin'})
+        user = User.objects.create_user('treasurer', password='x', is_staff=True)
+        StaffMember.objects.create(mosque=self.mosque, user=user, role=role)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+        self.cash = Ledger.objects.create(mosque=self.mosque, code='1001', name='Cash', account_type='ASSET')
+        self.income = Ledger.objects.create(mosque=self.mosque, code='4001', name='Donations', account_type='INCOME')
+        self.first = self._voucher('RCP-001', date(2024, 5, 1))
+        self.second = self._voucher('RCP-002', date(2024, 6, 1))
+
+        other = Mosque.objects.create(name='Masjid-e-Noor')
+        JournalEntry.objects.create(mosque=other, voucher_number='RCP-900', voucher_type='RECEIPT',
+                                    date=date(2024, 5, 1), narration='Elsewhere')
+
+    def _voucher(self, number, on, amount='500'):
+        entry = JournalEntry.objects.create(mosque=self.mosque, voucher_number=number, voucher_type='RECEIPT',
+                                            date=on, narration='Jumma collection')
+        JournalItem.objects.create(mosque=self.mosque, journal_entry=entry, ledger=self.cash,
+                                   debit_amount=Decimal(amount))
+        JournalItem.objects.create(mosque=self.mosque, journal_entry=entry, ledger=self.income,
+                                   credit_amount=Decimal(amount))
+        return entry
+
+    def _export(self, **params):
+        response = self.client.get('/api/ledger/export/tally-xml/', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode(), response['X-Sync-Token']
+
+    def test_full_export(self):
+        xml, token = self._export()
+        self.assertEqual(xml.count('<VOUCHER '), 2)
+        self.assertIn('<VOUCHERNUMBER>RCP-001</VOUCHERNUMBER>', xml)
+        self.assertIn('<AMOUNT>-500.00</AMOUNT>', xml)
+        self.assertNotIn('RCP-900', xml)
+        self.assertTrue(token)
+
+        xml, _ = self._export(year=2025)
+        self.assertEqual(xml.count('<VOUCHER '), 0)
+
+    def test_delta_export_carries_edits_and_deletions(self):
+        _, token = self._export()
+        xml, token = self._export(since=token)
+        self.assertEqual(xml.count('<VOUCHER '), 0)
+
+        # Editing a line is a change to its voucher
+        item = self.first.items.get(ledger=self.cash)
+        item.particulars = 'Counted twice'
+        item.save()
+        third = self._voucher('RCP-003', date(2024, 7, 1))
+        xml, token = self._export(since=token)
+        self.assertEqual(xml.count('<VOUCHER '), 2)
+        self.assertIn('ACTION="Alter"><DATE>20240501</DATE>', xml)
+        self.assertIn('ACTION="Create"><DATE>20240701</DATE>', xml)
+
+        deleted_id = self.second.id
+        remote_id = f'digitaljamath-{self.mosque.id}-{deleted_id}'
+        self.second.delete()
+        xml, token = self._export(since=token)
+        self.assertEqual(xml.count('<VOUCHER '), 1)
+        self.assertIn(f'REMOTEID="{remote_id}" VCHTYPE="Receipt" ACTION="Delete"', xml)
+        self.assertIn('<VOUCHERNUMBER>RCP-002</VOUCHERNUMBER>', xml)
+
+        xml, _ = self._export(since=token)
+        self.assertEqual(xml.count('<VOUCHER '), 0)
+        self.assertEqual(DeletedVoucher.objects.get().entry_id, deleted_id)
+        self.assertTrue(JournalEntry.objects.filter(pk=third.pk).exists())
+
+    def test_tokens_without_tombstone_mark_still_parse(self):
+        # Adding its lines touched the entry
+        self.first.refresh_from_db()
+        # Signed `updated_at|id`, as issued before deletions were exported
+        signed = Signer(salt=SYNC_TOKEN_SALT).sign(f"{self.first.updated_at.isoformat()}|{self.first.id}")
+        token = base64.urlsafe_b64encode(signed.encode()).decode().rstrip('=')
+        self.assertEqual(parse_sync_token(token), (self.first.updated_at, self.first.id, 0))
+
+        xml, _ = self._export(since=token)
+        self.assertIn('<VOUCHERNUMBER>RCP-002</VOUCHERNUMBER>', xml)
+        self.assertNotIn('<VOUCHERNUMBER>RCP-001</VOUCHERNUMBER>', xml)
+
+        token = make_sync_token(self.first.updated_at, self.first.id, 7)
+        self.assertEqual(parse_sync_token(token), (self.first.updated_at, self.first.id, 7))
+
+    def test_bad_parameters(self):
+        for params in ({'year': 'abc'}, {'year': '99999'}, {'since': 'not-a-token'}):
+            response = self.client.get('/api/ledger/export/tally-xml/', params)
+            self.assertEqual(response.status_code, 400, params)
@@ -0,0 +1,55 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.jamath.models import Ledger, StaffMember, StaffRole
+from apps.shared.models import Mosque
+
+
+class TenantContextTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        role = StaffRole.objects.create(mosque=self.mosque, name='Treasurer', permissions={'finance': 'read'})
+        self.user = User.objects.create_user('treasurer', password='x')
+        StaffMember.objects.create(mosque=self.mosque, user=self.user, role=role,
+                                   permissions={'finance': 'admin'})
+        Ledger.objects.create(mosque=self.mosque, code='1001', name='Cash', account_type='ASSET')
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_staff_lookup_runs_once_per_request(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/ledger/accounts/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+
+        staff_queries = [q for q in ctx.captured_queries if 'jamath_staffmember' in q['sql']]
+        self.assertEqual(len(staff_queries), 1)
+
+    def test_member_override_wins_over_role(self):
+        # Role only grants read; the member-level override grants admin
+        response = self.client.post('/api/ledger/accounts/', {
+            'code': '1002', 'name': 'Bank', 'account_type': 'ASSET'
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Ledger.objects.get(code='1002').mosque, self.mosque)
+
+    def test_permissions_served_from_cache_until_role_changes(self):
+        self.client.get('/api/ledger/accounts/')
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/ledger/accounts/')
+        self.assertFalse([q for q in ctx.captured_queries if 'jamath_staffmember' in q['sql']])
+
+        # Dropping the override and then downgrading the role must take effect immediately
+        staff = StaffMember.objects.get(user=self.user)
+        staff.permissions = {}
+        staff.save()
+        self.assertEqual(self.client.get('/api/ledger/accounts/').status_code, 200)
+        role = staff.role
+        role.permissions = {'finance': 'none'}
+        role.save()
+        response = self.client.get('/api/ledger/accounts/')
+        self.assertEqual(response.status_code, 403)
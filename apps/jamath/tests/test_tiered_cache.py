@@ -0,0 +1,41 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.jamath.models import MembershipConfig
+from apps.shared.models import Mosque
+
+
+class TieredCacheTests(TestCase):
+    def test_get_or_compute_is_served_locally_until_bumped(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {'value': len(calls)}
+
+        self.assertEqual(cache.get_or_compute('test', 'key', compute), {'value': 1})
+        self.assertEqual(cache.get_or_compute('test', 'key', compute), {'value': 1})
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()[('test', 'local_hits')], 1)
+
+        cache.bump('test')
+        self.assertEqual(cache.get_or_compute('test', 'key', compute), {'value': 2})
+
+    def test_cached_value_survives_a_cold_local_tier(self):
+        cache.get_or_compute('test', 'key', lambda: 'computed')
+        cache.local.clear()
+        self.assertEqual(cache.get_or_compute('test', 'key', lambda: 'recomputed'), 'computed')
+        self.assertEqual(cache.stats()[('test', 'remote_hits')], 1)
+
+    def test_membership_config_save_invalidates_cached_config(self):
+        mosque = Mosque.objects.create(name='Jamia Masjid')
+        self.assertFalse(MembershipConfig.for_mosque(mosque.id))
+
+        config = MembershipConfig.objects.create(mosque=mosque, organization_name='Jamia Trust')
+        self.assertEqual(MembershipConfig.for_mosque(mosque.id).organization_name, 'Jamia Trust')
+
+        config.organization_name = 'Jamia Masjid Trust'
+        config.save()
+        self.assertEqual(MembershipConfig.for_mosque(mosque.id).organization_name, 'Jamia Masjid Trust')
+        with self.assertNumQueries(0):
+            MembershipConfig.for_mosque(mosque.id)
@@ -0,0 +1,87 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.jamath.models import Household, Member, MembershipConfig, StaffMember, StaffRole
+from apps.jamath.services import JamathService
+from apps.jamath.zakat_scoring import InvalidZakatRules, rescore_mosque, validate_zakat_rules
+from apps.shared.models import Mosque
+
+
+class ZakatScoringTests(TestCase):
+    def setUp(self):
+        self.mosque = Mosque.objects.create(name='Jamia Masjid')
+        self.widow = Household.objects.create(mosque=self.mosque, custom_data={'income': 3000, 'widow': True,
+                                                                               'has_critical_illness': True})
+        self.poor = Household.objects.create(mosque=self.mosque, custom_data={'income': '4000'})
+        self.earning = Household.objects.create(mosque=self.mosque, custom_data={'income': 20000})
+        Member.objects.create(mosque=self.mosque, household=self.poor, full_name='Yusuf',
+                              monthly_income=Decimal('3000'), requirements='Dialysis')
+        Member.objects.create(mosque=self.mosque, household=self.earning, full_name='Hamid',
+                              monthly_income=Decimal('20000'), is_employed=True)
+
+    def _reload(self):
+        return {h.id: (h.zakat_score, h.economic_status) for h in Household.objects.filter(mosque=self.mosque)}
+
+    def test_default_rules_match_single_household_scoring(self):
+        report = rescore_mosque(self.mosque.id)
+        self.assertEqual(report['scored'], 3)
+        scores = self._reload()
+        self.assertEqual(scores[self.widow.id], (100, Household.EconomicStatus.ZAKAT_ELIGIBLE))
+        self.assertEqual(scores[self.poor.id], (50, Household.EconomicStatus.AAM))
+        self.assertEqual([c['household_id'] for c in report['category_changes']], [self.widow.id])
+
+        self.poor.custom_data['widow'] = True
+        JamathService.calculate_zakat_eligibility(self.poor)
+        self.assertEqual((self.poor.zakat_score, self.poor.economic_status),
+                         (70, Household.EconomicStatus.AAM))
+
+        # Nothing moved, nothing written
+        self.assertEqual(rescore_mosque(self.mosque.id)['updated'], 0)
+
+    def test_configured_rules_with_member_columns(self):
+        MembershipConfig.objects.create(mosque=self.mosque, zakat_rules={
+            'threshold': 60,
+            'rules': [
+                {'column': 'member_income', 'op': 'lt', 'value': 5000, 'points': 40},
+                {'column': 'members_with_requirements', 'op': 'gte', 'value': 1, 'points': 30},
+                {'column': 'custom.widow', 'op': 'truthy', 'points': 20},
+            ],
+        })
+        preview = rescore_mosque(self.mosque.id, dry_run=True)
+        self.assertEqual({c['household_id'] for c in preview['category_changes']}, {self.poor.id, self.widow.id})
+        self.assertEqual(self._reload()[self.poor.id], (0, Household.EconomicStatus.AAM))
+
+        rescore_mosque(self.mosque.id)
+        scores = self._reload()
+        self.assertEqual(scores[self.poor.id], (70, Household.EconomicStatus.ZAKAT_ELIGIBLE))
+        # No members: no income, so 40 + widow 20
+        self.assertEqual(scores[self.widow.id], (60, Household.EconomicStatus.ZAKAT_ELIGIBLE))
+        self.assertEqual(scores[self.earning.id], (0, Household.EconomicStatus.AAM))
+
+    def test_rule_validation(self):
+        validate_zakat_rules({})
+        for rules in ({'threshold': 80, 'rules': [{'column': 'password', 'op': 'lt', 'value': 1, 'points': 5}]},
+                      {'threshold': 80, 'rules': [{'column': 'custom.income', 'op': 'lt', 'value': 'x',
+                                                   'points': 5}]},
+                      {'rules': []}):
+            with self.assertRaises(InvalidZakatRules):
+                validate_zakat_rules(rules)
+
+    def test_api(self):
+        role = StaffRole.objects.create(mosque=self.mosque, name='Secretary', permissions={'jamath': 'write'})
+        user = User.objects.create_user('secretary', password='x')
+        StaffMember.objects.create(mosque=self.mosque, user=user, role=role)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.post('/api/jamath/households/rescore-zakat/?dry_run=true')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['scored'], response.data['dry_run']), (3, True))
+        self.assertEqual(self._reload()[self.widow.id][0], 0)
+
+        response = client.post('/api/jamath/households/rescore-zakat/')
+        self.assertEqual(len(response.data['category_changes']), 1)
+        self.assertEqual(self._reload()[self.widow.id][0], 100)
@@ -0,0 +1,219 @@
+"""
+Zakat eligibility scoring.
+
+A mosque's rules (`MembershipConfig.zakat_rules`, or `DEFAULT_ZAKAT_RULES`)
+award points when a household column passes a test; households scoring at
+least `threshold` are Zakat eligible:
+
+    {"threshold": 80, "rules": [
+        {"column": "custom.income", "op": "lt", "value": 5000, "points": 50, "missing": 0},
+        {"column": "member_income", "op": "lt", "value": 10000, "points": 20},
+        {"column": "custom.widow", "op": "truthy", "points": 20}]}
+
+Columns are `custom.<key>` (Household.custom_data) or one of
+`MEMBER_COLUMNS`, aggregated over the household's living members.
+`missing` stands in for households without the value.
+
+`rescore_mosque` loads households a chunk at a time as columns (one query,
+member aggregates included), evaluates each rule over whole columns and
+writes back only the rows whose score or status moved, one UPDATE per
+distinct (score, status) in the chunk.
+"""
+import operator
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .custom_data import CUSTOM_PREFIX, is_valid_key
+
+# Households loaded, scored and written back per round trip
+CHUNK_SIZE = 2000
+
+DEFAULT_ZAKAT_RULES = {
+    'threshold': 80,
+    'rules': [
+        {'column': 'custom.income', 'op': 'lt', 'value': 5000, 'points': 50, 'missing': 0},
+        {'column': 'custom.has_critical_illness', 'op': 'truthy', 'points': 30},
+        {'column': 'custom.widow', 'op': 'truthy', 'points': 20},
+    ],
+}
+
+_ALIVE = Q(members__is_alive=True)
+
+MEMBER_COLUMNS = {
+    'members': lambda: Count('members', filter=_ALIVE),
+    'earning_members': lambda: Count('members', filter=_ALIVE & Q(members__is_employed=True)),
+    'member_income': lambda: Coalesce(Sum('members__monthly_income', filter=_ALIVE),
+                                      Value(0, output_field=DecimalField())),
+    'members_with_requirements': lambda: Count(
+        'members', filter=_ALIVE & Q(members__requirements__isnull=False) & ~Q(members__requirements='')
+    ),
+}
+
+_NUMERIC_OPS = {'lt': operator.lt, 'lte': operator.le, 'gt': operator.gt, 'gte': operator.ge}
+OPERATORS = {
+    **_NUMERIC_OPS,
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'in': lambda value, options: value in options,
+    'truthy': lambda value, _: bool(value),
+}
+
+
+class InvalidZakatRules(ValueError):
+    """Raised for malformed scoring rules; the message is shown to the user."""
+
+
+def validate_zakat_rules(config):
+    """Check a `zakat_rules` document; an empty one means the defaults."""
+    if not config:
+        return
+    if not isinstance(config, dict) or not isinstance(config.get('rules'), list):
+        raise InvalidZakatRules("Expected {'threshold': <number>, 'rules': [...]}")
+    if not isinstance(config.get('threshold'), (int, float)):
+        raise InvalidZakatRules('threshold must be a number')
+    for i, rule in enumerate(config['rules'], 1):
+        column = rule.get('column', '') if isinstance(rule, dict) else ''
+        if not (column in MEMBER_COLUMNS or
+                (column.startswith(CUSTOM_PREFIX) and is_valid_key(column[len(CUSTOM_PREFIX):]))):
+            raise InvalidZakatRules(f"Rule {i}: unknown column '{column}'")
+        if rule.get('op') not in OPERATORS:
+            raise InvalidZakatRules(f"Rule {i}: op must be one of {', '.join(OPERATORS)}")
+        if not isinstance(rule.get('points'), int):
+            raise InvalidZakatRules(f'Rule {i}: points must be a whole number')
+        if rule['op'] in _NUMERIC_OPS and _number(rule.get('value')) is None:
+            raise InvalidZakatRules(f'Rule {i}: value must be a number')
+        if rule['op'] == 'in' and not isinstance(rule.get('value'), list):
+            raise InvalidZakatRules(f'Rule {i}: value must be a list')
+
+
+def zakat_rules_for(mosque_id):
+    from .models import MembershipConfig
+
+    config = MembershipConfig.for_mosque(mosque_id)
+    return (config.zakat_rules if config and config.zakat_rules else None) or DEFAULT_ZAKAT_RULES
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        return value
+    try:
+        number = Decimal(str(value).strip().replace(',', ''))
+    except (ArithmeticError, ValueError):
+        return None
+    return number if number.is_finite() else None
+
+
+def _rule_points(rule, column):
+    """Points awarded by one rule to every value of its column."""
+    compare, target, points = OPERATORS[rule['op']], rule.get('value'), rule['points']
+    missing = rule.get('missing')
+    if rule['op'] in _NUMERIC_OPS:
+        target = _number(target)
+        values = (_number(missing if v is None else v) for v in column)
+        return [points if v is not None and compare(v, target) else 0 for v in values]
+    return [points if compare(missing if v is None else v, target) else 0 for v in column]
+
+
+def score_columns(columns, count, config):
+    """Scores (0-100) and economic statuses for `count` households given as columns."""
+    from .models import Household
+
+    totals = [0] * count
+    for rule in config['rules']:
+        totals = list(map(operator.add, totals, _rule_points(rule, columns[rule['column']])))
+    scores = [min(100, max(0, total)) for total in totals]
+    eligible, aam = Household.EconomicStatus.ZAKAT_ELIGIBLE, Household.EconomicStatus.AAM
+    return scores, [eligible if score >= config['threshold'] else aam for score in scores]
+
+
+def _columns(custom_data, member_rows, config):
+    """Split loaded values into the columns the rules read."""
+    columns = {}
+    for rule in config['rules']:
+        name = rule['column']
+        if name in columns:
+            continue
+        if name.startswith(CUSTOM_PREFIX):
+            key = name[len(CUSTOM_PREFIX):]
+            columns[name] = [(data or {}).get(key) for data in custom_data]
+        else:
+            columns[name] = [row[name] for row in member_rows]
+    return columns
+
+
+def _member_columns(config):
+    return sorted({rule['column'] for rule in config['rules'] if rule['column'] in MEMBER_COLUMNS})
+
+
+def score_household(household):
+    """Score and status for one household under its mosque's rules."""
+    config = zakat_rules_for(household.mosque_id)
+    needed = _member_columns(config)
+    member_row = {name: 0 for name in needed}
+    if needed and household.pk:
+        from .models import Household
+        member_row = Household.objects.filter(pk=household.pk).aggregate(
+            **{name: MEMBER_COLUMNS[name]() for name in needed})
+    scores, statuses = score_columns(_columns([household.custom_data], [member_row], config), 1, config)
+    return scores[0], statuses[0]
+
+
+def rescore_mosque(mosque_id, household_ids=None, dry_run=False):
+    """
+    Rescore every household of a mosque, or only `household_ids`.
+
+    Returns counts and the households whose economic status changed; with
+    `dry_run` nothing is written.
+    """
+    from .census_stats import mark_census_stale
+    from .models import Household
+    from .sync import record_changes
+
+    config = zakat_rules_for(mosque_id)
+    needed = _member_columns(config)
+    households = Household.objects.filter(mosque_id=mosque_id).order_by('id')
+    if household_ids is not None:
+        households = households.filter(id__in=household_ids)
+    if needed:
+        households = households.annotate(**{name: MEMBER_COLUMNS[name]() for name in needed})
+    households = households.values('id', 'membership_id', 'custom_data', 'zakat_score', 'economic_status', *needed)
+
+    scored, updated, changes = 0, 0, []
+    last_id = 0
+    while True:
+        # Keyset pagination: each chunk is one indexed range scan
+        rows = list(households.filter(id__gt=last_id)[:CHUNK_SIZE])
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+        scores, statuses = score_columns(_columns([r['custom_data'] for r in rows], rows, config),
+                                         len(rows), config)
+
+        # Rules award a handful of point values, so a chunk has few distinct
+        # outcomes: one UPDATE ... WHERE id IN (...) per outcome is much
+        # cheaper than bulk_update's per-row CASE
+        changed = defaultdict(list)
+        for row, score, status in zip(rows, scores, statuses):
+            if row['economic_status'] != status:
+                changes.append({'household_id': row['id'], 'membership_id': row['membership_id'],
+                                'zakat_score': score, 'from': row['economic_status'], 'to': status})
+            if row['zakat_score'] != score or row['economic_status'] != status:
+                changed[score, status].append(row['id'])
+        if changed and not dry_run:
+            with transaction.atomic():
+                for (score, status), ids in changed.items():
+                    Household.objects.filter(id__in=ids).update(zakat_score=score, economic_status=status)
+                record_changes(mosque_id, 'household', [(pk, pk) for ids in changed.values() for pk in ids])
+        scored += len(rows)
+        updated += sum(map(len, changed.values()))
+
+    if updated and not dry_run:
+        # update() skips the signals that flag the census statistics
+        mark_census_stale(mosque_id)
+    return {'scored': scored, 'updated': updated, 'dry_run': dry_run, 'category_changes': changes}
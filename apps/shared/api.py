@@ -5,11 +5,13 @@ from django.conf import settings
 from .models import Mosque
 from .serializers import TenantRegistrationSerializer
 from django.contrib.auth.models import User
-import random
 from django.utils import timezone
 from rest_framework.views import APIView
 from .email_service import EmailService
 from django.core.signing import Signer, BadSignature
+from .otp import (
+    OTPError, OTPRateLimited, client_ip, password_reset_otp_store, registration_otp_store
+)
 
 
 class FindWorkspaceThrottle(AnonRateThrottle):
@@ -78,7 +80,9 @@ class MosqueRegistrationView(generics.CreateAPIView):
                 "login_url": f"http://{base_domain}/auth/masjid/login"
             }, status=status.HTTP_202_ACCEPTED)
 
-_reg_otp_store = {}
+def otp_rate_limited_response(exc):
+    return Response({'error': str(exc)}, status=429, headers={'Retry-After': str(exc.retry_after)})
+
 
 class RequestRegistrationOTPView(APIView):
     permission_classes = []
@@ -90,15 +94,15 @@ class RequestRegistrationOTPView(APIView):
         
         if not email:
             return Response({'error': 'Email is required'}, status=400)
-            
-        otp = str(random.randint(100000, 999999))
+
+        try:
+            registration_otp_store.check_rate_limit(email, client_ip(request))
+        except OTPRateLimited as e:
+            return otp_rate_limited_response(e)
+
+        otp = registration_otp_store.issue(email)
         if settings.DEBUG:
             print(f"DEBUG OTP for {email}: {otp}")
-            
-        _reg_otp_store[email] = {
-            'otp': otp,
-            'expires': timezone.now() + timezone.timedelta(minutes=10)
-        }
         
         try:
             EmailService.send_email(
@@ -130,20 +134,13 @@ class VerifyRegistrationOTPView(APIView):
         if not email or not otp:
             return Response({'error': 'Email and OTP are required'}, status=400)
             
-        stored = _reg_otp_store.get(email)
-        if not stored:
-            return Response({'error': 'OTP expired or not found'}, status=400)
-            
-        if stored['otp'] != otp:
-             return Response({'error': 'Invalid OTP'}, status=400)
-                 
-        if stored['expires'] < timezone.now():
-             del _reg_otp_store[email]
-             return Response({'error': 'OTP expired'}, status=400)
+        try:
+            registration_otp_store.verify(email, otp)
+        except OTPError as e:
+            return Response({'error': str(e)}, status=400)
         
         signer = Signer()
         verification_token = signer.sign(email)
-        del _reg_otp_store[email]
             
         return Response({
             'message': 'Email verified.',
@@ -214,8 +211,6 @@ class VerifyEmailView(generics.GenericAPIView):
         except Mosque.DoesNotExist:
             return Response({"error": "Invalid token"}, status=status.HTTP_400_BAD_REQUEST)
 
-_reset_otp_store = {}
-
 class RequestPasswordResetOTPView(generics.GenericAPIView):
     permission_classes = []
     throttle_classes = [OTPRequestThrottle] 
@@ -224,20 +219,21 @@ class RequestPasswordResetOTPView(generics.GenericAPIView):
         email = request.data.get('email')
         if not email:
             return Response({'error': 'Email is required'}, status=400)
+
+        # Limited before the account lookup so the response doesn't reveal which emails exist
+        try:
+            password_reset_otp_store.check_rate_limit(email, client_ip(request))
+        except OTPRateLimited as e:
+            return otp_rate_limited_response(e)
             
         try:
             user = User.objects.get(email=email)
         except User.DoesNotExist:
             return Response({'message': 'If an account exists, an OTP has been sent.'})
         
-        otp = str(random.randint(100000, 999999))
+        otp = password_reset_otp_store.issue(email)
         if settings.DEBUG:
             print(f"RESET OTP for {email}: {otp}")
-            
-        _reset_otp_store[email] = {
-            'otp': otp,
-            'expires': timezone.now() + timezone.timedelta(minutes=10),
-        }
         
         try:
             EmailService.send_email(
@@ -267,20 +263,13 @@ class VerifyPasswordResetOTPView(generics.GenericAPIView):
         if not email or not otp:
             return Response({'error': 'Email and OTP are required'}, status=400)
             
-        stored = _reset_otp_store.get(email)
-        if not stored:
-            return Response({'error': 'OTP expired or not found'}, status=400)
-
-        if stored['otp'] != otp:
-             return Response({'error': 'Invalid OTP'}, status=400)
-                 
-        if stored['expires'] < timezone.now():
-             del _reset_otp_store[email]
-             return Response({'error': 'OTP expired'}, status=400)
+        try:
+            password_reset_otp_store.verify(email, otp)
+        except OTPError as e:
+            return Response({'error': str(e)}, status=400)
         
         signer = Signer(salt='password-reset') 
         reset_token = signer.sign(email)
-        del _reset_otp_store[email]
             
         return Response({
             'message': 'OTP verified.',
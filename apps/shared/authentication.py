@@ -0,0 +1,94 @@
+"""
+JWT authentication that trusts the tenant claims issued by `apps.shared.tokens`.
+
+Portal tokens (those with a `household_id` claim) authenticate as a
+`PortalUser` built from the token alone, so member portal requests need no
+identity queries. Staff tokens still load their `User` row, which views use
+for audit fields, but their mosque and permissions come from the token.
+"""
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import get_token_version
+
+
+class PortalUser:
+    """
+    Stateless user for member portal tokens.
+
+    Carries the household and mosque from the token and mimics the
+    `member_<household_id>` username portal views expect. Any other `User`
+    attribute (e.g. `first_name`, `check_password`) loads the row on first use.
+
+    It is read-only: setting a `User` field here would never reach the row,
+    so views that edit the account work on `account_user(request.user)`.
+    """
+    is_active = True
+    is_staff = False
+    is_superuser = False
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, token):
+        user_model = get_user_model()
+        # Claims are strings; compare equal to the User row's own pk
+        pk = user_model._meta.get_field(api_settings.USER_ID_FIELD).to_python(token[api_settings.USER_ID_CLAIM])
+        self.__dict__.update(
+            token=token,
+            id=pk,
+            pk=pk,
+            household_id=token['household_id'],
+            mosque_id=token.get('mosque_id'),
+            username=f"member_{token['household_id']}",
+        )
+
+    @cached_property
+    def db_user(self):
+        user_model = get_user_model()
+        return user_model.objects.get(**{api_settings.USER_ID_FIELD: self.pk})
+
+    def __getattr__(self, name):
+        # Only fall back for real User attributes, so hasattr() probes stay free
+        if name.startswith('_') or not hasattr(get_user_model(), name):
+            raise AttributeError(name)
+        return getattr(self.db_user, name)
+
+    def __setattr__(self, name, value):
+        if not name.startswith('_') and hasattr(get_user_model(), name):
+            raise AttributeError(f"PortalUser is read-only; set {name} on account_user(user) instead")
+        super().__setattr__(name, value)
+
+    def __str__(self):
+        return self.username
+
+    def __eq__(self, other):
+        return getattr(other, 'pk', None) == self.pk and getattr(other, 'is_authenticated', False)
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+def account_user(user):
+    """The `User` row behind an authenticated user, for views that edit the account."""
+    return user.db_user if isinstance(user, PortalUser) else user
+
+
+class TenantJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication with token-version revocation and stateless portal users."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        # Tokens issued before the tenant claims existed count as version 0
+        if validated_token.get('tv', 0) != get_token_version(user_id):
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+
+        if 'household_id' in validated_token:
+            return PortalUser(validated_token)
+        return super().get_user(validated_token)
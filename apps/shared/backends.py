@@ -1,6 +1,34 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.contrib.auth.hashers import check_password, make_password
+from django.db.models.functions import Lower
+
+PORTAL_USERNAME_PREFIX = 'member_'
+PORTAL_HASHER = 'pbkdf2_sha256_portal'
+
+
+def is_portal_username(username) -> bool:
+    return (username or '').startswith(PORTAL_USERNAME_PREFIX)
+
+
+def find_user_by_identifier(identifier):
+    """
+    Case-insensitive lookup by username, then by email.
+
+    Filters on lower(...) so Postgres can use the auth_user_username_lower /
+    auth_user_email_lower expression indexes (shared migration 0003); an
+    `__iexact` OR across both columns compiles to UPPER() and scans the table.
+    """
+    if not identifier:
+        return None
+    UserModel = get_user_model()
+    value = identifier.lower()
+
+    user = UserModel.objects.alias(username_lower=Lower('username')).filter(username_lower=value).first()
+    if user is None and '@' in value:
+        user = UserModel.objects.alias(email_lower=Lower('email')).filter(email_lower=value).order_by('pk').first()
+    return user
+
 
 class EmailBackend(ModelBackend):
     """
@@ -8,14 +36,35 @@ class EmailBackend(ModelBackend):
     """
     def authenticate(self, request, username=None, password=None, **kwargs):
         UserModel = get_user_model()
-        try:
-            # Check for user by email (case insensitive) or username
-            user = UserModel.objects.filter(
-                Q(username__iexact=username) | Q(email__iexact=username)
-            ).first()
-        except UserModel.DoesNotExist:
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        user = find_user_by_identifier(username)
+        if user is None:
+            # Run the hasher anyway so unknown accounts take as long as known ones
+            UserModel().set_password(password)
             return None
 
-        if user and user.check_password(password) and self.user_can_authenticate(user):
+        if self.verify_password(user, password) and self.user_can_authenticate(user):
             return user
         return None
+
+    @staticmethod
+    def verify_password(user, password) -> bool:
+        """
+        Check `password`, keeping portal members on the portal hasher profile.
+
+        `User.check_password` would re-hash portal passwords with the default
+        (slower) hasher on every successful login; here they are only
+        re-encoded when the portal profile itself changes.
+        """
+        if not is_portal_username(user.username):
+            return user.check_password(password)
+
+        def setter(raw_password):
+            user.password = make_password(raw_password, hasher=PORTAL_HASHER)
+            user.save(update_fields=['password'])
+
+        return check_password(password, user.password, setter, preferred=PORTAL_HASHER)
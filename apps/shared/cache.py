@@ -0,0 +1,270 @@
+"""
+Two-tier cache backend: a per-process LRU in front of a shared remote cache
+(Redis in production).
+
+The plain Django cache API (`get`, `set`, `add`, `incr`, ...) goes straight
+to the remote tier, so throttles, counters and version keys are consistent
+across web and worker containers.
+
+Derived data is cached with `get_or_compute(namespace, key, compute)`:
+- Keys are versioned per namespace; `bump(namespace)` invalidates everything
+  in it at once by moving the version, so nothing is deleted or scanned
+- Because a versioned key never changes meaning, values are also kept in the
+  local LRU. A local hit still reads the namespace version from the remote
+  tier (one small GET, so a bump in any process takes effect at once) but
+  skips fetching the value itself
+- Misses are single-flight: one thread per process and one process per
+  cluster (via a remote lock) recomputes, the others wait for its result
+- Hits and misses are counted per namespace and periodically added to
+  shared counters (see `manage.py cache_stats`)
+"""
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+METRIC_NAMES = ('local_hits', 'remote_hits', 'misses', 'waits')
+
+
+class _LocalLRU:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, payload = item
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+        # Pickled like LocMemCache so callers can't mutate the cached copy
+        return pickle.loads(payload)
+
+    def set(self, key, value, timeout):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self._data[key] = (expires, payload)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TieredCache(BaseCache):
+    """
+    CACHES backend. OPTIONS:
+
+    - REMOTE: cache config for the shared tier (BACKEND, LOCATION, ...)
+    - LOCAL_MAX_ENTRIES: size of the per-process LRU (default 2048)
+    - LOCAL_TIMEOUT: upper bound on how long a value stays local (default 300s)
+    - LOCK_TIMEOUT: how long one process may hold a recompute lock (default 30s)
+    - METRICS_INTERVAL: seconds between flushes of hit counters (default 60s)
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        remote = dict(options['REMOTE'])
+        backend = import_string(remote.pop('BACKEND'))
+        self.remote = backend(remote.pop('LOCATION', ''), remote)
+
+        self.local = _LocalLRU(options.get('LOCAL_MAX_ENTRIES', 2048))
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 300)
+        self.lock_timeout = options.get('LOCK_TIMEOUT', 30)
+        self.metrics_interval = options.get('METRICS_INTERVAL', 60)
+
+        # Striped locks: concurrent misses on one key in this process compute once
+        self._key_locks = [threading.Lock() for _ in range(64)]
+        self._metrics = defaultdict(int)
+        self._metrics_lock = threading.Lock()
+        self._metrics_flushed = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Plain cache API: remote tier only
+    # ------------------------------------------------------------------
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.remote.add(key, value, timeout, version)
+
+    def get(self, key, default=None, version=None):
+        return self.remote.get(key, default, version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.remote.set(key, value, timeout, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.remote.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        return self.remote.delete(key, version)
+
+    def get_many(self, keys, version=None):
+        return self.remote.get_many(keys, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.remote.set_many(data, timeout, version)
+
+    def delete_many(self, keys, version=None):
+        self.remote.delete_many(keys, version)
+
+    def has_key(self, key, version=None):
+        return self.remote.has_key(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        return self.remote.incr(key, delta, version)
+
+    def decr(self, key, delta=1, version=None):
+        return self.remote.decr(key, delta, version)
+
+    def clear(self):
+        self.local.clear()
+        self.remote.clear()
+
+    def close(self, **kwargs):
+        self.remote.close(**kwargs)
+
+    # ------------------------------------------------------------------
+    # Versioned namespaces
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _version_key(namespace):
+        return f"ns:{namespace}"
+
+    def namespace_version(self, namespace) -> int:
+        """Current version of `namespace`, seeded on first use."""
+        key = self._version_key(namespace)
+        version = self.remote.get(key)
+        if version is None:
+            # Timestamps never repeat, so an evicted version can't bring back
+            # values cached under an older one
+            self.remote.add(key, time.time_ns(), timeout=None)
+            version = self.remote.get(key)
+        return version
+
+    def bump(self, *namespaces) -> None:
+        """Invalidate everything cached under `namespaces`."""
+        version = time.time_ns()
+        self.remote.set_many({self._version_key(ns): version for ns in namespaces}, timeout=None)
+
+    def get_or_compute(self, namespace, key, compute, timeout=DEFAULT_TIMEOUT):
+        """
+        Return the cached value for `key` in `namespace`, computing it on a miss.
+
+        `compute` must not return None (None is indistinguishable from a miss).
+        """
+        full_key = f"{namespace}:{self.namespace_version(namespace)}:{key}"
+        metric = namespace.split(':', 1)[0]
+
+        value = self.local.get(full_key)
+        if value is not None:
+            self._count(metric, 'local_hits')
+            return value
+
+        with self._key_locks[hash(full_key) % len(self._key_locks)]:
+            # Another thread may have filled it while we waited
+            value = self.local.get(full_key)
+            if value is not None:
+                self._count(metric, 'local_hits')
+                return value
+
+            value = self.remote.get(full_key)
+            if value is not None:
+                self._count(metric, 'remote_hits')
+            else:
+                value = self._compute_once(full_key, metric, compute, timeout)
+
+            self.local.set(full_key, value, self._local_timeout(timeout))
+            return value
+
+    def _compute_once(self, full_key, metric, compute, timeout):
+        lock_key = f"lock:{full_key}"
+        if self.remote.add(lock_key, 1, timeout=self.lock_timeout):
+            self._count(metric, 'misses')
+            try:
+                value = compute()
+                self.remote.set(full_key, value, timeout)
+            finally:
+                self.remote.delete(lock_key)
+            return value
+
+        # Another process is computing this value: wait for its result
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            value = self.remote.get(full_key)
+            if value is not None:
+                self._count(metric, 'waits')
+                return value
+            if not self.remote.has_key(lock_key):
+                break
+
+        # The lock holder died or gave up; compute it ourselves
+        self._count(metric, 'misses')
+        value = compute()
+        self.remote.set(full_key, value, timeout)
+        return value
+
+    def _local_timeout(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self.local_timeout
+        return min(max(timeout - time.time(), 0), self.local_timeout)
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def _count(self, namespace, name):
+        with self._metrics_lock:
+            self._metrics[(namespace, name)] += 1
+            due = time.monotonic() - self._metrics_flushed >= self.metrics_interval
+        if due:
+            self.flush_metrics()
+
+    def stats(self) -> dict:
+        """Counters of this process since the last flush."""
+        with self._metrics_lock:
+            return dict(self._metrics)
+
+    def flush_metrics(self) -> None:
+        """Add this process' counters to the shared totals."""
+        with self._metrics_lock:
+            pending, self._metrics = self._metrics, defaultdict(int)
+            self._metrics_flushed = time.monotonic()
+        for (namespace, name), delta in pending.items():
+            key = f"metrics:{namespace}:{name}"
+            try:
+                self.remote.add(key, 0, timeout=None)
+                self.remote.incr(key, delta)
+            except ValueError:
+                # Evicted between add and incr; losing one interval is fine
+                logger.debug(f"Cache metric {key} evicted during flush")
+        if pending:
+            namespaces = {ns for ns, _ in pending}
+            known = self.remote.get('metrics:namespaces') or set()
+            if not namespaces <= known:
+                self.remote.set('metrics:namespaces', known | namespaces, timeout=None)
+
+    def shared_stats(self) -> dict:
+        """Totals flushed by all processes, by namespace."""
+        result = {}
+        for namespace in sorted(self.remote.get('metrics:namespaces') or ()):
+            values = self.remote.get_many([f"metrics:{namespace}:{name}" for name in METRIC_NAMES])
+            result[namespace] = {name: values.get(f"metrics:{namespace}:{name}", 0) for name in METRIC_NAMES}
+        return result
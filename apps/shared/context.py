@@ -0,0 +1,140 @@
+"""
+Request-scoped tenant context.
+
+Resolves the current user's mosque and merged module permissions from the
+shared permission cache (see `apps.shared.rbac`), and keeps the result on the
+request so permission classes, mixins and views all share it. The staff,
+role and mosque rows themselves are only loaded if a view asks for them.
+
+When the request carries a JWT issued by `apps.shared.tokens`, its signed
+claims are used instead, as long as the user's permission version has not
+moved since the token was issued.
+"""
+from django.utils.functional import cached_property
+
+from .rbac import get_effective_permissions, get_permission_version
+
+
+class TenantContext:
+    """Who the user is within their mosque, resolved once."""
+
+    def __init__(self, user, token=None):
+        self.user = user
+        self.token = token
+        self.snapshot = None
+        self.household_id = None
+        self.permissions = {}
+        self._mosque_id = None
+
+        if not user or not user.is_authenticated:
+            return
+
+        if user.username.startswith('member_'):
+            self._load_member(user)
+        else:
+            self._load_staff(user)
+
+    def _load_staff(self, user):
+        token = self.token
+        if token is not None and 'pv' in token and token['pv'] == get_permission_version(user.pk):
+            self.snapshot = token.get('staff')
+        else:
+            # Served from the shared permission cache on the hot path
+            self.snapshot = get_effective_permissions(user)
+        if self.snapshot is None:
+            return
+        self._mosque_id = self.snapshot['mosque_id']
+        self.permissions = self.snapshot['permissions']
+
+    def _load_member(self, user):
+        from apps.shared.models import Mosque
+
+        if getattr(user, 'household_id', None) is not None:
+            # Portal token claims (see apps.shared.authentication.PortalUser)
+            self.household_id = user.household_id
+            self._mosque_id = user.mosque_id
+            return
+
+        try:
+            self.household_id = int(user.username.split('_')[1])
+        except (IndexError, ValueError):
+            return
+        self.__dict__['mosque'] = Mosque.objects.filter(household_objects__id=self.household_id).first()
+        self._mosque_id = self.mosque.id if self.mosque else None
+
+    @cached_property
+    def staff(self):
+        from apps.jamath.models import StaffMember
+
+        if self.snapshot is None:
+            return None
+        return StaffMember.objects.select_related('role', 'mosque').filter(id=self.snapshot['staff_id']).first()
+
+    @cached_property
+    def role(self):
+        return self.staff.role if self.staff else None
+
+    @cached_property
+    def mosque(self):
+        from apps.shared.models import Mosque
+
+        if self._mosque_id is None:
+            return None
+        return Mosque.objects.filter(id=self._mosque_id).first()
+
+    @property
+    def mosque_id(self):
+        return self._mosque_id
+
+    @property
+    def is_staff_member(self):
+        return self.snapshot is not None
+
+    @property
+    def staff_mosque(self):
+        """Mosque of the staff assignment only (None for portal members)."""
+        return self.mosque if self.snapshot is not None else None
+
+    def module_access(self, module):
+        """Access level ('admin', 'read', 'view', ...) for a module, or None."""
+        level = self.permissions.get(module)
+        if not level or level == 'none':
+            return None
+        return level
+
+
+def _user_key(user):
+    if user is None or not user.is_authenticated:
+        return None
+    return (user.pk, user.username)
+
+
+def get_tenant_context(request):
+    """
+    Return the TenantContext for `request` (a Django or DRF request).
+
+    DRF authenticates after the middleware stack has run, so the context is
+    keyed by the current user and rebuilt if `request.user` has changed since
+    it was first resolved (e.g. AnonymousUser -> JWT user).
+    """
+    http_request = getattr(request, '_request', request)
+    user = request.user
+    key = _user_key(user)
+
+    cached = getattr(http_request, '_tenant_context', None)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    context = TenantContext(user, getattr(request, 'auth', None))
+    http_request._tenant_context = (key, context)
+    return context
+
+
+class LazyTenantContext:
+    """Attribute proxy installed as `request.tenant_context` by the middleware."""
+
+    def __init__(self, request):
+        self._request = request
+
+    def __getattr__(self, name):
+        return getattr(get_tenant_context(self._request), name)
@@ -8,7 +8,7 @@ import os
 import json
 import re
 import requests
-from datetime import date, timedelta
+from datetime import timedelta
 from decimal import Decimal
 
 from django.db.models import Sum, Avg, Count, Q
@@ -20,7 +20,11 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.http import StreamingHttpResponse
 
-from apps.jamath.models import Household, Member, Subscription, JournalEntry, JournalItem, Ledger, StaffMember, Announcement, DataAgentChatLog
+from apps.jamath import search as census_search
+from apps.jamath.census_stats import get_census_stats
+from apps.shared.context import get_tenant_context
+from apps.shared.rbac import get_effective_permissions
+from apps.jamath.models import Household, Member, Subscription, JournalEntry, JournalItem, Ledger, Announcement, DataAgentChatLog
 
 
 # =============================================================================
@@ -43,10 +47,9 @@ def get_user_permissions(user):
             'description': 'Full administrator access to all data'
         }
     
-    # Get all active roles for this user
-    staff_roles = StaffMember.objects.filter(user=user, is_active=True).select_related('role')
-    
-    if not staff_roles.exists():
+    snapshot = get_effective_permissions(user)
+
+    if snapshot is None or not snapshot['is_active']:
         # Default: view-only access
         return {
             'level': 'viewer',
@@ -57,8 +60,7 @@ def get_user_permissions(user):
             'can_see_sensitive': False,
             'description': 'No staff role assigned - limited access'
         }
-    
-    # Merge permissions from all roles (highest wins)
+
     merged = {
         'level': 'staff',
         'census': 'none',
@@ -68,20 +70,18 @@ def get_user_permissions(user):
         'can_see_sensitive': False,
         'description': ''
     }
-    
-    role_names = []
-    for sm in staff_roles:
-        role_names.append(sm.role.name)
-        perms = sm.role.permissions or {}
-        for key in ['census', 'finance', 'welfare', 'surveys']:
-            if perms.get(key) == 'admin':
-                merged[key] = 'admin'
-            elif perms.get(key) == 'view' and merged[key] != 'admin':
-                merged[key] = 'view'
-    
-    merged['description'] = f"Staff roles: {', '.join(role_names)}"
+
+    # Same merged policy HasStaffPermission enforces ('read' and 'view' both mean view-only)
+    perms = snapshot['permissions']
+    for key in ['census', 'finance', 'welfare', 'surveys']:
+        if perms.get(key) == 'admin':
+            merged[key] = 'admin'
+        elif perms.get(key) in ('view', 'read'):
+            merged[key] = 'view'
+
+    merged['description'] = f"Staff role: {snapshot['role_name'] or 'Custom permissions'}"
     merged['can_see_sensitive'] = merged['finance'] == 'admin'
-    
+
     return merged
 
 
@@ -128,54 +128,14 @@ def stream_simple_response(text):
 
 
 
-def get_household_stats():
-    """Get summary statistics about households."""
-    total = Household.objects.count()
-    zakat_eligible = Household.objects.filter(economic_status='ZAKAT_ELIGIBLE').count()
-    verified = Household.objects.filter(is_verified=True).count()
-    
-    return {
-        "total_households": total,
-        "zakat_eligible": zakat_eligible,
-        "sahib_e_nisab": total - zakat_eligible,
-        "verified": verified,
-        "unverified": total - verified
-    }
+def get_household_stats(mosque_id=None):
+    """Get summary statistics about households (from the census snapshot)."""
+    return get_census_stats(mosque_id)['households']
 
 
-def get_member_stats():
-    """Get summary statistics about members."""
-    total = Member.objects.filter(is_alive=True).count()
-    male = Member.objects.filter(is_alive=True, gender='MALE').count()
-    female = Member.objects.filter(is_alive=True, gender='FEMALE').count()
-    employed = Member.objects.filter(is_alive=True, is_employed=True).count()
-    
-    # Age distribution
-    today = date.today()
-    children = Member.objects.filter(is_alive=True, dob__gt=today - timedelta(days=18*365)).count()
-    adults = Member.objects.filter(
-        is_alive=True, 
-        dob__lte=today - timedelta(days=18*365),
-        dob__gt=today - timedelta(days=60*365)
-    ).count()
-    seniors = Member.objects.filter(is_alive=True, dob__lte=today - timedelta(days=60*365)).count()
-    
-    # Marital status
-    married = Member.objects.filter(is_alive=True, marital_status='MARRIED').count()
-    widowed = Member.objects.filter(is_alive=True, marital_status='WIDOWED').count()
-    
-    return {
-        "total_members": total,
-        "male": male,
-        "female": female,
-        "employed": employed,
-        "unemployed": total - employed,
-        "children_under_18": children,
-        "adults_18_60": adults,
-        "seniors_above_60": seniors,
-        "married": married,
-        "widowed": widowed
-    }
+def get_member_stats(mosque_id=None):
+    """Get summary statistics about living members (from the census snapshot)."""
+    return get_census_stats(mosque_id)['members']
 
 
 def get_financial_summary(months_back=6):
@@ -305,23 +265,20 @@ def get_subscription_status():
     }
 
 
-def search_households(query):
-    """Search households by name, phone, or ID."""
-    results = Household.objects.filter(
-        Q(membership_id__icontains=query) |
-        Q(phone_number__icontains=query) |
-        Q(address__icontains=query) |
-        Q(members__full_name__icontains=query)
-    ).distinct()[:10]
-    
+def search_households(query, limit=10):
+    """Search households by name, phone, or ID (any of the words in `query`)."""
+    results = census_search.search_households(
+        query, Household.objects.with_summary(), match_all=False
+    )[:limit]
+
     return [
         {
             "id": h.id,
             "membership_id": h.membership_id,
             "address": h.address[:50] if h.address else "",
             "phone": h.phone_number,
-            "head_name": h.members.filter(is_head_of_family=True).first().full_name if h.members.filter(is_head_of_family=True).exists() else "Unknown",
-            "member_count": h.members.count(),
+            "head_name": h.head_name,
+            "member_count": h.member_count,
             "economic_status": h.get_economic_status_display()
         }
         for h in results
@@ -622,7 +579,7 @@ class BasiraDataAgentView(APIView):
             return stream_simple_response("⚠️ API key not configured. Please contact administrator.")
 
         # Build data context based on user permissions
-        data_context = self._build_data_context(sanitized_message, user_perms)
+        data_context = self._build_data_context(sanitized_message, user_perms, request)
 
         # Build system prompt with RBAC context
         current_dt = timezone.now().strftime('%A, %d %B %Y, %I:%M %p IST')
@@ -661,17 +618,19 @@ class BasiraDataAgentView(APIView):
         print(f"Sending request to openrouter with {len(messages)} messages")
         return self._stream_response(api_key, messages, request.user)
 
-    def _build_data_context(self, query, user_perms):
+    def _build_data_context(self, query, user_perms, request):
         """Build relevant data context based on user permissions."""
         context_parts = []
+        tenant = get_tenant_context(request)
+        mosque_id = tenant.mosque_id if tenant.is_staff_member else None
 
         # Census data - only if user has access
         if user_perms['census'] in ['admin', 'view']:
             context_parts.append("### HOUSEHOLD STATISTICS")
-            context_parts.append(json.dumps(get_household_stats(), indent=2))
+            context_parts.append(json.dumps(get_household_stats(mosque_id), indent=2))
 
             context_parts.append("\n### MEMBER STATISTICS")
-            context_parts.append(json.dumps(get_member_stats(), indent=2))
+            context_parts.append(json.dumps(get_member_stats(mosque_id), indent=2))
 
             # Search if query contains search keywords
             # Proactive Search: Always check if query contains potential names or numbers
@@ -688,18 +647,12 @@ class BasiraDataAgentView(APIView):
                     if word[0].isupper() or word.isdigit() or len(clean_word) >= 4:
                         potential_search_terms.append(clean_word)
             
-            # If we have potential terms, try searching
-            found_results = []
-            for term in potential_search_terms[:3]: # Limit to first 3 terms to avoid spamming DB
-                results = search_households(term)
-                if results:
-                    found_results.extend(results)
-            
+            # One ranked query for all terms; households matching more of them come first
+            found_results = search_households(' '.join(potential_search_terms[:3]), limit=5) if potential_search_terms else []
+
             if found_results:
-                # Deduplicate based on ID
-                unique_results = {r['id']: r for r in found_results}.values()
                 context_parts.append(f"\n### POTENTIAL SEARCH MATCHES")
-                context_parts.append(json.dumps(list(unique_results)[:5], indent=2))
+                context_parts.append(json.dumps(found_results, indent=2))
         else:
             context_parts.append("### CENSUS DATA")
             context_parts.append("You do not have permission to view household/member data.")
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class PortalPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 profile for member portal passwords.
+
+    Portal logins are far more frequent than staff logins, so their work
+    factor is tuned separately via PORTAL_PBKDF2_ITERATIONS. Staff accounts
+    keep Django's default hasher.
+    """
+    algorithm = 'pbkdf2_sha256_portal'
+
+    @property
+    def iterations(self):
+        return settings.PORTAL_PBKDF2_ITERATIONS
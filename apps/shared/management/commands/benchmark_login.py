@@ -0,0 +1,86 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from apps.shared.backends import PORTAL_HASHER, find_user_by_identifier
+
+BENCH_PREFIX = 'member_bench'
+PASSWORD = 'bench-password'
+
+
+class Command(BaseCommand):
+    help = 'Measure login cost: user lookup (legacy OR/iexact vs lower() index) against password hashing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50000,
+                            help='Synthetic portal users to add (rolled back afterwards)')
+        parser.add_argument('--lookups', type=int, default=200, help='Lookups to time per strategy')
+        parser.add_argument('--hashes', type=int, default=5, help='Password checks to time per hasher')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options['users'])
+            identifiers = [f"{BENCH_PREFIX}{random.randrange(options['users'])}".upper()
+                           for _ in range(options['lookups'])]
+
+            self.stdout.write("User lookup:")
+            legacy = self._time_lookups('OR + iexact (legacy)', self._legacy_lookup, identifiers)
+            indexed = self._time_lookups('lower() index', find_user_by_identifier, identifiers)
+            self.stdout.write(self.style.SUCCESS(f"  Lookup speed-up: {legacy / indexed:.1f}x"))
+            self._explain(identifiers[0])
+
+            self.stdout.write("Password check:")
+            for label, hasher in (('default', 'default'), ('portal profile', PORTAL_HASHER)):
+                encoded = make_password(PASSWORD, hasher=hasher)
+                self._time_hashes(label, encoded, options['hashes'])
+
+            # Leave auth_user exactly as it was
+            transaction.set_rollback(True)
+
+    def _seed(self, count):
+        User = get_user_model()
+        encoded = make_password(PASSWORD, hasher=PORTAL_HASHER)
+        start = time.perf_counter()
+        User.objects.bulk_create(
+            (User(username=f"{BENCH_PREFIX}{i}", email=f"{BENCH_PREFIX}{i}@example.com", password=encoded)
+             for i in range(count)),
+            batch_size=5000,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE auth_user')
+        self.stdout.write(f"Seeded {count} users in {time.perf_counter() - start:.1f}s")
+
+    @staticmethod
+    def _legacy_lookup(identifier):
+        User = get_user_model()
+        return User.objects.filter(Q(username__iexact=identifier) | Q(email__iexact=identifier)).first()
+
+    def _time_lookups(self, label, lookup, identifiers) -> float:
+        start = time.perf_counter()
+        for identifier in identifiers:
+            if lookup(identifier) is None:
+                raise AssertionError(f"{label} did not find {identifier}")
+        per_lookup = (time.perf_counter() - start) / len(identifiers) * 1000
+        self.stdout.write(f"  {label:>22}: {per_lookup:8.3f} ms/lookup")
+        return per_lookup
+
+    def _explain(self, identifier):
+        from django.db.models.functions import Lower
+
+        User = get_user_model()
+        qs = User.objects.alias(username_lower=Lower('username')).filter(username_lower=identifier.lower())
+        plan = qs.explain()
+        self.stdout.write(f"  Indexed plan: {plan.splitlines()[0].strip()}")
+
+    def _time_hashes(self, label, encoded, count):
+        start = time.perf_counter()
+        for _ in range(count):
+            check_password(PASSWORD, encoded)
+        per_check = (time.perf_counter() - start) / count * 1000
+        algorithm, iterations = encoded.split('$')[:2]
+        self.stdout.write(f"  {label:>22}: {per_check:8.1f} ms/check ({algorithm}, {iterations} iterations)")
@@ -0,0 +1,31 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from apps.shared.cache import TieredCache
+
+
+class Command(BaseCommand):
+    help = 'Show tiered cache hit rates per namespace, summed over all processes'
+
+    def handle(self, *args, **options):
+        cache = caches['default']
+        if not isinstance(cache, TieredCache):
+            self.stderr.write(self.style.ERROR('The default cache is not a TieredCache'))
+            return
+
+        # Include this process' counters, then read the shared totals
+        cache.flush_metrics()
+        stats = cache.shared_stats()
+        if not stats:
+            self.stdout.write('No cache metrics recorded yet')
+            return
+
+        self.stdout.write(f"{'namespace':<20} {'local':>10} {'remote':>10} {'waits':>8} {'misses':>10} {'hit rate':>9}")
+        for namespace, counts in stats.items():
+            hits = counts['local_hits'] + counts['remote_hits'] + counts['waits']
+            total = hits + counts['misses']
+            rate = f"{hits / total:.1%}" if total else '-'
+            self.stdout.write(
+                f"{namespace:<20} {counts['local_hits']:>10} {counts['remote_hits']:>10} "
+                f"{counts['waits']:>8} {counts['misses']:>10} {rate:>9}"
+            )
@@ -4,6 +4,22 @@ Middleware for Role-Based Access Control
 from django.http import HttpResponseForbidden, HttpResponseRedirect
 from django.conf import settings
 
+from .context import LazyTenantContext, get_tenant_context
+
+
+class TenantContextMiddleware:
+    """
+    Installs `request.tenant_context`: the user's mosque, staff membership,
+    role and merged permissions, loaded on first use and shared by every
+    permission class, mixin and view handling the request.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.tenant_context = LazyTenantContext(request)
+        return self.get_response(request)
+
 
 class RBACMiddleware:
     """
@@ -34,27 +50,18 @@ class RBACMiddleware:
             return self.get_response(request)
         
         # Check Permissions
-        # Need to import inside method to avoid circular import or app registry issues
-        from apps.jamath.models import StaffMember
-        
-        try:
-            # Check if user is assigned a role in this tenant
-            staff_member = StaffMember.objects.select_related('role').get(user=request.user)
-            role_perms = staff_member.role.permissions # {'finance': 'admin', 'welfare': 'read'}
-            
-            user_perm = role_perms.get(module)
-            
-            if not user_perm:
-                 # No explicit permission for this module -> Block
-                 from django.http import JsonResponse
-                 return JsonResponse({'error': f'Access Denied: You do not have permission for the {module} module.'}, status=403)
-                 
-        except StaffMember.DoesNotExist:
-            # Not a staff member -> Block if superuser check fails (or allow superusers always?)
+        from django.http import JsonResponse
+        context = get_tenant_context(request)
+
+        if not context.is_staff_member:
+            # Not a staff member -> Block unless superuser
             if request.user.is_superuser:
                 return self.get_response(request)
-            
-            from django.http import JsonResponse
             return JsonResponse({'error': 'Access Denied: You are not a staff member assigned to this tenant.'}, status=403)
 
+        # Check if user is assigned a role in this tenant, e.g. {'finance': 'admin', 'welfare': 'read'}
+        if not context.permissions.get(module):
+            # No explicit permission for this module -> Block
+            return JsonResponse({'error': f'Access Denied: You do not have permission for the {module} module.'}, status=403)
+
         return self.get_response(request)
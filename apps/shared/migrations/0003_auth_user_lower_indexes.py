@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('shared', '0002_usertokenversion'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS auth_user_username_lower ON auth_user (lower(username));',
+            reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS auth_user_username_lower;',
+        ),
+        migrations.RunSQL(
+            sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS auth_user_email_lower ON auth_user (lower(email));',
+            reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS auth_user_email_lower;',
+        ),
+    ]
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 import uuid
 
@@ -51,9 +53,31 @@ class SystemConfig(models.Model):
         # Ensure only one instance exists
         if not self.pk and SystemConfig.objects.exists():
             return SystemConfig.objects.first()
-        return super(SystemConfig, self).save(*args, **kwargs)
+        result = super(SystemConfig, self).save(*args, **kwargs)
+        cache.bump(SYSTEM_CONFIG_NAMESPACE)
+        return result
 
     @classmethod
     def get_solo(cls):
-        obj, created = cls.objects.get_or_create(pk=1)
-        return obj
+        """The singleton, served from the tiered cache until it is saved again."""
+        def load():
+            obj, created = cls.objects.get_or_create(pk=1)
+            return obj
+        return cache.get_or_compute(SYSTEM_CONFIG_NAMESPACE, 'solo', load, 60 * 60)
+
+
+SYSTEM_CONFIG_NAMESPACE = 'system-config'
+
+
+class UserTokenVersion(models.Model):
+    """
+    Per-user counter embedded in issued JWTs. Bumping it revokes every
+    token issued before, without a token blacklist.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                primary_key=True, related_name='token_version')
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id} v{self.version}"
@@ -0,0 +1,236 @@
+"""
+One-time password store shared by the portal, registration and password
+reset flows.
+
+Codes live in Redis (OTP_STORE_URL, defaulting to REDIS_URL) so every web
+replica sees the same state:
+- Each code expires through a key TTL; there is no separate expiry field
+- A code is checked and deleted in one atomic step (a Lua script on
+  Redis), so two concurrent verifications can't both consume it
+- Wrong guesses are counted with INCR, and the code is burnt after
+  MAX_ATTEMPTS so a 6-digit code can't be brute-forced
+- Requests are rate limited per identifier (phone/email) and per client IP
+  with fixed-window INCR counters
+
+`memory://` selects an in-process stand-in with the same semantics, used by
+tests and by local development without Redis.
+"""
+import json
+import logging
+import secrets
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+
+# (limit, window seconds)
+IDENTIFIER_RATE_LIMIT = (5, 15 * 60)
+IP_RATE_LIMIT = (30, 60 * 60)
+
+
+class OTPError(Exception):
+    """Verification failed; the message is safe to show to the user."""
+
+
+class OTPRateLimited(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__('Too many OTP requests. Please try again later.')
+        self.retry_after = retry_after
+
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+# KEYS[1]: the code; further KEYS are deleted with it. Returns the stored
+# value when its "code" matches ARGV[1], 0 on a mismatch, nil when absent.
+_CONSUME_SCRIPT = """
+local stored = redis.call('GET', KEYS[1])
+if not stored then return nil end
+if cjson.decode(stored)['code'] ~= ARGV[1] then return 0 end
+redis.call('DEL', unpack(KEYS))
+return stored
+"""
+
+
+class RedisOTPBackend:
+    def __init__(self, url: str):
+        import redis
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self._consume = self.client.register_script(_CONSUME_SCRIPT)
+
+    def consume(self, key: str, code: str, *also_delete: str):
+        """
+        Atomically delete `key` (and `also_delete`) if its JSON "code" is
+        `code`. Returns the stored value, False on a mismatch, None if absent.
+        """
+        result = self._consume(keys=[key, *also_delete], args=[code])
+        return False if result == 0 else result
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        self.client.set(key, value, ex=ttl)
+
+    def get(self, key: str):
+        return self.client.get(key)
+
+    def delete(self, *keys: str) -> None:
+        self.client.delete(*keys)
+
+    def incr(self, key: str, ttl: int) -> int:
+        """Increment a counter, starting its TTL on the first increment."""
+        pipe = self.client.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, ttl, nx=True)
+        count, _ = pipe.execute()
+        return count
+
+    def ttl(self, key: str) -> int:
+        return max(self.client.ttl(key), 0)
+
+
+class MemoryOTPBackend:
+    """Single-process stand-in for RedisOTPBackend (tests, local development)."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        item = self._data.get(key)
+        if item is not None and item[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return item
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+
+    def get(self, key):
+        with self._lock:
+            item = self._live(key)
+            return item[0] if item else None
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def consume(self, key, code, *also_delete):
+        with self._lock:
+            item = self._live(key)
+            if item is None:
+                return None
+            if json.loads(item[0])['code'] != code:
+                return False
+            for k in (key, *also_delete):
+                self._data.pop(k, None)
+            return item[0]
+
+    def incr(self, key, ttl):
+        with self._lock:
+            item = self._live(key)
+            count = (int(item[0]) if item else 0) + 1
+            expires = item[1] if item else time.monotonic() + ttl
+            self._data[key] = (str(count), expires)
+            return count
+
+    def ttl(self, key):
+        with self._lock:
+            item = self._live(key)
+            return max(int(item[1] - time.monotonic()), 0) if item else 0
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_backends = {}
+
+
+def get_backend():
+    url = settings.OTP_STORE_URL
+    if url not in _backends:
+        _backends[url] = MemoryOTPBackend() if url.startswith('memory://') else RedisOTPBackend(url)
+    return _backends[url]
+
+
+def clear_memory_backend() -> None:
+    backend = get_backend()
+    if isinstance(backend, MemoryOTPBackend):
+        backend.clear()
+
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+def client_ip(request) -> str:
+    """Client address as DRF throttles see it (honours NUM_PROXIES)."""
+    from rest_framework.throttling import BaseThrottle
+
+    return BaseThrottle().get_ident(request)
+
+
+class OTPStore:
+    """OTP codes for one flow (`purpose`), keyed by phone number or email."""
+
+    def __init__(self, purpose: str, ttl: int):
+        self.purpose = purpose
+        self.ttl = ttl
+
+    def _key(self, kind: str, value) -> str:
+        return f"otp:{self.purpose}:{kind}:{value}"
+
+    def check_rate_limit(self, identifier: str, ip: str = None) -> None:
+        """Count a code request; raises OTPRateLimited once a window is exhausted."""
+        backend = get_backend()
+        checks = [(self._key('rl-id', identifier), IDENTIFIER_RATE_LIMIT)]
+        if ip:
+            checks.append((self._key('rl-ip', ip), IP_RATE_LIMIT))
+        for key, (limit, window) in checks:
+            if backend.incr(key, window) > limit:
+                raise OTPRateLimited(backend.ttl(key) or window)
+
+    def issue(self, identifier: str, code: str = None, **payload) -> str:
+        """Store a new code (replacing any previous one) and reset its attempt counter."""
+        code = code or f"{secrets.randbelow(900000) + 100000}"
+        backend = get_backend()
+        backend.delete(self._key('attempts', identifier))
+        backend.set(self._key('code', identifier), json.dumps({'code': code, **payload}), self.ttl)
+        return code
+
+    def verify(self, identifier: str, code: str) -> dict:
+        """
+        Consume the code for `identifier` and return the payload it was issued with.
+
+        Raises OTPError when the code is missing, expired, wrong, or has
+        been guessed at too many times.
+        """
+        backend = get_backend()
+        code_key = self._key('code', identifier)
+        attempts_key = self._key('attempts', identifier)
+        stored = backend.consume(code_key, str(code), attempts_key)
+        if stored is None:
+            raise OTPError('OTP expired or not found')
+
+        if stored is False:
+            if backend.incr(attempts_key, self.ttl) >= MAX_ATTEMPTS:
+                backend.delete(code_key, attempts_key)
+                logger.warning(f"OTP for {self.purpose} burnt after {MAX_ATTEMPTS} failed attempts")
+                raise OTPError('Too many incorrect attempts. Please request a new OTP.')
+            raise OTPError('Invalid OTP')
+
+        stored = json.loads(stored)
+        stored.pop('code')
+        return stored
+
+
+portal_otp_store = OTPStore('portal', ttl=5 * 60)
+registration_otp_store = OTPStore('register', ttl=10 * 60)
+password_reset_otp_store = OTPStore('reset', ttl=10 * 60)
@@ -0,0 +1,246 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Each view declares a `cursor_ordering` whose last field is unique (normally
+`id`), e.g. `('-date', '-created_at', '-id')` for vouchers, or defines
+`get_cursor_ordering(queryset)` when it depends on the filters (search
+results page by relevance). A page is the
+next `page_size` rows after the cursor, found with an index range scan
+instead of OFFSET, so page 500 costs the same as page 1 and rows inserted
+while a client pages never cause duplicates or gaps.
+
+Nullable ordering fields are fine: NULLs sort after every value ascending
+and before them descending (PostgreSQL's default), and the keyset follows
+that order, so rows with a NULL key are neither skipped nor repeated.
+
+Cursors are opaque: the ordering values of the last row, JSON-encoded.
+Totals are opt-in (`?count=true`) and cached briefly, since COUNT(*) over a
+large mosque costs more than the page itself.
+
+Compatibility: while API_LEGACY_UNPAGINATED_LISTS is on (the default), only
+requests that ask for a page (`?page_size=` or `?cursor=`) are paginated and
+every other request gets the old plain list. A view can override this with
+`legacy_unpaginated = False` once its frontend screen has moved over.
+"""
+import base64
+import binascii
+import datetime
+import decimal
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, FieldError, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+COUNT_CACHE_TIMEOUT = 60
+
+
+def _json_value(value):
+    # Full precision: a cursor must compare equal to the row it came from
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"Cannot use {type(value).__name__} in a cursor")
+
+
+def _model_field(model, path):
+    """Field behind an ordering path such as `household__membership_id`, or None if there is none."""
+    field = None
+    for name in path.split('__'):
+        if field is not None:
+            if not field.is_relation:
+                return None
+            model = field.related_model
+        try:
+            field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+    return field
+
+
+class StableCursorPagination(BasePagination):
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # Used when the view doesn't declare `cursor_ordering`
+    default_ordering = ('-id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self._is_paginated(request, view):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        queryset = queryset.order_by(*self.ordering)
+
+        self.count = self._count(queryset) if self._wants_count(request) else None
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            self.fields = self._ordering_fields(queryset)
+            queryset = queryset.filter(self._after(self.clean_cursor(cursor)))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        payload = {'next': self.get_next_link()}
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+    # ------------------------------------------------------------------
+
+    def _is_paginated(self, request, view):
+        legacy = getattr(view, 'legacy_unpaginated', None)
+        if legacy is None:
+            legacy = getattr(settings, 'API_LEGACY_UNPAGINATED_LISTS', True)
+        if not legacy:
+            return True
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        # An explicit ?ordering= from the view's OrderingFilter wins
+        for backend in getattr(view, 'filter_backends', ()):
+            if issubclass(backend, OrderingFilter) and backend.ordering_param in request.query_params:
+                ordering = backend().get_ordering(request, queryset, view)
+        if not ordering and hasattr(view, 'get_cursor_ordering'):
+            ordering = view.get_cursor_ordering(queryset)
+        ordering = list(ordering or getattr(view, 'cursor_ordering', None) or self.default_ordering)
+        # The keyset must end in a unique column, or rows sharing a value could be skipped
+        if ordering[-1].lstrip('-') not in ('id', 'pk'):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return ordering
+
+    def _after(self, values):
+        """Rows strictly after `values` in `self.ordering`, as an OR of prefixes."""
+        condition = Q()
+        equal = Q()
+        for field, value, model_field in zip(self.ordering, values, self.fields):
+            name = field.lstrip('-')
+            descending = field.startswith('-')
+            nullable = model_field is None or model_field.null
+            if value is None:
+                # In the NULL block: only non-NULL rows (descending) come after it
+                if descending:
+                    condition |= equal & Q(**{f"{name}__isnull": False})
+                equal &= Q(**{f"{name}__isnull": True})
+                continue
+            beyond = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+            if nullable and not descending:
+                beyond |= Q(**{f"{name}__isnull": True})
+            condition |= equal & beyond
+            equal &= Q(**{name: value})
+        return condition
+
+    # ------------------------------------------------------------------
+    # Cursors
+    # ------------------------------------------------------------------
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def _ordering_fields(self, queryset):
+        """The field (or annotation output field) behind each ordering entry, None if unknown."""
+        annotations = queryset.query.annotations
+        fields = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            if name in annotations:
+                try:
+                    fields.append(annotations[name].output_field)
+                except FieldError:
+                    fields.append(None)
+            else:
+                fields.append(_model_field(queryset.model, name))
+        return fields
+
+    def clean_cursor(self, values):
+        """Cursor values converted to their ordering field's type; a cursor that doesn't fit is invalid."""
+        cleaned = []
+        for value, model_field in zip(values, self.fields):
+            # encode_cursor only writes scalars, and None only for nullable fields
+            if isinstance(value, (list, dict)):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                if model_field is not None and not model_field.null:
+                    raise NotFound(self.invalid_cursor_message)
+                cleaned.append(value)
+                continue
+            if model_field is not None:
+                try:
+                    value = model_field.to_python(value)
+                except (TypeError, ValueError, ValidationError):
+                    raise NotFound(self.invalid_cursor_message)
+            cleaned.append(value)
+        return cleaned
+
+    def encode_cursor(self, obj) -> str:
+        values = [getattr(obj, field.lstrip('-')) for field in self.ordering]
+        payload = json.dumps(values, default=_json_value, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.count_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    # ------------------------------------------------------------------
+    # Totals
+    # ------------------------------------------------------------------
+
+    def _wants_count(self, request) -> bool:
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+
+    def _count(self, queryset) -> int:
+        # Keyed by the filtered SQL, which already includes the mosque scope
+        sql, params = queryset.order_by().query.sql_with_params()
+        digest = hashlib.md5(repr((sql, params)).encode(), usedforsecurity=False).hexdigest()
+        return cache.get_or_compute('page-count', digest, queryset.count, COUNT_CACHE_TIMEOUT)
@@ -0,0 +1,77 @@
+"""
+Phone numbers are stored in E.164 form (`+919876543210`) so that login and
+OTP flows can find a household with one exact, indexed lookup.
+
+Numbers typed without a country code get PHONE_DEFAULT_COUNTRY_CODE. Staff
+searches on partial numbers go through `phone_search_q`, which only issues
+prefix matches: on the number itself, or on its reverse for "last digits"
+searches. Both are served by the pattern indexes on Household.
+"""
+import re
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.functions import Reverse
+from django.db.models.lookups import StartsWith
+
+# E.164 allows at most 15 digits after the '+'
+E164_MAX_LENGTH = 16
+
+_SEPARATORS = re.compile(r'[\s\-().]')
+
+
+def _country_code() -> str:
+    return getattr(settings, 'PHONE_DEFAULT_COUNTRY_CODE', '91')
+
+
+def normalize_phone(value):
+    """
+    Return `value` in E.164 form, or None if it is not a phone number.
+
+    Accepts `+91 98765-43210`, `0091…`, `09876543210` (national trunk
+    prefix) and bare national numbers.
+    """
+    if not value:
+        return None
+    value = _SEPARATORS.sub('', str(value))
+
+    if value.startswith('+'):
+        digits = value[1:]
+    elif value.startswith('00'):
+        digits = value[2:]
+    else:
+        digits = value.lstrip('0') if value.startswith('0') else value
+        country_code = _country_code()
+        # Already carries the country code, just without the '+'
+        if not (len(digits) > 10 and digits.startswith(country_code)):
+            digits = country_code + digits
+
+    if not digits.isdigit() or not 8 <= len(digits) <= E164_MAX_LENGTH - 1:
+        return None
+    return f"+{digits}"
+
+
+def phone_search_q(field: str, query: str, min_digits: int = 3):
+    """
+    Q matching `field` against a partial number, or None if `query` isn't one.
+
+    A query with a country code (or a full national number) is matched as a
+    prefix of the stored number. Shorter queries match either the beginning
+    of the national number or its last digits.
+    """
+    query = _SEPARATORS.sub('', query or '')
+    digits = query[1:] if query.startswith('+') else query
+    if not digits.isdigit() or len(digits) < min_digits:
+        return None
+
+    if query.startswith('+'):
+        return Q(**{f"{field}__startswith": query})
+    if len(digits) >= 10:
+        normalized = normalize_phone(query)
+        return Q(**{f"{field}__startswith": normalized}) if normalized else None
+
+    return (
+        Q(**{f"{field}__startswith": f"+{_country_code()}{digits.lstrip('0')}"})
+        # Suffix match as a prefix match on the reversed number (see Household.Meta.indexes)
+        | Q(StartsWith(Reverse(field), digits[::-1]))
+    )
@@ -0,0 +1,81 @@
+"""
+Effective staff permissions, shared across processes.
+
+A user's permissions are the role's JSON policy with the StaffMember's
+overrides applied on top. The merged result is cached in a per-user
+namespace of the tiered cache (`apps.shared.cache`); saving or deleting a
+StaffRole or StaffMember bumps the namespace of every affected user, so the
+next request misses and re-reads Postgres while every other request is a
+cache hit: one GET of the namespace version, with the snapshot itself usually
+served from the process-local tier.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+# Cached snapshots expire on their own as a safety net for missed signals
+SNAPSHOT_TIMEOUT = 60 * 60
+
+# Marker cached for users without a staff assignment
+_NOT_STAFF = 'not-staff'
+
+
+def _namespace(user_id) -> str:
+    return f"perms:{user_id}"
+
+
+def get_permission_version(user_id) -> int:
+    """Current permission version for a user (seeded on first use)."""
+    return cache.namespace_version(_namespace(user_id))
+
+
+def _bump(user_ids) -> None:
+    cache.bump(*(_namespace(uid) for uid in user_ids))
+
+
+def bump_permission_version(user_ids) -> None:
+    """
+    Invalidate cached permissions for `user_ids`.
+
+    Bumped immediately so the current transaction sees its own change, and
+    again on commit so nothing cached by other requests in between survives.
+    """
+    user_ids = {uid for uid in user_ids if uid}
+    if not user_ids:
+        return
+    _bump(user_ids)
+    transaction.on_commit(lambda: _bump(user_ids))
+
+
+def _load_snapshot(user_id):
+    from apps.jamath.models import StaffMember
+
+    staff = StaffMember.objects.select_related('role').filter(user_id=user_id).first()
+    if staff is None:
+        return _NOT_STAFF
+
+    role_perms = staff.role.permissions if staff.role else {}
+    return {
+        'staff_id': staff.id,
+        'mosque_id': staff.mosque_id,
+        'role_id': staff.role_id,
+        'role_name': staff.role.name if staff.role else '',
+        'is_active': staff.is_active,
+        # Member-level overrides win over the role's policy; inactive staff get nothing
+        'permissions': {**role_perms, **(staff.permissions or {})} if staff.is_active else {},
+    }
+
+
+def get_effective_permissions(user):
+    """
+    Staff snapshot for `user`, or None if they have no staff assignment.
+
+    Returns a dict with `staff_id`, `mosque_id`, `role_id`, `role_name`,
+    `is_active` and the merged module `permissions`.
+    """
+    if not user or not user.is_authenticated:
+        return None
+
+    snapshot = cache.get_or_compute(
+        _namespace(user.pk), 'snapshot', lambda: _load_snapshot(user.pk), SNAPSHOT_TIMEOUT
+    )
+    return None if snapshot == _NOT_STAFF else snapshot
@@ -0,0 +1,131 @@
+"""
+Sparse fieldsets and relation expansion for API responses.
+
+- `?fields=id,membership_id,head_name` returns only those fields; dotted
+  names reach into nested serializers (`?fields=id,members.full_name`)
+- `?expand=household` replaces a related object's primary key with the
+  object itself, for fields listed in the serializer's `Meta.expandable_fields`
+- Views using `SparseFieldsetViewMixin` declare the select_related /
+  prefetch_related lookups each field needs, so relations that are not
+  serialized are not loaded either
+
+Without these parameters responses are unchanged. Only reads are affected:
+writes always validate and return the full representation.
+"""
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def _param(request, name):
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    return {part.strip() for part in value.split(',') if part.strip()}
+
+
+def _under(paths, prefix):
+    """Names one level below `prefix` ('' is the top level): {'a', 'b.c'} under 'b' -> {'c'}."""
+    if prefix:
+        start = prefix + '.'
+        paths = {p[len(start):] for p in paths if p.startswith(start)}
+    return {p.split('.', 1)[0] for p in paths}
+
+
+def requested_fields(request, prefix=''):
+    """Field names requested at `prefix`, or None when that level isn't restricted."""
+    fields = _param(request, FIELDS_PARAM)
+    if fields is None:
+        return None
+    names = _under(fields, prefix)
+    if prefix and not names:
+        # `?fields=members` asks for members with all of their default fields
+        return None
+    return names
+
+
+def requested_expansions(request, prefix=''):
+    return _under(_param(request, EXPAND_PARAM) or set(), prefix)
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin implementing `?fields=` and `?expand=`.
+
+    `Meta.expandable_fields` maps a field to `(serializer, default_fields)`;
+    the serializer may be a dotted path for classes defined later, and
+    `default_fields` is what an expanded object shows unless `?fields=`
+    names its fields (`household.address`).
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.default_fields = kwargs.pop('default_fields', None)
+        super().__init__(*args, **kwargs)
+
+    def _field_path(self):
+        names = []
+        node = self
+        while node is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        return '.'.join(reversed(names))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        path = self._field_path()
+
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in requested_expansions(request, path) & set(expandable) & set(fields):
+            serializer, default_fields = expandable[name]
+            if isinstance(serializer, str):
+                serializer = import_string(serializer)
+            fields[name] = serializer(read_only=True, default_fields=default_fields)
+
+        wanted = requested_fields(request, path)
+        if wanted is None:
+            wanted = self.default_fields
+        if wanted is not None:
+            fields = {name: field for name, field in fields.items() if name in wanted}
+        return fields
+
+
+class SparseFieldsetViewMixin:
+    """
+    Loads only the relations needed by the fields a request asks for.
+
+    `select_related_fields` / `prefetch_related_fields` map a top-level
+    serializer field to the lookups it needs; `expand_select_related` maps
+    an expandable field to the lookups needed once it is expanded.
+    """
+    select_related_fields = {}
+    prefetch_related_fields = {}
+    expand_select_related = {}
+
+    def wants_field(self, name) -> bool:
+        fields = requested_fields(self.request)
+        return fields is None or name in fields
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select, prefetch = [], []
+        for name, lookups in self.select_related_fields.items():
+            if self.wants_field(name):
+                select.extend(lookups)
+        for name in requested_expansions(self.request) & set(self.expand_select_related):
+            if self.wants_field(name):
+                select.extend(self.expand_select_related[name])
+        for name, lookups in self.prefetch_related_fields.items():
+            if self.wants_field(name):
+                # Several fields may share one Prefetch; Django rejects repeats
+                prefetch.extend(lookup for lookup in lookups if lookup not in prefetch)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
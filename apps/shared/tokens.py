@@ -0,0 +1,113 @@
+"""
+JWT issuing with tenant claims.
+
+Access and refresh tokens carry signed claims so authenticated requests can
+be resolved without identity queries:
+
+- `tv`: the user's token version; bumping it revokes every earlier token
+- `mosque_id`: the tenant the user belongs to
+- `household_id`: set for member portal logins only
+- `pv` + `staff`: the permission version and effective-permission snapshot
+  at issue time, trusted while `pv` is still current (see `apps.shared.rbac`)
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .rbac import get_effective_permissions, get_permission_version
+
+TENANT_CLAIMS = ('tv', 'mosque_id', 'household_id', 'pv', 'staff')
+
+TOKEN_VERSION_TIMEOUT = 24 * 60 * 60
+
+
+def _token_version_key(user_id) -> str:
+    return f"auth:token-version:{user_id}"
+
+
+def get_token_version(user_id) -> int:
+    """Current token version for a user, from the cache or the database."""
+    from .models import UserTokenVersion
+
+    key = _token_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = UserTokenVersion.objects.filter(user_id=user_id).values_list('version', flat=True).first() or 0
+        cache.set(key, version, timeout=TOKEN_VERSION_TIMEOUT)
+    return version
+
+
+def revoke_tokens(user_id) -> int:
+    """Invalidate every access and refresh token issued to the user so far."""
+    from .models import UserTokenVersion
+
+    UserTokenVersion.objects.get_or_create(user_id=user_id)
+    UserTokenVersion.objects.filter(user_id=user_id).update(version=F('version') + 1)
+    version = UserTokenVersion.objects.values_list('version', flat=True).get(user_id=user_id)
+
+    key = _token_version_key(user_id)
+    cache.set(key, version, timeout=TOKEN_VERSION_TIMEOUT)
+    # Readers may have re-cached the old value before the commit
+    transaction.on_commit(lambda: cache.set(key, version, timeout=TOKEN_VERSION_TIMEOUT))
+    return version
+
+
+def set_tenant_claims(token, user, household=None) -> None:
+    """Write the tenant claims for `user` onto `token`."""
+    for claim in TENANT_CLAIMS:
+        token.payload.pop(claim, None)
+
+    token['tv'] = get_token_version(user.pk)
+    if household is not None:
+        token['household_id'] = household.id
+        token['mosque_id'] = household.mosque_id
+        return
+
+    snapshot = get_effective_permissions(user)
+    token['pv'] = get_permission_version(user.pk)
+    if snapshot is not None:
+        token['staff'] = snapshot
+        token['mosque_id'] = snapshot['mosque_id']
+
+
+def issue_tokens(user, household=None) -> RefreshToken:
+    """Refresh token (and, via `.access_token`, access token) with tenant claims."""
+    refresh = RefreshToken.for_user(user)
+    set_tenant_claims(refresh, user, household)
+    return refresh
+
+
+class TenantTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Username/password login (`/api/token/`) issuing tokens with tenant claims."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        set_tenant_claims(token, user)
+        return token
+
+
+class TenantTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refuses revoked refresh tokens and re-issues staff claims that went stale."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        if refresh.payload.get('tv', 0) != get_token_version(user_id):
+            raise InvalidToken('Token has been revoked')
+
+        data = super().validate(attrs)
+
+        if 'household_id' not in refresh.payload and refresh.payload.get('pv') != get_permission_version(user_id):
+            from django.contrib.auth import get_user_model
+
+            user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+            if user is not None:
+                access = AccessToken(data['access'])
+                set_tenant_claims(access, user)
+                data['access'] = str(access)
+        return data
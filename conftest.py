@@ -0,0 +1,20 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(settings):
+    """Give each test empty in-memory caches instead of the shared ones."""
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'apps.shared.cache.TieredCache',
+            'OPTIONS': {
+                'REMOTE': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'},
+            },
+        }
+    }
+    from django.core.cache import cache
+    cache.clear()
+
+    settings.OTP_STORE_URL = 'memory://'
+    from apps.shared.otp import clear_memory_backend
+    clear_memory_backend()
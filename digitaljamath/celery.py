@@ -12,6 +12,10 @@ app = Celery('digitaljamath')
 #   should have a `CELERY_` prefix.
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
+# The beat schedule is CELERY_BEAT_SCHEDULE in settings.py; run it with
+#   celery -A digitaljamath beat
+# alongside the workers (the `beat` service in docker-compose).
+
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
 
@@ -1,5 +1,7 @@
 import os
 from pathlib import Path
+from celery.schedules import crontab
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -33,13 +35,51 @@ if not DEBUG:
     X_FRAME_OPTIONS = 'DENY'
 
 
+# Two-tier cache (apps/shared/cache.py): per-process LRU in front of Redis,
+# shared by the web and worker containers. Without REDIS_URL the shared tier
+# is process-local, so replicas would miss each other's invalidations; that
+# is only allowed for a single DEBUG dev server.
+REDIS_URL = os.environ.get('REDIS_URL')
+if not REDIS_URL and not DEBUG:
+    raise ImproperlyConfigured('REDIS_URL must be set when DEBUG is off')
+if REDIS_URL:
+    CACHE_REMOTE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'KEY_PREFIX': 'dj',
+    }
+else:
+    CACHE_REMOTE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'digitaljamath',
+    }
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
-        'LOCATION': os.path.join(BASE_DIR, 'django_cache'),
+        'BACKEND': 'apps.shared.cache.TieredCache',
+        'OPTIONS': {
+            'REMOTE': CACHE_REMOTE,
+            'LOCAL_MAX_ENTRIES': int(os.environ.get('CACHE_LOCAL_MAX_ENTRIES', '2048')),
+        },
     }
 }
 
+# OTP codes, attempt counters and rate limits (apps/shared/otp.py). Must be
+# shared by all web replicas; memory:// is a single-process stand-in.
+OTP_STORE_URL = os.environ.get('OTP_STORE_URL', REDIS_URL or 'memory://')
+
+# Country code assumed for phone numbers entered without one (apps/shared/phone.py)
+PHONE_DEFAULT_COUNTRY_CODE = os.environ.get('PHONE_DEFAULT_COUNTRY_CODE', '91')
+
+# Rendered receipt PDFs (content-addressed, see apps/jamath/receipt_cache.py)
+RECEIPT_CACHE_DIR = os.environ.get('RECEIPT_CACHE_DIR', os.path.join(BASE_DIR, 'receipt_cache'))
+
+# Year-end 80G statement batches (see apps/jamath/donor_statements.py)
+DONOR_STATEMENT_DIR = os.environ.get('DONOR_STATEMENT_DIR', os.path.join(BASE_DIR, 'donor_statements'))
+DONOR_STATEMENT_WORKERS = int(os.environ.get('DONOR_STATEMENT_WORKERS', '0'))  # 0 = one per CPU
+
+# Uploaded census files and their error reports (see apps/jamath/census_import.py)
+CENSUS_IMPORT_DIR = os.environ.get('CENSUS_IMPORT_DIR', os.path.join(BASE_DIR, 'census_imports'))
+
 
 
 
@@ -60,6 +100,7 @@ SHARED_APPS = (
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.admin',
+    'django.contrib.postgres',  # OpClass/GIN indexes and lookups
 )
 
 TENANT_APPS = (
@@ -81,6 +122,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.shared.middleware.TenantContextMiddleware',
     'apps.shared.middleware.RBACMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -119,6 +161,17 @@ DATABASES = {
 }
 
 # Password validation
+# Django's defaults, plus a separately tunable profile for portal members
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'apps.shared.hashers.PortalPBKDF2PasswordHasher',
+]
+PORTAL_PBKDF2_ITERATIONS = int(os.environ.get('PORTAL_PBKDF2_ITERATIONS', '600000'))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -153,22 +206,43 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Celery Configuration
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+CELERY_TIMEZONE = TIME_ZONE
+# Periodic jobs, run by the `beat` service in docker-compose
+CELERY_BEAT_SCHEDULE = {
+    'expire-memberships': {
+        'task': 'apps.jamath.tasks.expire_memberships_task',
+        'schedule': crontab(hour=0, minute=15),
+    },
+    'prune-sync-tombstones': {
+        'task': 'apps.jamath.tasks.prune_change_log_task',
+        'schedule': crontab(hour=3, minute=0),
+    },
+}
 
 # DRF & JWT Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.shared.authentication.TenantJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated', # Secure by default
     ),
+    # Keyset pagination on each view's `cursor_ordering` (apps/shared/pagination.py)
+    'DEFAULT_PAGINATION_CLASS': 'apps.shared.pagination.StableCursorPagination',
 }
 
+# While on, list endpoints only paginate requests that pass ?page_size= or
+# ?cursor=; turn off once the frontend reads {"next", "results"} everywhere.
+API_LEGACY_UNPAGINATED_LISTS = os.environ.get('API_LEGACY_UNPAGINATED_LISTS', 'True') == 'True'
+
 from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Tokens carry tenant/portal claims and a revocable token version (apps/shared/tokens.py)
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.shared.tokens.TenantTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.shared.tokens.TenantTokenRefreshSerializer',
 }
 
 # CORS Configuration
@@ -23,9 +23,10 @@ from apps.jamath.api import (
     UserProfileView, ChangeEmailView, ChangePasswordView,
     # Mizan Ledger
     LedgerViewSet, SupplierViewSet, JournalEntryViewSet, LedgerReportsView,
-    TallyExportView,
+    TallyExportView, TallyXMLExportView, DonorStatementBatchViewSet, CensusImportViewSet,
+    CustomDataIndexViewSet,
     # RBAC
-    StaffRoleViewSet, StaffMemberViewSet, MemberStaffLookupView,
+    StaffRoleViewSet, StaffMemberViewSet, MemberStaffLookupView, CensusStatsView, SyncView,
     # Telegram
 
     # Receipts PDF
@@ -74,11 +75,14 @@ router.register(r'jamath/reminders', ReminderViewSet, basename='reminders')
 router.register(r'jamath/service-requests', ServiceRequestViewSet)
 router.register(r'jamath/staff-roles', StaffRoleViewSet)
 router.register(r'jamath/staff-members', StaffMemberViewSet)
+router.register(r'jamath/census-imports', CensusImportViewSet)
+router.register(r'jamath/custom-data-indexes', CustomDataIndexViewSet)
 
 # Mizan Ledger (Double-Entry Accounting)
 router.register(r'ledger/accounts', LedgerViewSet)
 router.register(r'ledger/suppliers', SupplierViewSet)
 router.register(r'ledger/journal-entries', JournalEntryViewSet)
+router.register(r'ledger/donor-statements', DonorStatementBatchViewSet)
 
 # Welfare
 router.register(r'welfare/volunteers', VolunteerViewSet)
@@ -144,6 +148,7 @@ urlpatterns = [
     path('api/ledger/reports/<str:report_type>/', LedgerReportsView.as_view(), name='ledger-reports'),
     path('api/ledger/seed/', SeedLedgerView.as_view(), name='seed-ledger'),
     path('api/ledger/export/', TallyExportView.as_view(), name='ledger-export'),
+    path('api/ledger/export/tally-xml/', TallyXMLExportView.as_view(), name='ledger-export-tally-xml'),
     path('api/ledger/receipt/<int:entry_id>/pdf/', ReceiptPDFView.as_view(), name='admin-receipt-pdf'),
     
 
@@ -156,6 +161,8 @@ urlpatterns = [
     # Staff Lookup
     path('api/jamath/staff-lookup/', MemberStaffLookupView.as_view(), name='member-staff-lookup'),
     path('api/jamath/finance-summary/', DashboardStatsView.as_view(), name='finance-summary'),
+    path('api/jamath/census-stats/', CensusStatsView.as_view(), name='census-stats'),
+    path('api/jamath/sync/', SyncView.as_view(), name='jamath-sync'),
     path('api/jamath/activity-log-staff/', ActivityLogStaffSourceView.as_view(), name='activity-log-staff'),
     
     # REST API Router